@@ -8,79 +8,434 @@
 #       └── styles.css
 
 # app.py - Aplikasi Flask Utama
-from flask import Flask, render_template, request, jsonify
-from fuzzy_mamdani import FuzzyMamdani
-import plot
-import plotly.graph_objs as go
+# Hanya Flask dan NumPy yang dimuat saat start. Plotly, pandas dan
+# pipeline inkremental baru diimpor ketika route yang membutuhkannya pertama kali dipanggil.
+from flask import Flask, render_template, request, jsonify, make_response, abort, Response, stream_with_context
+from batch_mamdani import FEED_DIVISIONS
+from pond_registry import PondRegistry
+from metrics import metrics
+import numpy as np
+from datetime import datetime, timezone
+import hashlib
+import threading
 import json
+import os
+import sys
 
 app = Flask(__name__)
 
+# Aplikasi web selalu mencatat metrik kecuali dimatikan dengan WEB_FUZZY_METRICS=0
+if 'WEB_FUZZY_METRICS' not in os.environ:
+    metrics.enable()
+
+PLOT_POINTS = 501
+
 class FuzzyWebApp:
-    def __init__(self):
-        self.fuzzy_model = FuzzyMamdani()
+    """Plot keanggotaan dan /calculate dari PondModel registry dan engine NumPy-nya"""
+
+    def __init__(self, model, engine):
+        self.model = model
+        self.engine = engine
+
+    @staticmethod
+    def _plot_universe(lower, upper, membership_params):
+        """Titik plot yang rata ditambah semua sudut himpunan agar bentuk trapesium tidak terpotong"""
+        corners = [p for _, params in membership_params for p in params if lower <= p <= upper]
+        return np.unique(np.concatenate([np.linspace(lower, upper, PLOT_POINTS), corners]))
+
+    def membership_params(self, variable_type):
+        """(judul sumbu x, batas universe, [(label, params)]) untuk input1/input2/output"""
+        from membership import universe_bounds
+
+        if variable_type == 'input1':
+            return 'Temperatur', universe_bounds(self.model.temperatur_range), self.model.temperatur_params
+        if variable_type == 'input2':
+            return 'pH', universe_bounds(self.model.ph_range), self.model.ph_params
+        # Takaran dalam persen rentang pakan mingguan (min_feed = 0 %, max_feed = 100 %)
+        scale = 100 / FEED_DIVISIONS
+        params = [(label, [p * scale for p in positions]) for label, positions in self.model.feed_positions.items()]
+        return 'Takaran (% rentang pakan)', (0.0, 100.0), params
 
     def generate_membership_plot(self, variable_type):
         """Membuat plot keanggotaan fuzzy"""
-        if variable_type == 'input1':
-            x_values = self.fuzzy_model.input1_range
-            memberships = self.fuzzy_model.calculate_input1_membership()
-        elif variable_type == 'input2':
-            x_values = self.fuzzy_model.input2_range
-            memberships = self.fuzzy_model.calculate_input2_membership()
-        else:
-            x_values = self.fuzzy_model.output_range
-            memberships = self.fuzzy_model.calculate_output_membership()
+        import plotly
+        import plotly.graph_objs as go
+        from membership import evaluate_membership
+
+        title, (lower, upper), membership_params = self.membership_params(variable_type)
+        x_values = self._plot_universe(lower, upper, membership_params)
 
         # Membuat plot Plotly
         traces = []
-        for label, membership in memberships.items():
+        for label, params in membership_params:
             trace = go.Scatter(
-                x=x_values, 
-                y=membership, 
-                mode='lines', 
+                x=x_values,
+                y=evaluate_membership(x_values, params),
+                mode='lines',
                 name=label
             )
             traces.append(trace)
 
         layout = go.Layout(
-            title=f'Fungsi Keanggotaan {variable_type}',
-            xaxis={'title': 'Nilai'},
+            title=f'Fungsi Keanggotaan {title}',
+            xaxis={'title': title},
             yaxis={'title': 'Derajat Keanggotaan'}
         )
 
-        return json.dumps({"data": traces, "layout": layout}, cls=plot.utils.PlotlyJSONEncoder)
+        return json.dumps({"data": traces, "layout": layout}, cls=plotly.utils.PlotlyJSONEncoder)
+
+    def calculate(self, input1, input2, weight=None):
+        """Inferensi satu bacaan; result dalam persen rentang pakan, feed_amount (gram) jika weight diberikan"""
+        batch = self.engine.infer(np.array([input1]), np.array([input2]), 0.0, float(FEED_DIVISIONS))
+        min_feed, max_feed = self.model.feed_bounds(np.nan if weight is None else weight)
+        fields = inference_fields(self.engine, batch, 0, min_feed, max_feed)
+
+        temp_degrees, ph_degrees = fields['temperatur_memberships'], fields['ph_memberships']
+        alpha_predikats = fields['alpha_predikats']
+        return {
+            **fields,
+            'fuzzy_steps': {
+                'fuzzification': f'Temperatur {temp_degrees}, pH {ph_degrees}',
+                'inference': f'Aturan aktif {alpha_predikats}' if alpha_predikats else 'Tidak ada aturan yang aktif',
+                'defuzzification': 'Centroid: ' + (f"{fields['result']} % rentang pakan" if alpha_predikats else '-')
+            }
+        }
+
+class ModelRegistry:
+    """Menyimpan model fuzzy dan plot keanggotaannya selama proses berjalan"""
+
+    PLOT_TYPES = ('input1', 'input2', 'output')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fuzzy_apps = {}
+        self._plots = None
+        self._ponds = None
+        self._pipelines = {}
+        self.etag = None
+        self.last_modified = None
+
+    def get_app(self, pond=None):
+        """FuzzyWebApp dengan model dan engine kolam dari registry, dipakai ulang oleh semua request
+
+        Raises:
+            ValueError: Jika kolam tidak terdaftar.
+        """
+        pond = None if pond is None else str(pond)
+        if pond not in self._fuzzy_apps:
+            ponds = self.get_ponds()
+            model, engine = ponds.model(pond), ponds.engine(pond)
+            with self._lock:
+                self._fuzzy_apps.setdefault(pond, FuzzyWebApp(model, engine))
+        return self._fuzzy_apps[pond]
+
+    def get_ponds(self):
+        """Registry model per kolam dari WEB_FUZZY_PONDS (default data/ponds.json); engine dikompilasi sekali per model"""
+        if self._ponds is None:
+            with self._lock:
+                if self._ponds is None:
+                    # Cache inferensi opsional untuk bacaan yang berulang, mis. WEB_FUZZY_MEMO_QUANTUM=0.01
+                    self._ponds = PondRegistry.from_config(
+                        os.environ.get('WEB_FUZZY_PONDS'),
+                        memo_quantum=float(os.environ.get('WEB_FUZZY_MEMO_QUANTUM', 0)) or None,
+                        memo_size=int(os.environ.get('WEB_FUZZY_MEMO_SIZE', 65536)))
+        return self._ponds
+
+    def get_batch_engine(self, pond=None):
+        """Engine inferensi vektor model kolam untuk endpoint batch"""
+        return self.get_ponds().engine(pond)
+
+    def get_pipeline(self, pond=None):
+        """Pipeline inkremental per kolam untuk bacaan yang dikirim ke /readings, state-nya dilanjutkan dari disk"""
+        if pond not in self._pipelines:
+            ponds = self.get_ponds()
+            model, engine = ponds.model(pond), ponds.engine(pond)
+            with self._lock:
+                if pond not in self._pipelines:
+                    from incremental import IncrementalPipeline
+                    from PathManager import OUTPUT_DIR
+
+                    output_dir = OUTPUT_DIR if pond is None else OUTPUT_DIR / 'ponds' / str(pond)
+                    self._pipelines[pond] = IncrementalPipeline(ponds.weekly_index(pond), output_dir=output_dir,
+                                                                model=model, engine=engine)
+        return self._pipelines[pond]
+
+    def get_plots(self):
+        """JSON plot keanggotaan dihitung sekali beserta ETag dan waktu pembuatannya"""
+        if self._plots is None:
+            fuzzy_app = self.get_app()
+            with self._lock:
+                if self._plots is None:
+                    plots = {name: fuzzy_app.generate_membership_plot(name) for name in self.PLOT_TYPES}
+                    digest = hashlib.sha1(''.join(plots[name] for name in self.PLOT_TYPES).encode()).hexdigest()
+                    self.etag = digest
+                    self.last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+                    self._plots = plots
+        return self._plots
+
+    def conditional_response(self, response):
+        """Tambahkan ETag/Last-Modified dan balas 304 jika browser sudah punya versi yang sama"""
+        response.set_etag(self.etag)
+        response.last_modified = self.last_modified
+        response.cache_control.no_cache = True
+        return response.make_conditional(request)
+
+
+model_registry = ModelRegistry()
+
+BATCH_SIZE = 512
+PASSTHROUGH_KEYS = ('id', 'time', 'pond')
+
+def _to_float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def _rounded(value):
+    return None if np.isnan(value) else round(float(value), 4)
+
+def _batched(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _reading_error(item):
+    """Pesan error untuk bacaan yang bukan objek JSON (baris NDJSON rusak dibawa sebagai ValueError)"""
+    if isinstance(item, dict):
+        return None
+    if isinstance(item, ValueError):
+        return str(item)
+    return 'Bacaan harus berupa objek JSON'
+
+def infer_readings(ponds, items, default_weight=None, default_pond=None):
+    """Inferensi satu micro-batch bacaan; setiap bacaan dirutekan ke model kolamnya ('pond')"""
+    outputs = [None] * len(items)
+    # Bacaan yang tidak valid dijawab per baris agar sisa batch tetap diproses
+    valid = []
+    for i, item in enumerate(items):
+        error = _reading_error(item)
+        if error is None:
+            valid.append(i)
+        else:
+            outputs[i] = {'error': error}
+
+    for pond, rows in ponds.split([items[i].get('pond', default_pond) for i in valid]).items():
+        rows = [valid[j] for j in rows]
+        group = [items[i] for i in rows]
+        try:
+            engine, model = ponds.engine(pond), ponds.model(pond)
+        except ValueError as e:
+            group_outputs = [{**{key: item[key] for key in PASSTHROUGH_KEYS if key in item}, 'error': str(e)}
+                             for item in group]
+        else:
+            group_outputs = _infer_group(engine, model, group, default_weight)
+        for i, output in zip(rows, group_outputs):
+            outputs[i] = output
+    return outputs
+
+def inference_fields(engine, batch, i, min_feed, max_feed):
+    """Field hasil bacaan ke-i yang sama untuk /calculate dan /calculate/batch (batch dengan batas 0..FEED_DIVISIONS)"""
+    fraction = batch.feed[i] / FEED_DIVISIONS
+    fired = np.flatnonzero(np.round(batch.activations[i], 4) > 0)
+    return {
+        'result': _rounded(fraction * 100),
+        'feed_amount': _rounded(min_feed + fraction * (max_feed - min_feed)),
+        'temperatur_memberships': {t: _rounded(v) for t, v in zip(engine.temp_terms, batch.temp_degrees[i])},
+        'ph_memberships': {t: _rounded(v) for t, v in zip(engine.ph_terms, batch.ph_degrees[i])},
+        'alpha_predikats': {engine.rule_labels[r]: _rounded(batch.activations[i, r]) for r in fired}
+    }
+
+def _infer_group(engine, model, items, default_weight=None):
+    """Inferensi bacaan satu kolam (input1 = temperatur, input2 = pH, weight opsional)"""
+    temps = np.array([_to_float(item.get('input1')) for item in items])
+    phs = np.array([_to_float(item.get('input2')) for item in items])
+    weights = np.array([_to_float(item.get('weight', default_weight)) for item in items])
+
+    # Dengan batas 0..FEED_DIVISIONS hasil feed adalah posisi ternormalisasi pada himpunan takaran
+    batch = engine.infer(temps, phs, 0.0, float(FEED_DIVISIONS))
+    min_feeds, max_feeds = model.feed_bounds(weights)
+
+    for i, item in enumerate(items):
+        output = {key: item[key] for key in PASSTHROUGH_KEYS if key in item}
+        if np.isnan(temps[i]) or np.isnan(phs[i]):
+            output['error'] = 'input1 dan input2 harus berupa angka'
+            yield output
+            continue
+
+        output.update({
+            'input1': float(temps[i]),
+            'input2': float(phs[i]),
+            'weight': _rounded(weights[i]),
+            **inference_fields(engine, batch, i, min_feeds[i], max_feeds[i])
+        })
+        yield output
+
+def _request_readings():
+    """Bacaan dari body JSON (array atau {"readings": [...], "weight": w, "pond": p}) atau NDJSON per baris"""
+    default_weight = request.args.get('weight', type=float)
+    default_pond = request.args.get('pond')
+    if request.mimetype in ('application/x-ndjson', 'application/jsonl'):
+        def _lines():
+            for number, line in enumerate(request.stream, 1):
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except ValueError as e:
+                        # Baris rusak tidak menghentikan stream; infer_readings membalasnya sebagai error
+                        yield ValueError(f'Baris {number} bukan JSON yang valid: {e}')
+        return _lines(), default_weight, default_pond
+
+    payload = request.get_json(force=True)
+    if isinstance(payload, dict):
+        default_weight = payload.get('weight', default_weight)
+        default_pond = payload.get('pond', default_pond)
+        payload = payload.get('readings', [])
+    if not isinstance(payload, list):
+        abort(400)
+    return iter(payload), default_weight, default_pond
 
 @app.route('/')
 def index():
-    fuzzy_app = FuzzyWebApp()
-    
     # Plot keanggotaan default
-    input1_plot = fuzzy_app.generate_membership_plot('input1')
-    input2_plot = fuzzy_app.generate_membership_plot('input2')
-    output_plot = fuzzy_app.generate_membership_plot('output')
+    plots = model_registry.get_plots()
+
+    response = make_response(render_template('index.html', 
+                             input1_plot=plots['input1'],
+                             input2_plot=plots['input2'],
+                             output_plot=plots['output']))
+    return model_registry.conditional_response(response)
+
+@app.route('/plots/<variable_type>')
+def membership_plot(variable_type):
+    plots = model_registry.get_plots()
+    if variable_type not in plots:
+        abort(404)
 
-    return render_template('index.html', 
-                           input1_plot=input1_plot,
-                           input2_plot=input2_plot,
-                           output_plot=output_plot)
+    response = make_response(plots[variable_type])
+    response.mimetype = 'application/json'
+    return model_registry.conditional_response(response)
 
 @app.route('/calculate', methods=['POST'])
 def calculate():
-    fuzzy_app = FuzzyWebApp()
-    data = request.json
-    
+    data = request.get_json(force=True, silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Body harus berupa objek JSON'}), 400
+    try:
+        # Model kolam dari registry ('pond' di body atau ?pond=), seperti /calculate/batch dan /readings
+        fuzzy_app = model_registry.get_app(data.get('pond', request.args.get('pond')))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
     # Proses perhitungan fuzzy
-    input1 = data.get('input1')
-    input2 = data.get('input2')
-    
+    input1 = _to_float(data.get('input1'))
+    input2 = _to_float(data.get('input2'))
+    weight = _to_float(data.get('weight', request.args.get('weight')))
+    if np.isnan(input1) or np.isnan(input2):
+        return jsonify({'error': 'input1 dan input2 harus berupa angka'}), 400
+
     # Lakukan inferensi fuzzy
-    result = fuzzy_app.fuzzy_model.defuzzification(input1, input2)
+    with metrics.timer('http.calculate'):
+        result = fuzzy_app.calculate(input1, input2, None if np.isnan(weight) else weight)
+    return jsonify(result)
+
+@app.route('/calculate/batch', methods=['POST'])
+def calculate_batch():
+    ponds = model_registry.get_ponds()
+    readings, default_weight, default_pond = _request_readings()
+
+    def generate():
+        for batch in _batched(readings, BATCH_SIZE):
+            with metrics.timer('http.calculate_batch', records=len(batch)):
+                lines = [json.dumps(output) + '\n'
+                         for output in infer_readings(ponds, batch, default_weight, default_pond)]
+            metrics.incr('http.calculate_batch.records', len(batch))
+            yield ''.join(lines)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/readings', methods=['POST'])
+def post_readings():
+    """Bacaan sensor baru (Time, Temperature, pH, pond opsional) diproses tanpa menghitung ulang histori"""
+    import pandas as pd
+
+    readings, _, default_pond = _request_readings()
+    readings = list(readings)
+    ponds = model_registry.get_ponds()
+
+    # Pipeline menyimpan state, jadi request dengan bacaan tidak valid ditolak utuh dengan error per baris
+    times = pd.to_datetime(pd.Series([reading.get('Time') if isinstance(reading, dict) else None
+                                      for reading in readings], dtype=object), format='mixed', errors='coerce')
+    errors = []
+    for i, reading in enumerate(readings):
+        error = _reading_error(reading)
+        if error is None and pd.isna(times.iloc[i]):
+            error = 'Time tidak dapat dibaca sebagai tanggal'
+        if error is not None:
+            errors.append({'index': i, 'error': error})
+    if errors:
+        return jsonify({'error': 'Bacaan tidak valid', 'rows': errors}), 400
+
+    groups = ponds.split([reading.get('pond', default_pond) for reading in readings])
+    try:
+        # Semua kolam divalidasi dulu agar request dengan kolam tak dikenal tidak diproses sebagian
+        pipelines = {pond: model_registry.get_pipeline(pond) for pond in groups}
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    output = []
+    for pond, rows in groups.items():
+        frame = pd.DataFrame([readings[i] for i in rows], columns=['Time', 'Temperature', 'pH'])
+        frame['Time'] = times.iloc[rows].to_numpy()
+        for result in pipelines[pond].ingest(frame):
+            entry = {'time': str(result['Time']), 'feed_amount': result['feed_amount']}
+            if pond is not None:
+                entry['pond'] = pond
+            output.append(entry)
+    return jsonify(output)
+
+@app.route('/readings', methods=['GET'])
+def get_readings():
+    """Rentang waktu dari store pipeline (?start=&end= atau ?last=7D, ?kind=results|readings, ?pond=)"""
+    from reading_store import records_to_json
+
+    kind = request.args.get('kind', 'results')
+    if kind not in ('results', 'readings'):
+        return jsonify({'error': "kind harus 'results' atau 'readings'"}), 400
+    try:
+        pipeline = model_registry.get_pipeline(request.args.get('pond'))
+        store = pipeline.results_store if kind == 'results' else pipeline.readings_store
+        # Slice dari memmap yang sama dengan yang ditulis pipeline, tanpa membaca CSV
+        if 'start' in request.args or 'end' in request.args:
+            records = store.range(request.args.get('start'), request.args.get('end'))
+        else:
+            records = store.last(request.args.get('last', '7D'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    return jsonify(records_to_json(store, records))
+
+@app.route('/ponds')
+def list_ponds():
+    """Model dan kolam yang terdaftar di registry"""
+    return jsonify(model_registry.get_ponds().describe())
 
-    return jsonify({
-        'result': result,
-        'fuzzy_steps': fuzzy_app.fuzzy_model.get_inference_steps()
-    })
+@app.route('/metrics')
+def metrics_endpoint():
+    """Counter dan histogram per tahap; ?format=prometheus untuk format teks Prometheus"""
+    if request.args.get('format') == 'prometheus':
+        return Response(metrics.to_prometheus(), mimetype='text/plain; version=0.0.4')
+    snapshot = metrics.snapshot()
+    if 'time_filter' in sys.modules:  # Cache rule base hanya ada jika pipeline skfuzzy sudah dimuat
+        snapshot['rule_base_cache'] = sys.modules['time_filter'].rule_base_cache.stats()
+    if model_registry._ponds is not None and model_registry._ponds.memo_quantum:
+        snapshot['inference_cache'] = model_registry._ponds.stats()
+    return jsonify(snapshot)
 
 if __name__ == '__main__':
     app.run(debug=True)
@@ -0,0 +1,331 @@
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import List
+from typing import Tuple
+
+import numpy as np
+
+from membership import FuzzyVariable
+from membership import term_degrees
+from membership import trapmf
+
+if TYPE_CHECKING:  # Hanya untuk anotasi, engine ini cukup dengan NumPy
+    from skfuzzy import control as ctrl
+
+
+# Basis aturan: (temperatur, ph, takaran), urutan sama dengan 'Rule 1' .. 'Rule 9'
+RULE_DEFINITIONS: List[Tuple[str, str, str]] = [
+    ('normal', 'asam', 'sedang'),
+    ('normal', 'netral', 'banyak'),
+    ('normal', 'basa', 'sedang'),
+    ('rendah', 'asam', 'sedikit'),
+    ('rendah', 'netral', 'sedang'),
+    ('rendah', 'basa', 'sedikit'),
+    ('tinggi', 'asam', 'sedikit'),
+    ('tinggi', 'netral', 'sedang'),
+    ('tinggi', 'basa', 'sedikit')
+]
+
+# Posisi himpunan takaran dalam satuan step = (max_feed - min_feed) / FEED_DIVISIONS
+FEED_POSITIONS: Dict[str, List[float]] = {
+    'sedikit': [0, 0, 2, 3],
+    'sedang': [2, 3, 5, 6],
+    'banyak': [5, 7, 8, 8]
+}
+FEED_DIVISIONS = 8
+
+# Himpunan fuzzy input: (label, parameter trapmf) dan universe (awal, akhir, step)
+TEMPERATUR_MEMBERSHIP_PARAMS: List[Tuple[str, List[float]]] = [
+    ('rendah', [14, 14, 23, 25]),
+    ('normal', [23, 25, 29, 31]),
+    ('tinggi', [29, 31, 40, 40])
+]
+PH_MEMBERSHIP_PARAMS: List[Tuple[str, List[float]]] = [
+    ('asam', [0, 0, 5, 6.5]),
+    ('netral', [5, 6.5, 7.5, 9]),
+    ('basa', [7.5, 9, 14, 14])
+]
+TEMPERATUR_RANGE = (14, 40, 0.001)
+PH_RANGE = (4, 14, 0.001)
+
+
+def calculate_feed_bounds(weight, multiplier_min=0.03, multiplier_max=0.05):
+    min_feed = weight * multiplier_min
+    max_feed = weight * multiplier_max
+    return min_feed, max_feed
+
+
+@dataclass
+class BatchResult:
+    """Arrays produced by one batch inference call"""
+    temp_degrees: np.ndarray      # (N, temperatur terms)
+    ph_degrees: np.ndarray        # (N, pH terms)
+    activations: np.ndarray       # (N, rules)
+    term_activations: np.ndarray  # (N, takaran terms)
+    feed: np.ndarray              # (N,), NaN if the record is invalid or no rule fired
+    feed_degrees: np.ndarray      # (N, takaran terms) at the defuzzified feed
+
+
+def _edge_intersections(feed_positions: np.ndarray) -> np.ndarray:
+    """x positions where two sloped edges of different trapezoids cross"""
+    lines = []
+    for a, b, c, d in feed_positions:
+        if b > a:
+            lines.append((1 / (b - a), -a / (b - a)))
+        if d > c:
+            lines.append((-1 / (d - c), d / (d - c)))
+
+    points = []
+    for i in range(len(lines)):
+        for j in range(i + 1, len(lines)):
+            (m1, k1), (m2, k2) = lines[i], lines[j]
+            if m1 != m2:
+                points.append((k2 - k1) / (m1 - m2))
+    points = np.array(points, dtype=float)
+    lo, hi = feed_positions.min(), feed_positions.max()
+    return points[(points >= lo) & (points <= hi)]
+
+
+def trapezoid_centroid(feed_positions: np.ndarray, term_activations: np.ndarray) -> np.ndarray:
+    """
+    Exact centroid of max_t min(alpha_t, trapmf_t) without sampling a universe.
+
+    The aggregated shape is piecewise linear, so it is linear between the
+    sorted union of the trapezoid corners, the alpha-level crossings of every
+    sloped edge and the edge/edge intersections. Area and moment are then
+    integrated exactly per segment.
+
+    Args:
+        feed_positions (np.ndarray): (terms, 4) trapmf parameters.
+        term_activations (np.ndarray): (N, terms) clipping level per term.
+
+    Returns:
+        np.ndarray: (N,) centroids, NaN where the aggregated area is zero.
+    """
+    n_rows = term_activations.shape[0]
+    a, b, c, d = feed_positions.T
+    alphas = term_activations[:, np.newaxis, :]                       # (N, 1, terms)
+    rising = a[np.newaxis, :, np.newaxis] + alphas * (b - a)[np.newaxis, :, np.newaxis]
+    falling = d[np.newaxis, :, np.newaxis] - alphas * (d - c)[np.newaxis, :, np.newaxis]
+
+    fixed = np.concatenate([feed_positions.ravel(), _edge_intersections(feed_positions)])
+    points = np.concatenate([
+        np.broadcast_to(fixed, (n_rows, fixed.size)),
+        rising.reshape(n_rows, -1),
+        falling.reshape(n_rows, -1)
+    ], axis=1)
+    points = np.sort(np.clip(points, feed_positions.min(), feed_positions.max()), axis=1)
+
+    values = np.zeros_like(points)
+    for t in range(feed_positions.shape[0]):
+        clipped = np.fmin(trapmf(points, feed_positions[t]), term_activations[:, t:t + 1])
+        values = np.fmax(values, clipped)
+
+    x0, x1 = points[:, :-1], points[:, 1:]
+    y0, y1 = values[:, :-1], values[:, 1:]
+    width = x1 - x0
+    area = (width * (y0 + y1) / 2).sum(axis=1)
+    moment = (width / 6 * (x0 * (2 * y0 + y1) + x1 * (y0 + 2 * y1))).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(area > 0, moment / area, np.nan)
+
+
+def alpha_cut_intervals(feed_positions: np.ndarray,
+                        term_activations: np.ndarray,
+                        alphas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Exact alpha-cut intervals of the aggregated output for many records and levels at once.
+
+    ``max_t min(alpha_t, trapmf_t(x)) >= alpha`` holds exactly where some term
+    with ``alpha_t >= alpha`` has ``trapmf_t(x) >= alpha``, i.e. on the union
+    of ``[a + alpha (b - a), d - alpha (d - c)]`` over those terms. The
+    intervals are sorted by start and overlapping or touching ones merged.
+
+    Args:
+        feed_positions (np.ndarray): (terms, 4) trapmf parameters.
+        term_activations (np.ndarray): (N, terms) clipping level per term.
+        alphas (np.ndarray): (N, L) alpha levels per record, NaN for unused slots.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: (N, L, terms) interval starts and ends in
+        the units of ``feed_positions``, packed to the front; unused slots NaN.
+    """
+    a, b, c, d = feed_positions.T
+    levels = alphas[:, :, np.newaxis]
+    active = (term_activations[:, np.newaxis, :] >= levels) & (levels > 0)
+    starts = np.where(active, a + levels * (b - a), np.nan)
+    ends = np.where(active, d - levels * (d - c), np.nan)
+
+    order = np.argsort(starts, axis=2)
+    starts = np.take_along_axis(starts, order, axis=2)
+    ends = np.take_along_axis(ends, order, axis=2)
+    valid = ~np.isnan(starts)
+
+    # Interval baru dimulai jika start melewati ujung terjauh interval sebelumnya
+    reach = np.fmax.accumulate(ends, axis=2)
+    previous_reach = np.concatenate([np.full(reach.shape[:2] + (1,), -np.inf), reach[:, :, :-1]], axis=2)
+    opens = valid & (starts > np.nan_to_num(previous_reach, nan=-np.inf))
+    continues = np.concatenate([valid[:, :, 1:] & ~opens[:, :, 1:], np.zeros(valid.shape[:2] + (1,), bool)], axis=2)
+    closes = valid & ~continues
+
+    pack_open = np.argsort(~opens, axis=2, kind='stable')
+    pack_close = np.argsort(~closes, axis=2, kind='stable')
+    merged_starts = np.take_along_axis(np.where(opens, starts, np.nan), pack_open, axis=2)
+    merged_ends = np.take_along_axis(np.where(closes, reach, np.nan), pack_close, axis=2)
+    return merged_starts, merged_ends
+
+
+class BatchMamdani:
+    """
+    Vectorized Mamdani inference over whole arrays of readings.
+
+    The takaran sets only depend on the weekly feed bounds through
+    ``min_feed + position * step``, so aggregation and centroid are computed
+    once on a normalized universe ``[0, FEED_DIVISIONS]`` and scaled back per
+    record. Records are processed in chunks of ``chunk_size`` rows so the
+    (rows x terms x universe) intermediate stays bounded.
+
+    With ``defuzzifier='analytic'`` (default) the centroid is integrated
+    exactly from the trapezoid breakpoints and no universe is sampled;
+    ``'sampled'`` keeps the discrete centroid on ``resolution`` points.
+    """
+
+    def __init__(self,
+                 temperatur: 'ctrl.Antecedent',
+                 ph: 'ctrl.Antecedent',
+                 rule_definitions: List[Tuple[str, str, str]] = RULE_DEFINITIONS,
+                 feed_positions: Dict[str, List[float]] = FEED_POSITIONS,
+                 resolution: int = 2001,
+                 chunk_size: int = 1024,
+                 defuzzifier: str = 'analytic'):
+        if defuzzifier not in ('analytic', 'sampled'):
+            raise ValueError("Defuzzifier tidak valid. Pilih 'analytic' atau 'sampled'.")
+
+        self.temperatur = temperatur
+        self.ph = ph
+        self.rule_definitions = list(rule_definitions)
+        self.rule_labels = [f'Rule {i}' for i in range(1, len(self.rule_definitions) + 1)]
+        self.chunk_size = chunk_size
+        self.defuzzifier = defuzzifier
+
+        self.temp_terms = list(temperatur.terms)
+        self.ph_terms = list(ph.terms)
+        self.feed_terms = list(feed_positions)
+        self.feed_positions = np.array([feed_positions[t] for t in self.feed_terms], dtype=float)
+
+        self._rule_temp = np.array([self.temp_terms.index(t) for t, _, _ in self.rule_definitions])
+        self._rule_ph = np.array([self.ph_terms.index(p) for _, p, _ in self.rule_definitions])
+        self._rule_feed = np.array([self.feed_terms.index(f) for _, _, f in self.rule_definitions])
+
+        self.universe = np.linspace(0, FEED_DIVISIONS, resolution)
+        self.feed_mfs = np.stack([trapmf(self.universe, p) for p in self.feed_positions])
+
+    def fuzzify(self, temperatures: np.ndarray, phs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Membership degrees of every reading in every temperatur/pH term"""
+        temp_memberships = term_degrees(self.temperatur, temperatures)
+        ph_memberships = term_degrees(self.ph, phs)
+        temp_degrees = np.stack([temp_memberships[term] for term in self.temp_terms], axis=1)
+        ph_degrees = np.stack([ph_memberships[term] for term in self.ph_terms], axis=1)
+        return temp_degrees, ph_degrees
+
+    def rule_activations(self, temp_degrees: np.ndarray, ph_degrees: np.ndarray) -> np.ndarray:
+        """Alpha-predikat (min of antecedent degrees) for every rule"""
+        return np.fmin(temp_degrees[:, self._rule_temp], ph_degrees[:, self._rule_ph])
+
+    def term_activations(self, activations: np.ndarray) -> np.ndarray:
+        """Max activation per takaran term; clipping each term once equals clipping each rule"""
+        result = np.zeros((activations.shape[0], len(self.feed_terms)))
+        for t in range(len(self.feed_terms)):
+            mask = self._rule_feed == t
+            if mask.any():
+                result[:, t] = activations[:, mask].max(axis=1)
+        return result
+
+    def aggregate(self, term_activations: np.ndarray) -> np.ndarray:
+        """Aggregated output membership on the normalized universe, shape (N, resolution)"""
+        clipped = np.fmin(term_activations[:, :, np.newaxis], self.feed_mfs[np.newaxis, :, :])
+        return clipped.max(axis=1)
+
+    def defuzzify_normalized(self, term_activations: np.ndarray) -> np.ndarray:
+        """Centroid of the aggregated output in step units, NaN where nothing fired"""
+        centroids = np.full(term_activations.shape[0], np.nan)
+        if self.defuzzifier == 'analytic':
+            for start in range(0, term_activations.shape[0], self.chunk_size):
+                chunk = term_activations[start:start + self.chunk_size]
+                centroids[start:start + self.chunk_size] = trapezoid_centroid(self.feed_positions, chunk)
+            return centroids
+
+        for start in range(0, term_activations.shape[0], self.chunk_size):
+            aggregated = self.aggregate(term_activations[start:start + self.chunk_size])
+            area = aggregated.sum(axis=1)
+            moment = aggregated @ self.universe
+            with np.errstate(invalid='ignore', divide='ignore'):
+                centroids[start:start + self.chunk_size] = np.where(area > 0, moment / area, np.nan)
+        return centroids
+
+    def alpha_cuts(self, term_activations: np.ndarray, alphas: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Alpha-cut intervals in step units for (N, L) alpha levels, see alpha_cut_intervals"""
+        return alpha_cut_intervals(self.feed_positions, term_activations, alphas)
+
+    def output_degrees(self, positions: np.ndarray) -> np.ndarray:
+        """Membership of normalized feed positions in every takaran term"""
+        return np.stack([
+            np.interp(positions, self.universe, mf) for mf in self.feed_mfs
+        ], axis=1)
+
+    def infer(self,
+              temperatures: np.ndarray,
+              phs: np.ndarray,
+              min_feeds: np.ndarray,
+              max_feeds: np.ndarray) -> BatchResult:
+        """Run fuzzification, inference and defuzzification for all records at once"""
+        temperatures = np.asarray(temperatures, dtype=float)
+        phs = np.asarray(phs, dtype=float)
+        min_feeds = np.broadcast_to(np.asarray(min_feeds, dtype=float), temperatures.shape)
+        max_feeds = np.broadcast_to(np.asarray(max_feeds, dtype=float), temperatures.shape)
+        valid = np.isfinite(temperatures) & np.isfinite(phs)
+
+        temp_degrees, ph_degrees = self.fuzzify(np.where(valid, temperatures, 0), np.where(valid, phs, 0))
+        return self.infer_degrees(temp_degrees, ph_degrees, valid, min_feeds, max_feeds)
+
+    def infer_degrees(self,
+                      temp_degrees: np.ndarray,
+                      ph_degrees: np.ndarray,
+                      valid: np.ndarray,
+                      min_feeds: np.ndarray,
+                      max_feeds: np.ndarray) -> BatchResult:
+        """Inference and defuzzification from already fuzzified inputs; rows where `valid` is False give NaN"""
+        min_feeds = np.broadcast_to(np.asarray(min_feeds, dtype=float), valid.shape)
+        max_feeds = np.broadcast_to(np.asarray(max_feeds, dtype=float), valid.shape)
+        temp_degrees[~valid] = np.nan
+        ph_degrees[~valid] = np.nan
+
+        activations = self.rule_activations(temp_degrees, ph_degrees)
+        activations[~valid] = 0
+        term_activations = self.term_activations(activations)
+
+        positions = self.defuzzify_normalized(term_activations)
+        step = (max_feeds - min_feeds) / FEED_DIVISIONS
+        feed = min_feeds + positions * step
+        feed_degrees = self.output_degrees(np.nan_to_num(positions))
+        feed_degrees[np.isnan(positions)] = np.nan
+
+        return BatchResult(temp_degrees, ph_degrees, activations, term_activations, feed, feed_degrees)
+
+
+def numpy_engine(temperatur_params: List[Tuple[str, List[float]]] = TEMPERATUR_MEMBERSHIP_PARAMS,
+                 ph_params: List[Tuple[str, List[float]]] = PH_MEMBERSHIP_PARAMS,
+                 temperatur_range: Tuple[float, float, float] = TEMPERATUR_RANGE,
+                 ph_range: Tuple[float, float, float] = PH_RANGE,
+                 **kwargs) -> BatchMamdani:
+    """
+    BatchMamdani on the given (default) membership functions without scikit-fuzzy.
+
+    The engine only reads the universe bounds and ``terms[...].params`` of the
+    input variables, so plain FuzzyVariable objects holding just the bounds are
+    enough and the inference path imports nothing but NumPy.
+    """
+    temperatur = FuzzyVariable.from_range(temperatur_range, 'Temperatur', temperatur_params)
+    ph = FuzzyVariable.from_range(ph_range, 'pH', ph_params)
+    return BatchMamdani(temperatur, ph, **kwargs)
@@ -0,0 +1,244 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from batch_mamdani import BatchMamdani
+from DataImputation import gap_imputation
+from DataImputation import impute_missing_values
+from DataImputation import interpolation
+from DataManager import load_data
+from DataManager import to_datetime
+from inference_cache import MemoizedMamdani
+from PathManager import BASE_DIR
+from PathManager import OUTPUT_DIR
+from synthetic_data import generate_sensor_log
+from synthetic_data import generate_weekly_weights
+from synthetic_data import write_sensor_log
+from TimeFilter import filter_data_by_time
+from TimeFilter import select_closest_readings
+from time_filter import calculate_feed_bounds
+from time_filter import create_antecedent
+from time_filter import define_membership_functions
+from time_filter import process_data
+from time_filter import process_data_table
+from time_filter import save_results_to_csv
+
+
+DEFAULT_SIZES = (10_000, 100_000)
+REPORT_VERSION = 1
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BASE_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def time_stage(stage: str, rows: int, func: Callable[[], object], repeats: int = 3) -> Dict:
+    """Run func `repeats` times (stdout suppressed) and summarize the wall-clock times"""
+    timings = []
+    for _ in range(repeats):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    best = min(timings)
+    return {
+        'stage': stage,
+        'rows': rows,
+        'repeats': repeats,
+        'best_s': round(best, 6),
+        'median_s': round(statistics.median(timings), 6),
+        'rows_per_s': round(rows / best, 1) if best > 0 else None
+    }
+
+
+def _flask_stages(readings: pd.DataFrame, repeats: int, n_requests: int = 200) -> List[Dict]:
+    """/calculate (one request per reading) and /calculate/batch through the Flask test client"""
+    try:
+        from app import app
+    except (ImportError, OSError) as e:
+        return [{'stage': 'flask', 'size': len(readings), 'skipped': f'app tidak bisa diimpor: {e!r}'}]
+
+    client = app.test_client()
+    valid = readings.dropna()
+    items = [{'input1': float(t), 'input2': float(p), 'weight': 600.0}
+             for t, p in zip(valid['Temperature'], valid['pH'])]
+
+    def check(response):
+        # Respons error jauh lebih cepat dari inferensi, jadi waktunya tidak boleh masuk laporan
+        response.get_data()
+        if response.status_code != 200:
+            raise RuntimeError(f'{response.request.path} membalas HTTP {response.status_code}')
+
+    def calculate_batch():
+        check(client.post('/calculate/batch', json=items))
+
+    def calculate_single():
+        for item in items[:n_requests]:
+            check(client.post('/calculate', json=item))
+
+    stages = []
+    for stage, rows, func in (('flask_calculate_batch', len(items), calculate_batch),
+                              ('flask_calculate', min(n_requests, len(items)), calculate_single)):
+        try:
+            stages.append({**time_stage(stage, rows, func, repeats), 'status': 200})
+        except RuntimeError as e:
+            stages.append({'stage': stage, 'rows': rows, 'skipped': f'gagal: {e}'})
+    return stages
+
+
+def run_size(n_readings: int, repeats: int = 3, seed: int = 0, flask: bool = True,
+             workdir: Optional[Path] = None) -> List[Dict]:
+    """Time every pipeline stage on one synthetic log of n_readings readings"""
+    workdir = Path(workdir or tempfile.mkdtemp(prefix='bench_'))
+    log = generate_sensor_log(n_readings, seed=seed)
+    weekly_weights = generate_weekly_weights(seed=seed)
+    source = write_sensor_log(log, workdir / f'sensor_{n_readings}.csv')
+
+    def load_csv():
+        data = load_data(source, use_cache=False)
+        data['Time'] = to_datetime(data['Time'])
+        return data
+
+    data = load_csv()
+    load_data(source, use_cache=True)  # Tulis cache agar tahap load_cache mengukur pembacaan cache
+
+    temperatur, ph = define_membership_functions(create_antecedent((14, 40, 0.001), 'Temperatur'),
+                                                 create_antecedent((4, 14, 0.001), 'pH'))
+    half_hourly, _ = filter_data_by_time(data, [0, 24], time_step=0.5)
+    imputed = interpolation(half_hourly.sort_values('Time')).reset_index()
+    with contextlib.redirect_stdout(io.StringIO()):
+        results = process_data(weekly_weights, imputed, temperatur, ph)
+        table = process_data_table(weekly_weights, imputed, temperatur, ph)
+
+    engine = BatchMamdani(temperatur, ph)
+    memo = MemoizedMamdani(engine)
+    temps = data['Temperature'].to_numpy(dtype=float)
+    phs = data['pH'].to_numpy(dtype=float)
+    min_feeds, max_feeds = calculate_feed_bounds(np.full(len(data), weekly_weights.iloc[:, 1].sum(), dtype=float))
+
+    stages = [
+        time_stage('load_csv', len(data), load_csv, repeats),
+        time_stage('load_cache', len(data), lambda: load_data(source, use_cache=True), repeats),
+        time_stage('filter_data_by_time', len(data),
+                   lambda: filter_data_by_time(data, [0, 24], time_step=0.5), repeats),
+        time_stage('select_slots', len(data),
+                   lambda: select_closest_readings(data, ['08:00', '18:00'], 7200), repeats),
+        time_stage('interpolation', len(half_hourly),
+                   lambda: interpolation(half_hourly.sort_values('Time')), repeats),
+        time_stage('gap_imputation', len(half_hourly), lambda: gap_imputation(half_hourly), repeats),
+        time_stage('impute_missing_values', len(half_hourly),
+                   lambda: impute_missing_values(half_hourly, method='median'), repeats),
+        time_stage('process_data', len(imputed),
+                   lambda: process_data(weekly_weights, imputed, temperatur, ph), repeats),
+        time_stage('process_data_table', len(imputed),
+                   lambda: process_data_table(weekly_weights, imputed, temperatur, ph), repeats),
+        time_stage('batch_infer', len(data),
+                   lambda: engine.infer(temps, phs, min_feeds, max_feeds), repeats),
+        time_stage('batch_infer_memo', len(data),
+                   lambda: memo.infer(temps, phs, min_feeds, max_feeds), repeats),
+        time_stage('save', len(results),
+                   lambda: save_results_to_csv(results, workdir / 'feed_recommendations.csv',
+                                               workdir / 'inferensi.ndjson'), repeats),
+        time_stage('save_table', len(table),
+                   lambda: save_results_to_csv(table, workdir / 'feed_recommendations.csv',
+                                               workdir / 'inferensi.ndjson'), repeats)
+    ]
+    if flask:
+        stages.extend(_flask_stages(data, repeats))
+
+    for stage in stages:
+        stage['size'] = n_readings
+    return stages
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, repeats: int = 3, seed: int = 0, flask: bool = True) -> Dict:
+    """Machine-readable report for all sizes, tagged with the commit and environment"""
+    results = []
+    with tempfile.TemporaryDirectory(prefix='bench_') as workdir:
+        for size in sizes:
+            results.extend(run_size(size, repeats, seed, flask, Path(workdir)))
+    return {
+        'version': REPORT_VERSION,
+        'commit': _git_commit(),
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__
+        },
+        'config': {'sizes': list(sizes), 'repeats': repeats, 'seed': seed},
+        'results': results
+    }
+
+
+def compare_reports(base: Dict, head: Dict) -> List[Dict]:
+    """Per (stage, size) ratio head/base of the best time; > 1 means head is slower"""
+    base_times = {(r['stage'], r['size']): r['best_s'] for r in base['results'] if 'best_s' in r}
+    comparison = []
+    for result in head['results']:
+        key = (result.get('stage'), result.get('size'))
+        if 'best_s' in result and key in base_times and base_times[key] > 0:
+            comparison.append({
+                'stage': key[0],
+                'size': key[1],
+                'base_s': base_times[key],
+                'head_s': result['best_s'],
+                'ratio': round(result['best_s'] / base_times[key], 3)
+            })
+    return comparison
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark tahap pipeline pada log sensor sintetis.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(DEFAULT_SIZES))
+    parser.add_argument('--repeats', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--no-flask', action='store_true', help='Lewati endpoint Flask')
+    parser.add_argument('--output', type=Path, default=None)
+    parser.add_argument('--compare', type=Path, default=None, help='Laporan dasar untuk dibandingkan')
+    args = parser.parse_args()
+
+    report = run_benchmarks(args.sizes, args.repeats, args.seed, not args.no_flask)
+    output = args.output or OUTPUT_DIR / 'benchmarks' / f"bench_{report['commit'] or 'local'}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for result in report['results']:
+        if 'skipped' in result:
+            print(f"{result['stage']:<24} dilewati: {result['skipped']}")
+        else:
+            print(f"{result['stage']:<24} {result['size']:>9} {result['rows']:>9} rows "
+                  f"{result['best_s']:>10.4f}s {result['rows_per_s'] or 0:>12.0f} rows/s")
+    print(f"Laporan disimpan ke {output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            base = json.load(f)
+        for row in compare_reports(base, report):
+            print(f"{row['stage']:<24} {row['size']:>9} {row['base_s']:>10.4f}s -> {row['head_s']:>10.4f}s "
+                  f"x{row['ratio']}")
+
+
+if __name__ == "__main__":
+    main()
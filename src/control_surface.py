@@ -0,0 +1,162 @@
+from pathlib import Path
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+from batch_mamdani import BatchMamdani
+from batch_mamdani import FEED_DIVISIONS
+
+
+class ControlSurface:
+    """
+    Precomputed (temperatur, pH) -> feed control surface with bilinear lookup.
+
+    The takaran sets sit at ``min_feed + position * step``, so the crisp output
+    is ``min_feed + surface(temperatur, pH) * (max_feed - min_feed) / 8`` where
+    ``surface`` does not depend on the feed bounds. It is computed once with
+    the exact engine on a regular grid; inference is then a bilinear lookup.
+
+    ``error_estimate`` is the largest deviation from the exact engine measured
+    on the grid refined ``error_refinement`` times, in takaran position units
+    (0..8); ``feed_error_estimate`` scales it to grams for given feed bounds.
+    It is an estimate, not a guaranteed bound: points between the refined
+    samples can deviate slightly more. Readings outside the grid or the engine's
+    universe, where no rule fires, give NaN like the exact engine.
+
+    Grid nodes where no rule fires (the upper temperatur/pH edges) are NaN;
+    a cell with such a corner is interpolated from its valid corners only.
+    Refined points where exactly one of lookup and exact engine is NaN are
+    counted in ``nan_mismatches`` and make ``error_estimate`` infinite.
+    """
+
+    def __init__(self,
+                 engine: BatchMamdani,
+                 temp_range: Tuple[float, float] = (14, 40),
+                 ph_range: Tuple[float, float] = (4, 14),
+                 temp_points: int = 261,
+                 ph_points: int = 201,
+                 error_refinement: int = 4):
+        self.temp_axis = np.linspace(temp_range[0], temp_range[1], temp_points)
+        self.ph_axis = np.linspace(ph_range[0], ph_range[1], ph_points)
+        self.values = self._exact(engine, *np.meshgrid(self.temp_axis, self.ph_axis, indexing='ij'))
+        # Di luar universe engine tidak ada rule yang aktif (NaN), jadi domain lookup ikut dipotong
+        self.domain = (max(self.temp_axis[0], float(engine.temperatur.universe[0])),
+                       min(self.temp_axis[-1], float(engine.temperatur.universe[-1])),
+                       max(self.ph_axis[0], float(engine.ph.universe[0])),
+                       min(self.ph_axis[-1], float(engine.ph.universe[-1])))
+        self.nan_mismatches = 0
+        self.error_estimate = self._measure_error(engine, error_refinement) if error_refinement else np.nan
+        self._init_scalars()
+
+    @staticmethod
+    def _exact(engine: BatchMamdani, temperatures: np.ndarray, phs: np.ndarray) -> np.ndarray:
+        """Normalized takaran position from the exact engine, same shape as the inputs"""
+        result = engine.infer(temperatures.ravel(), phs.ravel(), 0.0, float(FEED_DIVISIONS))
+        return result.feed.reshape(temperatures.shape)
+
+    def _measure_error(self, engine: BatchMamdani, refinement: int) -> float:
+        """Max |lookup - exact| on the grid with every cell split `refinement` times per axis"""
+        temp_fine = np.linspace(self.temp_axis[0], self.temp_axis[-1], refinement * (len(self.temp_axis) - 1) + 1)
+        ph_fine = np.linspace(self.ph_axis[0], self.ph_axis[-1], refinement * (len(self.ph_axis) - 1) + 1)
+        temperatures, phs = np.meshgrid(temp_fine, ph_fine, indexing='ij')
+        approx, exact = self.lookup(temperatures, phs), self._exact(engine, temperatures, phs)
+        # Hasil ada di satu sisi saja bukan selisih yang bisa dibatasi, jadi tidak boleh diabaikan seperti NaN
+        mismatch = np.isnan(approx) != np.isnan(exact)
+        self.nan_mismatches = int(mismatch.sum())
+        error = np.where(mismatch, np.inf, np.abs(approx - exact))
+        return float(np.nanmax(error))
+
+    def _init_scalars(self):
+        self._t0 = float(self.temp_axis[0])
+        self._p0 = float(self.ph_axis[0])
+        self._dt = float(self.temp_axis[1] - self.temp_axis[0])
+        self._dp = float(self.ph_axis[1] - self.ph_axis[0])
+        self._nt = len(self.temp_axis) - 1
+        self._np = len(self.ph_axis) - 1
+        self._domain = tuple(float(bound) for bound in self.domain)
+        self._rows = self.values.tolist()
+
+    def lookup(self, temperatures: np.ndarray, phs: np.ndarray) -> np.ndarray:
+        """Bilinear interpolation of the normalized surface for arrays of readings"""
+        temperatures = np.asarray(temperatures, dtype=float)
+        phs = np.asarray(phs, dtype=float)
+        u = (temperatures - self.temp_axis[0]) / (self.temp_axis[1] - self.temp_axis[0])
+        v = (phs - self.ph_axis[0]) / (self.ph_axis[1] - self.ph_axis[0])
+        t_min, t_max, ph_min, ph_max = self.domain
+        inside = (temperatures >= t_min) & (temperatures <= t_max) & (phs >= ph_min) & (phs <= ph_max)
+
+        u = np.where(inside, u, 0.0)
+        v = np.where(inside, v, 0.0)
+        i = np.minimum(u.astype(int), len(self.temp_axis) - 2)
+        j = np.minimum(v.astype(int), len(self.ph_axis) - 2)
+        fu, fv = u - i, v - j
+
+        values = self.values
+        result = ((1 - fu) * (1 - fv) * values[i, j] + fu * (1 - fv) * values[i + 1, j]
+                  + (1 - fu) * fv * values[i, j + 1] + fu * fv * values[i + 1, j + 1])
+
+        # Sel dengan sudut NaN: rata-rata berbobot dari sudut yang valid saja
+        partial = inside & np.isnan(result)
+        if partial.any():
+            i, j, fu, fv = i[partial], j[partial], fu[partial], fv[partial]
+            corners = np.stack([values[i, j], values[i + 1, j], values[i, j + 1], values[i + 1, j + 1]])
+            weights = np.stack([(1 - fu) * (1 - fv), fu * (1 - fv), (1 - fu) * fv, fu * fv])
+            weights = np.where(np.isnan(corners), 0.0, weights)
+            total = weights.sum(axis=0)
+            with np.errstate(invalid='ignore', divide='ignore'):
+                result[partial] = np.where(total > 0, (weights * np.nan_to_num(corners)).sum(axis=0) / total, np.nan)
+        return np.where(inside, result, np.nan)
+
+    def __call__(self, temperature: float, ph: float, min_feed: float, max_feed: float) -> float:
+        """Scalar lookup in plain float arithmetic: constant time, no array allocation"""
+        t_min, t_max, ph_min, ph_max = self._domain
+        if not (t_min <= temperature <= t_max and ph_min <= ph <= ph_max):
+            return float('nan')
+        u = (temperature - self._t0) / self._dt
+        v = (ph - self._p0) / self._dp
+
+        i = min(int(u), self._nt - 1)
+        j = min(int(v), self._np - 1)
+        fu, fv = u - i, v - j
+        row, next_row = self._rows[i], self._rows[i + 1]
+        position = ((1 - fu) * (1 - fv) * row[j] + fu * (1 - fv) * next_row[j]
+                    + (1 - fu) * fv * row[j + 1] + fu * fv * next_row[j + 1])
+        if position != position:  # Sudut NaN: sama seperti lookup, hanya sudut yang valid
+            position = float(self.lookup(np.array([temperature]), np.array([ph]))[0])
+        return min_feed + position * (max_feed - min_feed) / FEED_DIVISIONS
+
+    def infer(self,
+              temperatures: np.ndarray,
+              phs: np.ndarray,
+              min_feeds: Union[float, np.ndarray],
+              max_feeds: Union[float, np.ndarray]) -> np.ndarray:
+        """Crisp feed amounts for arrays of readings and their feed bounds"""
+        positions = self.lookup(temperatures, phs)
+        return np.asarray(min_feeds) + positions * (np.asarray(max_feeds) - np.asarray(min_feeds)) / FEED_DIVISIONS
+
+    def feed_error_estimate(self, min_feed: float, max_feed: float) -> float:
+        """error_estimate expressed in grams for the given feed bounds"""
+        return self.error_estimate * (max_feed - min_feed) / FEED_DIVISIONS
+
+    def save(self, path: Path) -> None:
+        """Store the grid so it is not recomputed on the next start"""
+        np.savez(path, temp_axis=self.temp_axis, ph_axis=self.ph_axis,
+                 values=self.values, error_estimate=self.error_estimate, nan_mismatches=self.nan_mismatches,
+                 domain=self.domain)
+
+    @classmethod
+    def load(cls, path: Path) -> 'ControlSurface':
+        """Load a grid stored with `save`"""
+        data = np.load(path)
+        surface = cls.__new__(cls)
+        surface.temp_axis = data['temp_axis']
+        surface.ph_axis = data['ph_axis']
+        surface.values = data['values']
+        # File lama menyimpan estimasi error dengan kunci 'max_error'
+        surface.error_estimate = float(data['error_estimate'] if 'error_estimate' in data.files else data['max_error'])
+        surface.nan_mismatches = int(data['nan_mismatches']) if 'nan_mismatches' in data.files else 0
+        surface.domain = tuple(data['domain']) if 'domain' in data.files else (
+            surface.temp_axis[0], surface.temp_axis[-1], surface.ph_axis[0], surface.ph_axis[-1])
+        surface._init_scalars()
+        return surface
@@ -115,54 +115,41 @@
 #     print(fuzzy.get_inference_steps())
 #     print(fuzzy.output_range)
 
-import pandas as pd
-
 from utils import DataHandler
 from utils import DataProcessor
-from utils import FeedCalculator
-from utils import FuzzyController
+from utils import DATA_DIR
+from time_filter import process_data_stream
+from time_filter import process_data_table
+from weekly_index import WeeklyIndex
 
 
 def main():
     # Initialize system components
     fuzzy_system = DataProcessor()
-    feed_calculator = FeedCalculator(fuzzy_system)
-    fuzzy_controller = FuzzyController(fuzzy_system)
-    
+
     # Load input data
-    weekly_weights, time_filtered = DataHandler.load_data('berat_lobster_weekly.csv', 'Lobster IoT.xlsx')
-    
-    # Process each data point
-    results = []
-    start_date = pd.to_datetime(time_filtered['Time'].iloc[0])
-    
-    for index, row in time_filtered.iterrows():
-        current_date = pd.to_datetime(row['Time'])
-        week_index = min((current_date - start_date).days // 7, len(weekly_weights.columns) - 2)
-        
-        # Skip invalid data points
-        if row['Temperature'] == None or row['pH'] == None:
-            results.append(DataProcessor.create_empty_result(row['Time']))
-            continue
-            
-        try:
-            current_week_weight = weekly_weights.iloc[:, week_index + 1].sum()
-            min_feed, max_feed = feed_calculator.calculate_feed_bounds(current_week_weight)
-            
-            feed_amount, feed_params = feed_calculator.define_feed_membership_functions(min_feed, max_feed)
-            simulation, rules_list, rules_dict = fuzzy_controller.define_rules(feed_amount)
-            
-            result = DataProcessor.process_single_record(
-                row, fuzzy_system, feed_amount, feed_params, rules_list, rules_dict
-            )
-            results.append(result)
-            
-        except Exception as e:
-            print(f"Error processing data for {current_date}: {e}")
-            results.append(DataProcessor.create_empty_result(row['Time']))
-    
+    weekly_weights, time_filtered = DataHandler.load_data(DATA_DIR / 'berat_lobster_weekly.csv',
+                                                          DATA_DIR / 'dataset.csv')
+
+    # Week and feed bounds of every row come from one index lookup; all rows are inferred in one batch
+    # (rows without a valid Temperature/pH get an empty result)
+    weekly_index = WeeklyIndex(weekly_weights, fuzzy_system.params.feed_multiplier_min,
+                               fuzzy_system.params.feed_multiplier_max)
+    results = process_data_table(weekly_index, time_filtered, fuzzy_system.temperatur, fuzzy_system.ph)
+
     # Save results
     DataHandler.save_results(results)
 
+def stream_main(chunksize: int = 100_000):
+    # Streaming mode: the raw log is read, filtered, imputed and inferred chunk by chunk
+    fuzzy_system = DataProcessor()
+    weekly_weights, frames = DataHandler.stream_data(
+        DATA_DIR / 'berat_lobster_weekly.csv', DATA_DIR / 'dataset.csv', chunksize=chunksize
+    )
+
+    results_stream = process_data_stream(weekly_weights, frames, fuzzy_system.temperatur, fuzzy_system.ph)
+    for i, results in enumerate(results_stream):
+        DataHandler.save_results(results, append=i > 0)
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
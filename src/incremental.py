@@ -0,0 +1,254 @@
+import io
+import json
+import os
+import threading
+import time
+
+import pandas as pd
+
+from DataImputation import GapImputer
+from batch_mamdani import BatchMamdani
+from DataManager import to_datetime
+from inference_cache import MemoizedMamdani
+from metrics import metrics
+from PathManager import DATA_DIR
+from PathManager import OUTPUT_DIR
+from PathManager import Path
+from reading_store import ReadingStore
+from TimeFilter import select_closest_readings
+from trace_store import ResultTable
+from time_filter import create_antecedent
+from time_filter import define_membership_functions
+from time_filter import engine_trace_metadata
+from time_filter import process_data_table
+from time_filter import save_results_to_csv
+from weekly_index import WeeklyIndex
+
+
+def _frame_to_records(df):
+    if df is None:
+        return None
+    df = df.copy()
+    df['Time'] = pd.to_datetime(df['Time']).dt.strftime('%Y-%m-%d %H:%M:%S')
+    return json.loads(df.to_json(orient='records'))
+
+def _records_to_frame(records):
+    if records is None:
+        return None
+    df = pd.DataFrame(records, columns=['Time', 'Temperature', 'pH'])
+    df['Time'] = pd.to_datetime(df['Time'])
+    return df
+
+
+class IncrementalPipeline:
+    """
+    Online version of the filter -> imputation -> inference pipeline.
+
+    Only new readings are processed. The pipeline keeps the readings of the
+    days whose slots are not final yet, the imputation context/pending rows,
+    the week anchor (start date) and the byte offset in the source log, and
+    persists them in `state_file` so a restart continues where it stopped.
+    A slot is final once a reading at or after the end of its hour and after
+    `target + tolerance` has arrived (or a later day has started), because no
+    later reading can change which reading is selected for it. A slot with a
+    trailing gap is imputed from the data so far once it is `gap_holdback`
+    old ('0h': as soon as it is final) instead of waiting up to
+    max_seasonal_gap for the next valid reading; None keeps the exact
+    batch imputation. Outputs are appended, never rewritten; the filtered
+    readings and the results also go to memory-mapped ReadingStores for
+    time-range queries.
+    """
+
+    def __init__(self,
+                 weekly_weights,
+                 hours=('08:00', '18:00'),
+                 tolerance: float = 7200,
+                 output_dir: Path = OUTPUT_DIR,
+                 state_file: Path = None,
+                 memo_quantum: float = None,
+                 memo_size: int = 65536,
+                 gap_policy: dict = None,
+                 gap_holdback: str = '0h',
+                 model=None,
+                 engine=None):
+        # Biomassa dan batas pakan per minggu dihitung sekali; WeeklyIndex dari registry dipakai apa adanya
+        self.weekly_weights = weekly_weights if isinstance(weekly_weights, WeeklyIndex) \
+            else WeeklyIndex.for_model(weekly_weights, model)
+        self.hours = list(hours)
+        self.offsets = pd.to_timedelta([f'{hour}:00' for hour in self.hours])
+        self.tolerance = pd.Timedelta(seconds=tolerance)
+        self.output_dir = Path(output_dir)
+        self.state_file = Path(state_file) if state_file else self.output_dir / 'incremental_state.json'
+
+        # model/engine dari registry kolam; tanpa keduanya dipakai model bawaan
+        self.model = model
+        if engine is None and model is not None:
+            engine = model.compile()
+        elif engine is None:
+            temperatur = create_antecedent((14, 40, 0.001), 'Temperatur')
+            ph = create_antecedent((4, 14, 0.001), 'pH')
+            engine = BatchMamdani(*define_membership_functions(temperatur, ph))
+        # Bacaan kolam yang stabil sering berulang; memo_quantum mengaktifkan cache inferensi
+        if memo_quantum:
+            engine = MemoizedMamdani(engine, memo_quantum, memo_size)
+        self.engine = engine
+        self.temperatur, self.ph = engine.temperatur, engine.ph
+
+        # Store biner append-only untuk query rentang waktu (dashboard, /readings) tanpa membaca CSV
+        self.readings_store = ReadingStore(self.output_dir / 'data_terfilter.store')
+        self.results_store = ReadingStore(self.output_dir / 'feed_recommendations.store', engine.rule_labels)
+
+        self._lock = threading.Lock()
+        self.buffer = _records_to_frame([])
+        # Slot dengan celah di akhir langsung dikirim (nilai sementara); None = tunggu max_seasonal_gap
+        self.imputer = GapImputer(**{'max_holdback': gap_holdback, **(gap_policy or {})})
+        self.start_date = None
+        self.last_slot = None
+        self.last_timestamp = None
+        self.source_offset = 0
+        self.source_header = None
+        self._load_state()
+
+    def _load_state(self):
+        if not self.state_file.exists():
+            return
+        with open(self.state_file) as f:
+            state = json.load(f)
+        self.buffer = _records_to_frame(state['buffer'])
+        if 'imputer' in state:
+            self.imputer.load_state(state['imputer'])
+        else:
+            # Status lama (interpolasi): anchor menjadi konteks, pending tetap ditahan
+            self.imputer.context = _records_to_frame(state['anchor'])
+            self.imputer.pending = _records_to_frame(state['pending'])
+        self.start_date = pd.to_datetime(state['start_date']) if state['start_date'] else None
+        self.last_slot = pd.to_datetime(state['last_slot']) if state['last_slot'] else None
+        self.last_timestamp = pd.to_datetime(state['last_timestamp']) if state['last_timestamp'] else None
+        self.source_offset = state['source_offset']
+        self.source_header = state['source_header']
+
+    def _save_state(self):
+        state = {
+            'buffer': _frame_to_records(self.buffer),
+            'imputer': self.imputer.state(),
+            'start_date': str(self.start_date) if self.start_date is not None else None,
+            'last_slot': str(self.last_slot) if self.last_slot is not None else None,
+            'last_timestamp': str(self.last_timestamp) if self.last_timestamp is not None else None,
+            'source_offset': self.source_offset,
+            'source_header': self.source_header
+        }
+        os.makedirs(self.output_dir, exist_ok=True)
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(state, f)
+        os.replace(tmp_file, self.state_file)
+
+    def _ready_slots(self):
+        """Slots after last_slot that can no longer change, grouped by day"""
+        latest = self.buffer['Time'].max()
+        ready = {}
+        for day in self.buffer['Time'].dt.normalize().unique():
+            for hour, offset in zip(self.hours, self.offsets):
+                target = day + offset
+                if self.last_slot is not None and target <= self.last_slot:
+                    continue
+                hour_end = target.floor('h') + pd.Timedelta(hours=1)
+                if day < latest.normalize() or latest >= max(hour_end, target + self.tolerance):
+                    ready.setdefault(day, []).append(hour)
+        return ready
+
+    @metrics.timed('incremental.ingest')
+    def ingest(self, readings: pd.DataFrame):
+        """Filter, impute and infer new readings; returns the new results (ResultTable, iterates as dicts)"""
+        with self._lock:
+            readings = readings[['Time', 'Temperature', 'pH']].copy()
+            readings['Time'] = pd.to_datetime(readings['Time'])
+            if self.last_timestamp is not None:
+                readings = readings[readings['Time'] > self.last_timestamp]
+            if readings.empty:
+                return self.empty_results()
+
+            if not self.buffer.empty:
+                readings = pd.concat([self.buffer, readings], ignore_index=True)
+            self.buffer = readings.sort_values('Time', kind='mergesort')
+            self.last_timestamp = self.buffer['Time'].max()
+
+            filtered_parts = []
+            for day, hours in self._ready_slots().items():
+                same_date = self.buffer[self.buffer['Time'].dt.normalize() == day]
+                filtered, _ = select_closest_readings(same_date, hours, self.tolerance.total_seconds())
+                filtered_parts.append(filtered)
+                self.last_slot = day + pd.to_timedelta(f'{hours[-1]}:00')
+
+            # Data hari yang semua slotnya sudah final tidak dibutuhkan lagi
+            if self.last_slot is not None:
+                self.buffer = self.buffer[self.buffer['Time'] >= self.last_slot.normalize()]
+
+            results = self.empty_results()
+            if filtered_parts:
+                filtered = pd.concat(filtered_parts, ignore_index=True)
+                self._append_csv(filtered, self.output_dir / 'data_terfilter.csv')
+                self.readings_store.append_readings(filtered)
+
+                imputed = self.imputer.push(filtered)
+                if not imputed.empty:
+                    if self.start_date is None:
+                        self.start_date = pd.to_datetime(imputed['Time'].iloc[0])
+                    results = process_data_table(self.weekly_weights, imputed, self.temperatur, self.ph,
+                                                 start_date=self.start_date, engine=self.engine, model=self.model)
+                    save_results_to_csv(results,
+                                        self.output_dir / 'feed_recommendations.csv',
+                                        self.output_dir / 'inferensi.ndjson',
+                                        append=(self.output_dir / 'feed_recommendations.csv').exists())
+                    self.results_store.append_results(results)
+
+            self._save_state()
+            return results
+
+    def empty_results(self) -> ResultTable:
+        """ResultTable without rows in the trace layout of this pipeline's engine"""
+        return ResultTable.empty(engine_trace_metadata(self.engine))
+
+    @staticmethod
+    def _append_csv(df: pd.DataFrame, output_file: Path):
+        os.makedirs(output_file.parent, exist_ok=True)
+        exists = output_file.exists()
+        df.to_csv(output_file, mode='a' if exists else 'w', header=not exists, index=False)
+
+    def poll_source(self, source_path: Path) -> ResultTable:
+        """Read only the complete lines appended to the CSV log since the last poll"""
+        source_path = Path(source_path)
+        if source_path.stat().st_size < self.source_offset:
+            self.source_offset = 0  # File dirotasi/dipotong, baca dari awal
+
+        with open(source_path, 'rb') as f:
+            f.seek(self.source_offset)
+            chunk = f.read()
+        end = chunk.rfind(b'\n') + 1
+        if end == 0:
+            return self.empty_results()
+
+        text = chunk[:end].decode('utf-8-sig')
+        if self.source_offset == 0:
+            self.source_header, _, text = text.partition('\n')
+        self.source_offset += end
+        if not text.strip():
+            self._save_state()
+            return self.empty_results()
+
+        readings = pd.read_csv(io.StringIO(f'{self.source_header}\n{text}'))
+        readings['Time'] = to_datetime(readings['Time'])
+        return self.ingest(readings)
+
+    def run(self, source_path: Path, poll_interval: float = 1.0):
+        """Follow the source log and process new readings as they are appended"""
+        while True:
+            results = self.poll_source(source_path)
+            for result in results:
+                print(f"{result['Time']}: {result['feed_amount']}")
+            time.sleep(poll_interval)
+
+
+if __name__ == "__main__":
+    weekly_weights = pd.read_csv(DATA_DIR / 'berat_lobster_weekly.csv')
+    IncrementalPipeline(weekly_weights).run(DATA_DIR / 'dataset.csv')
@@ -0,0 +1,171 @@
+import threading
+from typing import Dict
+from typing import Tuple
+
+import numpy as np
+
+from batch_mamdani import BatchMamdani
+from batch_mamdani import BatchResult
+from batch_mamdani import FEED_DIVISIONS
+from membership import term_degrees
+from rule_cache import RuleBaseCache
+
+
+class MemoizedMamdani:
+    """
+    BatchMamdani with bounded LRU memo caches keyed on quantized readings.
+
+    Readings are rounded to multiples of ``quantum`` (0.01 matches the sensor
+    resolution of ``dataset.csv``) and evaluated at the rounded value, so a
+    cached entry does not depend on which raw reading filled it. Repeated
+    keys inside one batch are computed once, keys seen in earlier batches
+    come from the caches:
+
+    - ``temperatur_cache``: temperatur -> membership degree per temperatur term.
+    - ``ph_cache``: pH -> membership degree per pH term.
+    - ``inference_cache``: (temperatur, pH) -> rule activations, clipped term
+      levels, normalized centroid and its takaran degrees.
+
+    A pair missing from ``inference_cache`` is fuzzified through the
+    per-variable caches, which hit whenever either reading was seen before,
+    even in another combination.
+
+    The takaran sets only move with the weekly feed bounds through
+    ``min_feed + position * step``, so the inference entries are stored on the
+    normalized universe and the week's bounds are applied after the lookup;
+    one entry serves every week instead of one per (reading, week).
+
+    Every other attribute (``feed_terms``, ``rule_labels``, ``alpha_cuts``,
+    ...) is delegated to the wrapped engine, so the memo can stand in for it.
+    """
+
+    CACHES = ('temperatur', 'ph', 'inference')
+
+    def __init__(self, engine: BatchMamdani, quantum: float = 0.01, maxsize: int = 65536):
+        if quantum <= 0:
+            raise ValueError("quantum harus lebih besar dari 0.")
+        self.engine = engine
+        self.quantum = quantum
+        self.temperatur_cache = RuleBaseCache(maxsize=maxsize)
+        self.ph_cache = RuleBaseCache(maxsize=maxsize)
+        self.inference_cache = RuleBaseCache(maxsize=maxsize)
+        self._counts = {name: [0, 0] for name in self.CACHES}
+        self._lock = threading.RLock()
+
+    def __getattr__(self, name):
+        if name == 'engine':
+            raise AttributeError(name)
+        return getattr(self.engine, name)
+
+    def _quantize(self, values: np.ndarray) -> np.ndarray:
+        return np.round(values / self.quantum).astype(np.int64)
+
+    @staticmethod
+    def _unique_pairs(first: np.ndarray, second: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Unique (first, second) pairs packed in one int64 key each, and the inverse index"""
+        packed = (first << 32) + (second + 2 ** 31)
+        unique, inverse = np.unique(packed, return_inverse=True)
+        return unique, inverse.reshape(-1)
+
+    def _lookup(self, cache: RuleBaseCache, counter: str, unique: np.ndarray, n_rows: int, compute) -> np.ndarray:
+        """Cached rows for every unique key, stacked in key order; the missing keys are computed in one call"""
+        keys = unique.tolist()
+        # Satu engine bisa dipakai beberapa thread (registry kolam, Flask); LRU tidak thread-safe
+        with self._lock:
+            rows = [cache.get(key) for key in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            if missing:
+                for i, row in zip(missing, compute(unique[missing])):
+                    rows[i] = row
+                    cache.put(keys[i], row)
+
+            self._counts[counter][0] += n_rows - len(missing)
+            self._counts[counter][1] += len(missing)
+        return np.stack(rows)
+
+    def _degrees(self, cache: RuleBaseCache, counter: str, fuzzy_var, terms, values: np.ndarray) -> np.ndarray:
+        """Memoized degrees of one input variable, (N, terms); non-finite values are evaluated directly"""
+        def evaluate(x):
+            degrees = term_degrees(fuzzy_var, x)
+            return np.stack([degrees[term] for term in terms], axis=1)
+
+        finite = np.isfinite(values)
+        result = np.zeros((len(values), len(terms)))
+        if not finite.all():
+            result[~finite] = evaluate(values[~finite])
+        if finite.any():
+            unique, inverse = np.unique(self._quantize(values[finite]), return_inverse=True)
+            result[finite] = self._lookup(cache, counter, unique, int(finite.sum()),
+                                          lambda keys: evaluate(keys * self.quantum))[inverse.reshape(-1)]
+        return result
+
+    def fuzzify(self, temperatures: np.ndarray, phs: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Memoized BatchMamdani.fuzzify, one cache per input variable"""
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+        phs = np.atleast_1d(np.asarray(phs, dtype=float))
+        temp_degrees = self._degrees(self.temperatur_cache, 'temperatur', self.engine.temperatur,
+                                     self.engine.temp_terms, temperatures)
+        ph_degrees = self._degrees(self.ph_cache, 'ph', self.engine.ph, self.engine.ph_terms, phs)
+        return temp_degrees, ph_degrees
+
+    def infer(self,
+              temperatures: np.ndarray,
+              phs: np.ndarray,
+              min_feeds: np.ndarray,
+              max_feeds: np.ndarray) -> BatchResult:
+        """Memoized BatchMamdani.infer; same result layout, invalid readings give NaN"""
+        temperatures = np.atleast_1d(np.asarray(temperatures, dtype=float))
+        phs = np.atleast_1d(np.asarray(phs, dtype=float))
+        min_feeds = np.broadcast_to(np.asarray(min_feeds, dtype=float), temperatures.shape)
+        max_feeds = np.broadcast_to(np.asarray(max_feeds, dtype=float), temperatures.shape)
+        valid = np.isfinite(temperatures) & np.isfinite(phs)
+        n_rows = len(temperatures)
+
+        temp_degrees = np.full((n_rows, len(self.engine.temp_terms)), np.nan)
+        ph_degrees = np.full((n_rows, len(self.engine.ph_terms)), np.nan)
+        activations = np.zeros((n_rows, len(self.engine.rule_labels)))
+        term_activations = np.zeros((n_rows, len(self.engine.feed_terms)))
+        positions = np.full(n_rows, np.nan)
+        feed_degrees = np.full((n_rows, len(self.engine.feed_terms)), np.nan)
+
+        if valid.any():
+            fields = (temp_degrees, ph_degrees, activations, term_activations, positions[:, None], feed_degrees)
+            bounds = np.cumsum([0] + [field.shape[1] for field in fields])
+
+            def compute(packed):
+                values = np.stack([packed >> 32, (packed & 0xFFFFFFFF) - 2 ** 31], axis=1) * self.quantum
+                row_temp, row_ph = self.fuzzify(values[:, 0], values[:, 1])
+                result = self.engine.infer_degrees(row_temp, row_ph, np.ones(len(values), dtype=bool),
+                                                   0.0, float(FEED_DIVISIONS))
+                return np.hstack([result.temp_degrees, result.ph_degrees, result.activations,
+                                  result.term_activations, result.feed[:, None], result.feed_degrees])
+
+            unique, inverse = self._unique_pairs(self._quantize(temperatures[valid]), self._quantize(phs[valid]))
+            rows = self._lookup(self.inference_cache, 'inference', unique, int(valid.sum()), compute)[inverse]
+            for field, start, stop in zip(fields, bounds[:-1], bounds[1:]):
+                field[valid] = rows[:, start:stop]
+
+        feed = min_feeds + positions * (max_feeds - min_feeds) / FEED_DIVISIONS
+        return BatchResult(temp_degrees, ph_degrees, activations, term_activations, feed, feed_degrees)
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-reading hit/miss counters (in-batch repeats count as hits) and cache sizes"""
+        stats = {}
+        for name in self.CACHES:
+            cache = getattr(self, f'{name}_cache')
+            hits, misses = self._counts[name]
+            stats[name] = {
+                'hits': hits,
+                'misses': misses,
+                'size': len(cache),
+                'maxsize': cache.maxsize,
+                'hit_rate': hits / (hits + misses) if hits + misses else 0.0
+            }
+        stats['quantum'] = self.quantum
+        return stats
+
+    def clear(self) -> None:
+        """Drop all cached entries and reset the counters"""
+        for name in self.CACHES:
+            getattr(self, f'{name}_cache').clear()
+        self._counts = {name: [0, 0] for name in self.CACHES}
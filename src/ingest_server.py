@@ -0,0 +1,454 @@
+import argparse
+import asyncio
+import contextlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from batch_mamdani import FEED_DIVISIONS
+from metrics import Histogram
+from metrics import metrics
+from PathManager import OUTPUT_DIR
+from pond_registry import PondRegistry
+from synthetic_data import generate_sensor_log
+
+
+logger = logging.getLogger('web_fuzzy.ingest')
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+LINE_LIMIT = 2 ** 20
+PASSTHROUGH_KEYS = ('id', 'pond')
+
+
+def _to_float(value) -> float:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def parse_line(line: bytes) -> List[Dict]:
+    """One protocol line: a reading object or an array of readings; errors become {'error': ...} entries"""
+    try:
+        payload = json.loads(line)
+    except ValueError:
+        return [{'error': 'Baris bukan JSON yang valid'}]
+    readings = payload if isinstance(payload, list) else [payload]
+    return [reading if isinstance(reading, dict) else {'error': 'Bacaan harus berupa objek JSON'}
+            for reading in readings]
+
+
+class IngestServer:
+    """
+    asyncio TCP server for readings from many IoT gateways (NDJSON line protocol).
+
+    Every line is one reading ``{"Time": ..., "Temperature": ..., "pH": ...,
+    "pond": optional, "id": optional, "weight": optional}`` or a JSON array of
+    them; for every reading one line ``{"id", "pond", "time", "feed_amount"}``
+    (or ``{"error": ...}``) is written back, in the order the readings were
+    sent on that connection.
+
+    Readings of all connections go through one bounded queue. A batcher
+    takes up to ``max_batch`` readings (waiting at most ``max_delay`` seconds
+    after the first one), groups them by pond and runs the pond's compiled
+    engine from the registry in a worker thread, so the event loop keeps
+    accepting while a batch is inferred. Feed bounds come from the pond's
+    WeeklyIndex, with week 0 starting at the first reading of the pond
+    (or ``start_date``); a ``weight`` in the reading overrides the biomass.
+
+    Backpressure: a connection may have at most ``max_inflight`` readings
+    without a response, and waits on the full queue otherwise. While it
+    waits it does not read its socket, so the gateway's writes block once
+    the TCP buffers are full. Results are appended to
+    ``output_dir/<pond>/feed_recommendations.csv`` by a writer task in
+    another thread.
+    """
+
+    def __init__(self,
+                 ponds: Optional[PondRegistry] = None,
+                 host: str = DEFAULT_HOST,
+                 port: int = DEFAULT_PORT,
+                 max_batch: int = 1024,
+                 max_delay: float = 0.005,
+                 queue_size: int = 8192,
+                 max_inflight: int = 256,
+                 output_dir: Path = OUTPUT_DIR / 'ingest',
+                 start_date=None):
+        if max_batch < 1 or queue_size < 1 or max_inflight < 1:
+            raise ValueError("max_batch, queue_size dan max_inflight harus lebih besar dari 0.")
+        self.ponds = ponds or PondRegistry.from_config()
+        self.host = host
+        self.port = port
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue_size = queue_size
+        self.max_inflight = max_inflight
+        self.output_dir = Path(output_dir) if output_dir is not None else None
+        self.start_date = pd.Timestamp(start_date) if start_date is not None else None
+
+        self.state_file = self.output_dir / 'ingest_state.json' if self.output_dir is not None else None
+        self._start_dates: Dict[Optional[str], pd.Timestamp] = {}
+        if self.state_file is not None and self.state_file.exists():
+            with open(self.state_file) as f:
+                state = json.load(f)
+            self._start_dates = {pond or None: pd.Timestamp(value) for pond, value in state['start_dates'].items()}
+
+        # Satu thread inferensi (engine dan WeeklyIndex dipakai berurutan) dan satu thread penulisan
+        self._infer_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-infer')
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ingest-write')
+        self.server = None
+        self.queue = None
+        self.results = None
+        self._tasks = []
+
+    async def start(self) -> 'IngestServer':
+        """Start listening (port 0 picks a free port) and the batcher/writer tasks"""
+        self.queue = asyncio.Queue(self.queue_size)
+        self.results = asyncio.Queue(max(1, self.queue_size // self.max_batch))
+        self._tasks = [asyncio.create_task(self._batcher()), asyncio.create_task(self._writer())]
+        self.server = await asyncio.start_server(self._handle, self.host, self.port, limit=LINE_LIMIT)
+        self.port = self.server.sockets[0].getsockname()[1]
+        logger.info('ingest server listening on %s:%s', self.host, self.port)
+        return self
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        try:
+            await self.server.serve_forever()
+        finally:
+            await self.close()
+
+    async def close(self) -> None:
+        """Stop accepting, then finish the queued readings and pending writes"""
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if self.queue is not None:
+            await self.queue.join()
+            await self.results.join()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._infer_executor.shutdown()
+        self._write_executor.shutdown()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        loop = asyncio.get_running_loop()
+        metrics.incr('ingest.connections')
+        inflight = asyncio.Semaphore(self.max_inflight)
+        pending = asyncio.Queue()
+        responder = asyncio.create_task(self._respond(writer, pending, inflight))
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except ValueError:  # Baris lebih panjang dari LINE_LIMIT
+                    readings = [{'error': f'Baris melebihi {LINE_LIMIT} byte'}]
+                    line = b''
+                else:
+                    if not line:
+                        break
+                    line = line.strip()
+                    if not line:
+                        continue
+                    readings = parse_line(line)
+
+                for reading in readings:
+                    await inflight.acquire()
+                    future = loop.create_future()
+                    await pending.put(future)
+                    if 'error' in reading:
+                        future.set_result(reading)
+                        continue
+                    if self.queue.full():
+                        metrics.incr('ingest.backpressure')
+                    await self.queue.put((reading, future))
+                if not line:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            await pending.put(None)
+            await responder
+            writer.close()
+            with contextlib.suppress(ConnectionError):
+                await writer.wait_closed()
+
+    async def _respond(self, writer: asyncio.StreamWriter, pending: asyncio.Queue, inflight: asyncio.Semaphore):
+        """Write the responses of one connection in request order"""
+        connected = True
+        while True:
+            future = await pending.get()
+            if future is None:
+                return
+            output = await future
+            inflight.release()
+            if not connected:
+                continue
+            try:
+                writer.write(json.dumps(output, separators=(',', ':')).encode() + b'\n')
+                # drain() menunggu jika gateway tidak membaca respons: backpressure ke arah balik
+                await writer.drain()
+            except ConnectionError:
+                connected = False
+
+    async def _next_batch(self) -> List[Tuple[Dict, asyncio.Future]]:
+        loop = asyncio.get_running_loop()
+        items = [await self.queue.get()]
+        deadline = loop.time() + self.max_delay
+        while len(items) < self.max_batch:
+            try:
+                items.append(self.queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                items.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return items
+
+    async def _batcher(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            items = await self._next_batch()
+            readings = [reading for reading, _ in items]
+            try:
+                with metrics.timer('ingest.batch', records=len(items)):
+                    outputs, rows = await loop.run_in_executor(self._infer_executor, self._infer_batch, readings)
+            except Exception as e:  # Batch gagal: setiap bacaan mendapat pesan error, server tetap berjalan
+                logger.exception('ingest batch failed')
+                outputs, rows = [{'error': str(e)}] * len(items), []
+            for (_, future), output in zip(items, outputs):
+                if not future.done():
+                    future.set_result(output)
+                self.queue.task_done()
+            metrics.incr('ingest.readings', len(items))
+            metrics.observe('ingest.batch_size', len(items))
+            if rows and self.output_dir is not None:
+                await self.results.put(rows)
+
+    def _pond_start(self, pond: Optional[str], times: pd.Series) -> pd.Timestamp:
+        if self.start_date is not None:
+            return self.start_date
+        if pond not in self._start_dates:
+            self._start_dates[pond] = times.min()
+        return self._start_dates[pond]
+
+    def _infer_batch(self, readings: List[Dict]) -> Tuple[List[Dict], List[Dict]]:
+        """Responses and rows to persist for one micro-batch (runs in the inference thread)"""
+        outputs: List[Optional[Dict]] = [None] * len(readings)
+        rows = []
+        for pond, indices in self.ponds.split([reading.get('pond') for reading in readings]).items():
+            group = [readings[i] for i in indices]
+            try:
+                model, engine, index = self.ponds.model(pond), self.ponds.engine(pond), self.ponds.weekly_index(pond)
+            except (ValueError, OSError) as e:
+                for i, reading in zip(indices, group):
+                    outputs[i] = {**{k: reading[k] for k in PASSTHROUGH_KEYS if k in reading}, 'error': str(e)}
+                continue
+
+            times = pd.to_datetime(pd.Series([reading.get('Time') for reading in group], dtype=object),
+                                   errors='coerce', format='mixed')
+            temps = np.array([_to_float(reading.get('Temperature')) for reading in group])
+            phs = np.array([_to_float(reading.get('pH')) for reading in group])
+            weights = np.array([_to_float(reading.get('weight')) for reading in group])
+            valid_time = times.notna().to_numpy()
+
+            min_feeds = max_feeds = np.full(len(group), np.nan)
+            if valid_time.any():
+                start = self._pond_start(pond, times[valid_time])
+                min_feeds, max_feeds = index.feed_bounds(times.fillna(start), start)
+                # Bobot pada bacaan menggantikan biomassa mingguan
+                own_min, own_max = model.feed_bounds(weights)
+                has_weight = np.isfinite(weights)
+                min_feeds = np.where(has_weight, own_min, min_feeds)
+                max_feeds = np.where(has_weight, own_max, max_feeds)
+
+            # Batas 0..FEED_DIVISIONS: posisi ternormalisasi, sehingga MemoizedMamdani bisa dipakai ulang
+            batch = engine.infer(temps, phs, 0.0, float(FEED_DIVISIONS))
+            feeds = min_feeds + batch.feed * (max_feeds - min_feeds) / FEED_DIVISIONS
+            fired = (np.round(batch.activations, 4) > 0).any(axis=1)
+
+            for j, (i, reading) in enumerate(zip(indices, group)):
+                output = {k: reading[k] for k in PASSTHROUGH_KEYS if k in reading}
+                if not valid_time[j]:
+                    output['error'] = 'Time tidak valid'
+                elif np.isnan(temps[j]) or np.isnan(phs[j]):
+                    output['error'] = 'Temperature dan pH harus berupa angka'
+                else:
+                    feed = round(float(feeds[j]), 4) if fired[j] else None
+                    output.update({'time': str(times[j]), 'feed_amount': feed})
+                    rows.append({'pond': pond, 'Time': times[j], 'Temperatur': temps[j], 'pH': phs[j],
+                                 'feed_amount': feed})
+                outputs[i] = output
+        return outputs, rows
+
+    async def _writer(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batches = [await self.results.get()]
+            # Batch yang sudah menunggu ditulis sekaligus agar file lebih jarang dibuka
+            while not self.results.empty():
+                batches.append(self.results.get_nowait())
+            try:
+                await loop.run_in_executor(self._write_executor, self._persist,
+                                           [row for rows in batches for row in rows], dict(self._start_dates))
+            except OSError:
+                logger.exception('ingest write failed')
+                metrics.incr('ingest.write_errors')
+            finally:
+                for _ in batches:
+                    self.results.task_done()
+
+    def _persist(self, rows: List[Dict], start_dates: Dict) -> None:
+        """Append results per pond (feed_recommendations.csv layout) and save the week anchors"""
+        frame = pd.DataFrame(rows)
+        for pond, group in frame.groupby(frame['pond'].fillna(''), sort=False):
+            pond_dir = self.output_dir / pond if pond else self.output_dir
+            os.makedirs(pond_dir, exist_ok=True)
+            output_file = pond_dir / 'feed_recommendations.csv'
+            exists = output_file.exists()
+            table = pd.DataFrame({
+                'Time': pd.to_datetime(group['Time']).dt.strftime('%Y-%m-%d %H:%M:%S'),
+                'Temperatur': group['Temperatur'],
+                'pH': group['pH'],
+                'feed_amount': group['feed_amount'].astype(float)
+            })
+            table.to_csv(output_file, mode='a' if exists else 'w', header=not exists, index=False,
+                         float_format='%.2f', na_rep='-')
+
+        tmp_file = self.state_file.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump({'start_dates': {pond or '': str(value) for pond, value in start_dates.items()}}, f)
+        os.replace(tmp_file, self.state_file)
+
+
+async def _gateway(host: str, port: int, gateway: int, n_readings: int, interval: float,
+                   pond: Optional[str], latencies: Histogram, counts: Dict[str, int]) -> None:
+    """One simulated gateway: sends its log line by line and reads the responses concurrently"""
+    log = generate_sensor_log(n_readings, seed=gateway)
+    log['Time'] = log['Time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    reader, writer = await asyncio.open_connection(host, port, limit=LINE_LIMIT)
+    sent_at = []
+
+    async def receive():
+        for k in range(len(log)):
+            line = await reader.readline()
+            if not line:
+                break
+            latencies.observe(time.perf_counter() - sent_at[k])
+            counts['errors' if 'error' in json.loads(line) else 'ok'] += 1
+
+    receiver = asyncio.create_task(receive())
+    for k, (temperature, ph, timestamp) in enumerate(log.itertuples(index=False)):
+        reading = {'id': f'{gateway}-{k}', 'Time': timestamp,
+                   'Temperature': None if np.isnan(temperature) else temperature,
+                   'pH': None if np.isnan(ph) else ph}
+        if pond is not None:
+            reading['pond'] = pond
+        sent_at.append(time.perf_counter())
+        writer.write(json.dumps(reading).encode() + b'\n')
+        await writer.drain()
+        if interval:
+            await asyncio.sleep(interval)
+    await receiver
+    writer.close()
+    with contextlib.suppress(ConnectionError):
+        await writer.wait_closed()
+
+
+async def simulate_gateways(host: str = DEFAULT_HOST,
+                            port: int = DEFAULT_PORT,
+                            gateways: int = 300,
+                            readings: int = 200,
+                            interval: float = 0.0,
+                            pond: Optional[str] = None) -> Dict:
+    """
+    Run `gateways` concurrent connections that each send `readings` synthetic readings.
+
+    Returns throughput and the send -> response latency distribution.
+    """
+    latencies = Histogram(window=gateways * readings)
+    counts = {'ok': 0, 'errors': 0}
+    start = time.perf_counter()
+    await asyncio.gather(*(_gateway(host, port, g, readings, interval, pond, latencies, counts)
+                           for g in range(gateways)))
+    seconds = time.perf_counter() - start
+    total = counts['ok'] + counts['errors']
+    return {
+        'gateways': gateways,
+        'readings': total,
+        'errors': counts['errors'],
+        'seconds': round(seconds, 3),
+        'readings_per_s': round(total / seconds, 1) if seconds else None,
+        'latency_s': latencies.summary()
+    }
+
+
+async def _simulate_local(args) -> Dict:
+    """Simulation against an in-process server on a free port"""
+    server = await IngestServer(PondRegistry.from_config(args.ponds), port=0, max_batch=args.max_batch,
+                                queue_size=args.queue_size, max_inflight=args.max_inflight,
+                                output_dir=args.output_dir).start()
+    try:
+        return await simulate_gateways(server.host, server.port, args.gateways, args.readings,
+                                       args.interval, args.pond)
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Server ingest asyncio untuk gateway IoT (protokol baris NDJSON).')
+    sub = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'simulate'):
+        command = sub.add_parser(name)
+        command.add_argument('--host', default=DEFAULT_HOST)
+        command.add_argument('--port', type=int, default=DEFAULT_PORT)
+        command.add_argument('--ponds', type=Path, default=os.environ.get('WEB_FUZZY_PONDS'))
+        command.add_argument('--max-batch', type=int, default=1024)
+        command.add_argument('--queue-size', type=int, default=8192)
+        command.add_argument('--max-inflight', type=int, default=256)
+        command.add_argument('--output-dir', type=Path, default=OUTPUT_DIR / 'ingest')
+    simulate = sub.choices['simulate']
+    simulate.add_argument('--gateways', type=int, default=300)
+    simulate.add_argument('--readings', type=int, default=200, help='Bacaan per gateway')
+    simulate.add_argument('--interval', type=float, default=0.0, help='Jeda antar bacaan per gateway (detik)')
+    simulate.add_argument('--pond', default=None)
+    simulate.add_argument('--local', action='store_true', help='Jalankan server di proses yang sama')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    if args.command == 'serve':
+        metrics.enable()
+        server = IngestServer(PondRegistry.from_config(args.ponds), args.host, args.port, args.max_batch,
+                              queue_size=args.queue_size, max_inflight=args.max_inflight,
+                              output_dir=args.output_dir)
+        with contextlib.suppress(KeyboardInterrupt):
+            asyncio.run(server.serve_forever())
+        return
+
+    if args.local:
+        report = asyncio.run(_simulate_local(args))
+    else:
+        report = asyncio.run(simulate_gateways(args.host, args.port, args.gateways, args.readings,
+                                               args.interval, args.pond))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+from typing import TYPE_CHECKING
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from skfuzzy import control as ctrl
+
+
+ArrayLike = Union[float, Sequence[float], np.ndarray]
+
+
+def trapmf(x: ArrayLike, params: Sequence[float]) -> np.ndarray:
+    """
+    Evaluate a trapezoidal membership function directly from its parameters.
+
+    Vertical edges (``a == b`` or ``c == d``) are treated like
+    ``skfuzzy.trapmf``: the shoulder value is 1 up to and including the edge.
+
+    Args:
+        x (ArrayLike): Scalar or array of crisp values.
+        params (Sequence[float]): Trapezoid corners ``[a, b, c, d]``.
+
+    Returns:
+        np.ndarray: Membership degrees with the same shape as ``x``.
+    """
+    a, b, c, d = (float(p) for p in params)
+    x = np.asarray(x, dtype=float)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rising = (x - a) / (b - a) if b > a else np.where(x >= a, 1.0, 0.0)
+        falling = (d - x) / (d - c) if d > c else np.where(x <= d, 1.0, 0.0)
+    return np.clip(np.minimum(np.minimum(rising, falling), 1.0), 0.0, 1.0)
+
+
+def trimf(x: ArrayLike, params: Sequence[float]) -> np.ndarray:
+    """Evaluate a triangular membership function ``[a, b, c]`` directly from its parameters"""
+    a, b, c = params
+    return trapmf(x, [a, b, b, c])
+
+
+def evaluate_membership(x: ArrayLike, params: Sequence[float],
+                        bounds: Optional[Tuple[float, float]] = None) -> np.ndarray:
+    """
+    Membership degree of x for trimf (3 params) or trapmf (4 params).
+
+    Args:
+        x (ArrayLike): Scalar or array of crisp values.
+        params (Sequence[float]): Membership function parameters.
+        bounds (Tuple[float, float], optional): Universe range; values outside get degree 0,
+            matching ``fuzz.interp_membership`` on a sampled universe.
+
+    Raises:
+        ValueError: If the number of parameters is not 3 or 4.
+    """
+    if len(params) == 3:
+        degrees = trimf(x, params)
+    elif len(params) == 4:
+        degrees = trapmf(x, params)
+    else:
+        raise ValueError(f"Parameter fungsi keanggotaan {list(params)} tidak valid")
+
+    if bounds is not None:
+        x = np.asarray(x, dtype=float)
+        degrees = np.where((x >= bounds[0]) & (x <= bounds[1]), degrees, 0.0)
+    return degrees
+
+
+class Term:
+    """Membership term holding only its parameters"""
+
+    def __init__(self, label: str, params: Sequence[float]):
+        self.label = label
+        self.params = [float(p) for p in params]
+
+
+def universe_bounds(range_vals: Tuple[float, float, float]) -> Tuple[float, float]:
+    """First and last value of ``np.arange(*range_vals)`` without allocating the universe"""
+    start, stop, step = (float(v) for v in range_vals)
+    n_points = int(np.ceil((stop - start) / step))
+    if n_points < 1:
+        raise ValueError(f"Rentang universe {list(range_vals)} kosong")
+    # np.arange mengisi start + i * ((start + step) - start), bukan start + i * step
+    return start, start + (n_points - 1) * ((start + step) - start)
+
+
+class FuzzyVariable:
+    """
+    Minimal stand-in for ``ctrl.Antecedent`` with a universe, a label and
+    ``terms[label].params``, enough for term_degrees and BatchMamdani.
+
+    Only the first and last value of ``universe`` are read, so
+    ``from_range`` keeps just the two bounds.
+    """
+
+    def __init__(self, universe: np.ndarray, label: str, membership_params: List[Tuple[str, Sequence[float]]]):
+        self.universe = np.asarray(universe, dtype=float)
+        self.label = label
+        self.terms = {name: Term(name, params) for name, params in membership_params}
+
+    @classmethod
+    def from_range(cls, range_vals: Tuple[float, float, float], label: str,
+                   membership_params: List[Tuple[str, Sequence[float]]]) -> 'FuzzyVariable':
+        """Variable on the bounds of ``np.arange(*range_vals)``, see universe_bounds"""
+        return cls(np.array(universe_bounds(range_vals)), label, membership_params)
+
+
+def term_degrees(fuzzy_var: Union['ctrl.Antecedent', 'ctrl.Consequent', FuzzyVariable], x: ArrayLike) -> Dict[str, np.ndarray]:
+    """Degrees of x in every term of a fuzzy variable, using the stored ``terms[...].params``"""
+    bounds = (float(fuzzy_var.universe[0]), float(fuzzy_var.universe[-1]))
+    return {
+        label: evaluate_membership(x, term.params, bounds)
+        for label, term in fuzzy_var.terms.items()
+    }
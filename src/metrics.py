@@ -0,0 +1,186 @@
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from contextlib import nullcontext
+from functools import wraps
+from typing import Callable
+from typing import Dict
+
+
+logger = logging.getLogger('web_fuzzy.metrics')
+
+_NULL_TIMER = nullcontext()
+
+
+class Histogram:
+    """Count/sum/min/max of all samples plus a window of the latest samples for percentiles"""
+
+    def __init__(self, window: int = 4096):
+        self.count = 0
+        self.total = 0.0
+        self.min = float('inf')
+        self.max = float('-inf')
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        self.samples.append(value)
+
+    def percentile(self, q: float) -> float:
+        """Nearest-rank percentile (0..100) of the sample window"""
+        if not self.samples:
+            return float('nan')
+        ordered = sorted(self.samples)
+        return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+    def summary(self) -> Dict[str, float]:
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'sum': self.total,
+            'mean': self.total / self.count,
+            'min': self.min,
+            'max': self.max,
+            'p50': self.percentile(50),
+            'p90': self.percentile(90),
+            'p99': self.percentile(99)
+        }
+
+
+class Metrics:
+    """
+    Process-wide counters, histograms and stage timers.
+
+    Disabled by default (enable with ``WEB_FUZZY_METRICS=1`` or ``enable()``).
+    While disabled every call returns immediately and ``timer`` hands out a
+    shared no-op context manager, so instrumented code pays one attribute
+    check per call. Each finished stage is also written as one JSON line to
+    the ``web_fuzzy.metrics`` logger; ``log_to`` (or ``WEB_FUZZY_METRICS_LOG``
+    set to a file path or ``-`` for stderr) attaches a handler so the lines
+    are actually printed.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 4096):
+        self.enabled = enabled
+        self.window = window
+        self._lock = threading.Lock()
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def incr(self, name: str, value: float = 1) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, value: float) -> None:
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.window)
+            histogram.observe(value)
+
+    def observe_many(self, name: str, values) -> None:
+        """Observe every value of an iterable (e.g. rules fired per record of a batch)"""
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(self.window)
+            for value in values:
+                histogram.observe(float(value))
+
+    def timer(self, stage: str, **fields):
+        """Context manager timing a stage into the '<stage>.seconds' histogram and the structured log"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return self._timer(stage, fields)
+
+    @contextmanager
+    def _timer(self, stage: str, fields: Dict):
+        start = time.perf_counter()
+        try:
+            yield fields
+        finally:
+            seconds = time.perf_counter() - start
+            self.observe(f'{stage}.seconds', seconds)
+            self.log(stage, seconds=round(seconds, 6), **fields)
+
+    def timed(self, stage: str) -> Callable:
+        """Decorator version of `timer`"""
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with self._timer(stage, {}):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @staticmethod
+    def log_to(target: str = '-') -> logging.Handler:
+        """Write the JSON lines of the metrics logger to stderr ('-') or append them to a file"""
+        handler = logging.StreamHandler() if target in ('-', 'stderr') else logging.FileHandler(target)
+        handler.setFormatter(logging.Formatter('%(message)s'))
+        logger.addHandler(handler)
+        logger.setLevel(logging.INFO)
+        # Baris JSON tidak ikut diteruskan ke root logger (format log aplikasi lain)
+        logger.propagate = False
+        return handler
+
+    def log(self, event: str, **fields) -> None:
+        """One JSON line per event on the web_fuzzy.metrics logger"""
+        if self.enabled and logger.isEnabledFor(logging.INFO):
+            logger.info(json.dumps({'event': event, **fields}, default=str))
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'counters': dict(self.counters),
+                'histograms': {name: h.summary() for name, h in self.histograms.items()}
+            }
+
+    def to_prometheus(self) -> str:
+        """Snapshot in the Prometheus text format (histograms as summaries)"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = 'web_fuzzy_' + name.replace('.', '_')
+            lines += [f'# TYPE {metric} counter', f'{metric} {value}']
+        for name, summary in sorted(snapshot['histograms'].items()):
+            metric = 'web_fuzzy_' + name.replace('.', '_')
+            lines.append(f'# TYPE {metric} summary')
+            for q in ('p50', 'p90', 'p99'):
+                if q in summary:
+                    lines.append(f'{metric}{{quantile="0.{q[1:]}"}} {summary[q]}')
+            lines += [f'{metric}_count {summary["count"]}', f'{metric}_sum {summary.get("sum", 0)}']
+        return '\n'.join(lines) + '\n'
+
+    def reset(self) -> None:
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+
+metrics = Metrics(enabled=os.environ.get('WEB_FUZZY_METRICS', '0') not in ('', '0', 'false', 'False'))
+if os.environ.get('WEB_FUZZY_METRICS_LOG'):
+    metrics.log_to(os.environ['WEB_FUZZY_METRICS_LOG'])
@@ -0,0 +1,289 @@
+import json
+import threading
+from dataclasses import dataclass
+from dataclasses import field
+from pathlib import Path
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from batch_mamdani import BatchMamdani
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import FEED_POSITIONS
+from batch_mamdani import PH_MEMBERSHIP_PARAMS
+from batch_mamdani import PH_RANGE
+from batch_mamdani import RULE_DEFINITIONS
+from batch_mamdani import TEMPERATUR_MEMBERSHIP_PARAMS
+from batch_mamdani import TEMPERATUR_RANGE
+from batch_mamdani import calculate_feed_bounds
+from batch_mamdani import numpy_engine
+from inference_cache import MemoizedMamdani
+from PathManager import DATA_DIR
+
+if TYPE_CHECKING:  # pandas hanya dimuat saat indeks mingguan pertama dibangun, bukan saat app start
+    import pandas as pd
+    from weekly_index import WeeklyIndex
+
+
+DEFAULT_CONFIG = DATA_DIR / 'ponds.json'
+DEFAULT_MODEL = 'default'
+DEFAULT_WEIGHTS_FILE = 'berat_lobster_weekly.csv'
+
+
+def _terms(config: Dict[str, List[float]]) -> List[Tuple[str, List[float]]]:
+    return [(label, [float(p) for p in params]) for label, params in config.items()]
+
+
+@dataclass
+class PondModel:
+    """
+    One named fuzzy model: input sets, rule table, takaran positions and feed multipliers.
+
+    The takaran positions are in step units of ``[0, FEED_DIVISIONS]`` like
+    ``FEED_POSITIONS``, so one compiled engine serves every week of every pond
+    that uses the model; only ``feed_multiplier_*`` turn weights into bounds.
+    """
+    name: str
+    temperatur_params: List[Tuple[str, List[float]]] = field(default_factory=lambda: list(TEMPERATUR_MEMBERSHIP_PARAMS))
+    ph_params: List[Tuple[str, List[float]]] = field(default_factory=lambda: list(PH_MEMBERSHIP_PARAMS))
+    temperatur_range: Tuple[float, float, float] = TEMPERATUR_RANGE
+    ph_range: Tuple[float, float, float] = PH_RANGE
+    rule_definitions: List[Tuple[str, str, str]] = field(default_factory=lambda: list(RULE_DEFINITIONS))
+    feed_positions: Dict[str, List[float]] = field(default_factory=lambda: dict(FEED_POSITIONS))
+    feed_multiplier_min: float = 0.03
+    feed_multiplier_max: float = 0.05
+
+    @classmethod
+    def from_config(cls, name: str, config: Dict[str, Any]) -> 'PondModel':
+        """
+        Build a model from its config entry; every key is optional and defaults to the built-in model.
+
+        ``{"temperatur": {"range": [14, 40, 0.001], "terms": {"rendah": [14, 14, 23, 25], ...}},
+        "ph": {...}, "takaran": {"sedikit": [0, 0, 2, 3], ...}, "rules": [["normal", "asam", "sedang"], ...],
+        "feed_multiplier": [0.03, 0.05]}``
+        """
+        model = cls(name)
+        temperatur, ph = config.get('temperatur', {}), config.get('ph', {})
+        if 'terms' in temperatur:
+            model.temperatur_params = _terms(temperatur['terms'])
+        if 'range' in temperatur:
+            model.temperatur_range = tuple(float(v) for v in temperatur['range'])
+        if 'terms' in ph:
+            model.ph_params = _terms(ph['terms'])
+        if 'range' in ph:
+            model.ph_range = tuple(float(v) for v in ph['range'])
+        if 'takaran' in config:
+            # Himpunan segitiga [a, b, c] disimpan sebagai trapesium [a, b, b, c]
+            model.feed_positions = {
+                label: [float(p) for p in (params if len(params) == 4 else [params[0], params[1], params[1], params[2]])]
+                for label, params in config['takaran'].items()
+            }
+        if 'rules' in config:
+            model.rule_definitions = [tuple(rule) for rule in config['rules']]
+        if 'feed_multiplier' in config:
+            model.feed_multiplier_min, model.feed_multiplier_max = (float(v) for v in config['feed_multiplier'])
+        model.validate()
+        return model
+
+    def validate(self) -> None:
+        """
+        Raises:
+            ValueError: If a rule names an unknown term or a takaran set lies outside [0, FEED_DIVISIONS].
+        """
+        temp_terms = {label for label, _ in self.temperatur_params}
+        ph_terms = {label for label, _ in self.ph_params}
+        for temp, ph, feed in self.rule_definitions:
+            if temp not in temp_terms or ph not in ph_terms or feed not in self.feed_positions:
+                raise ValueError(f"Model '{self.name}': aturan ({temp}, {ph}, {feed}) memakai himpunan yang tidak ada")
+        for label, params in self.feed_positions.items():
+            if len(params) != 4 or min(params) < 0 or max(params) > FEED_DIVISIONS:
+                raise ValueError(f"Model '{self.name}': himpunan takaran '{label}' harus di dalam 0..{FEED_DIVISIONS}")
+        if not 0 <= self.feed_multiplier_min < self.feed_multiplier_max:
+            raise ValueError(f"Model '{self.name}': feed_multiplier harus 0 <= min < max")
+
+    def compile(self, **engine_kwargs) -> BatchMamdani:
+        """NumPy engine for this model, see batch_mamdani.numpy_engine"""
+        return numpy_engine(self.temperatur_params, self.ph_params, self.temperatur_range, self.ph_range,
+                            rule_definitions=self.rule_definitions, feed_positions=self.feed_positions,
+                            **engine_kwargs)
+
+    def feed_bounds(self, weight):
+        """Minimum and maximum feed for a (weekly) biomass with this model's multipliers"""
+        return calculate_feed_bounds(weight, self.feed_multiplier_min, self.feed_multiplier_max)
+
+    def fuzzy_params(self):
+        """FuzzyParams for the scikit-fuzzy DataProcessor path (imported on demand)"""
+        from FuzzyParams import FuzzyParams
+
+        return FuzzyParams(temp_range=self.temperatur_range, ph_range=self.ph_range,
+                           feed_multiplier_min=self.feed_multiplier_min,
+                           feed_multiplier_max=self.feed_multiplier_max,
+                           temp_params=self.temperatur_params, ph_params=self.ph_params)
+
+
+class PondRegistry:
+    """
+    Named fuzzy models and the pond -> model routing, loaded from a JSON config.
+
+    Each model is compiled into a BatchMamdani the first time a pond using it
+    is served and then kept warm for the life of the process, so inference for
+    any number of ponds costs one dict lookup per batch instead of rebuilding
+    membership functions per pond or per row. Ponds that share a model share
+    its engine (and memo cache when ``memo_quantum`` is set).
+
+    Config layout::
+
+        {
+          "default_model": "lobster_air_tawar",
+          "models": {"lobster_air_tawar": {...PondModel.from_config...}},
+          "ponds": {"kolam_1": {"model": "lobster_air_tawar", "weights_file": "berat_lobster_weekly.csv"}}
+        }
+
+    A pond entry may also set how its weight table becomes feed bounds (see
+    WeeklyIndex): ``"lobsters"`` (subset of rows), ``"aggregate"``
+    (``"sum"``/``"mean"``) and ``"interpolate"`` (between weigh-ins).
+
+    Readings without a pond ID use ``default_model``.
+    """
+
+    def __init__(self,
+                 models: Dict[str, PondModel],
+                 ponds: Optional[Dict[str, Dict[str, Any]]] = None,
+                 default_model: Optional[str] = None,
+                 memo_quantum: Optional[float] = None,
+                 memo_size: int = 65536):
+        if not models:
+            raise ValueError("Registry kolam membutuhkan minimal satu model.")
+        self.models = dict(models)
+        self.ponds = {str(pond): dict(entry) for pond, entry in (ponds or {}).items()}
+        self.default_model = default_model or next(iter(self.models))
+        self.memo_quantum = memo_quantum
+        self.memo_size = memo_size
+
+        for pond, entry in self.ponds.items():
+            if entry.get('model', self.default_model) not in self.models:
+                raise ValueError(f"Kolam '{pond}' memakai model '{entry.get('model')}' yang tidak terdaftar")
+        if self.default_model not in self.models:
+            raise ValueError(f"Model default '{self.default_model}' tidak terdaftar")
+
+        self._lock = threading.Lock()
+        self._engines: Dict[str, BatchMamdani] = {}
+        self._weekly_indexes: Dict[Optional[str], 'WeeklyIndex'] = {}
+
+    @classmethod
+    def from_dict(cls, config: Dict[str, Any], **kwargs) -> 'PondRegistry':
+        models = {name: PondModel.from_config(name, entry) for name, entry in config.get('models', {}).items()}
+        if not models:
+            models = {DEFAULT_MODEL: PondModel(DEFAULT_MODEL)}
+        return cls(models, config.get('ponds'), config.get('default_model'), **kwargs)
+
+    @classmethod
+    def from_config(cls, path: Optional[Path] = None, **kwargs) -> 'PondRegistry':
+        """Load the registry from `path` (default data/ponds.json); without a file only the built-in model exists"""
+        path = Path(path) if path else DEFAULT_CONFIG
+        if not path.exists():
+            return cls({DEFAULT_MODEL: PondModel(DEFAULT_MODEL)}, **kwargs)
+        with open(path) as f:
+            return cls.from_dict(json.load(f), **kwargs)
+
+    def model_name(self, pond_id: Optional[str] = None) -> str:
+        """
+        Raises:
+            ValueError: If the pond is not configured.
+        """
+        if pond_id is None:
+            return self.default_model
+        entry = self.ponds.get(str(pond_id))
+        if entry is None:
+            raise ValueError(f"Kolam '{pond_id}' tidak terdaftar")
+        return entry.get('model', self.default_model)
+
+    def model(self, pond_id: Optional[str] = None) -> PondModel:
+        return self.models[self.model_name(pond_id)]
+
+    def engine(self, pond_id: Optional[str] = None):
+        """Compiled (and optionally memoized) engine of the pond's model, built once"""
+        return self.model_engine(self.model_name(pond_id))
+
+    def model_engine(self, name: str):
+        engine = self._engines.get(name)
+        if engine is None:
+            with self._lock:
+                engine = self._engines.get(name)
+                if engine is None:
+                    engine = self.models[name].compile()
+                    if self.memo_quantum:
+                        engine = MemoizedMamdani(engine, self.memo_quantum, self.memo_size)
+                    self._engines[name] = engine
+        return engine
+
+    def warm_up(self) -> None:
+        """Compile every model up front, e.g. before serving requests"""
+        for name in self.models:
+            self.model_engine(name)
+
+    def weights_path(self, pond_id: Optional[str] = None) -> Path:
+        """Weekly weight table of the pond (relative paths are under data/)"""
+        entry = self.ponds.get(str(pond_id), {}) if pond_id is not None else {}
+        return DATA_DIR / entry.get('weights_file', DEFAULT_WEIGHTS_FILE)
+
+    def weekly_index(self, pond_id: Optional[str] = None,
+                     weekly_weights: Optional['pd.DataFrame'] = None) -> 'WeeklyIndex':
+        """
+        Week -> feed bounds index of the pond with its model's multipliers, built once.
+
+        `weekly_weights` replaces the pond's weight file (the index is then not cached).
+        """
+        key = None if pond_id is None else str(pond_id)
+        if weekly_weights is None and key in self._weekly_indexes:
+            return self._weekly_indexes[key]
+
+        import pandas as pd
+        from weekly_index import WeeklyIndex
+
+        entry = self.ponds.get(key, {}) if key is not None else {}
+        index = WeeklyIndex.for_model(
+            weekly_weights if weekly_weights is not None else pd.read_csv(self.weights_path(pond_id)),
+            self.model(pond_id),
+            lobsters=entry.get('lobsters'),
+            aggregate=entry.get('aggregate', 'sum'),
+            interpolate=bool(entry.get('interpolate', False)))
+        if weekly_weights is None:
+            with self._lock:
+                index = self._weekly_indexes.setdefault(key, index)
+        return index
+
+    def split(self, pond_ids) -> Dict[Optional[str], np.ndarray]:
+        """Row indices per pond ID, in order of first appearance"""
+        pond_ids = np.asarray(pond_ids, dtype=object)
+        groups: Dict[Optional[str], List[int]] = {}
+        for i, pond in enumerate(pond_ids):
+            groups.setdefault(None if pond is None else str(pond), []).append(i)
+        return {pond: np.array(rows) for pond, rows in groups.items()}
+
+    def describe(self) -> Dict[str, Any]:
+        """Configured models and ponds, and which models are compiled"""
+        return {
+            'default_model': self.default_model,
+            'models': {
+                name: {
+                    'temperatur_terms': [label for label, _ in model.temperatur_params],
+                    'ph_terms': [label for label, _ in model.ph_params],
+                    'takaran_terms': list(model.feed_positions),
+                    'rules': len(model.rule_definitions),
+                    'feed_multiplier': [model.feed_multiplier_min, model.feed_multiplier_max],
+                    'compiled': name in self._engines
+                }
+                for name, model in self.models.items()
+            },
+            'ponds': {pond: self.model_name(pond) for pond in self.ponds}
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Memo cache statistics per compiled model (empty without memo_quantum)"""
+        return {name: engine.stats() for name, engine in self._engines.items() if isinstance(engine, MemoizedMamdani)}
@@ -0,0 +1,265 @@
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from trace_store import ResultTable
+
+
+STORE_VERSION = 1
+GROW_RECORDS = 65536
+
+
+def record_dtype(n_rules: int = 0) -> np.dtype:
+    """Fixed record layout: ns timestamp, readings, feed and its bounds, and one activation per rule"""
+    fields = [
+        ('time', '<i8'),
+        ('temperature', '<f4'),
+        ('ph', '<f4'),
+        ('feed', '<f8'),
+        ('min_feed', '<f8'),
+        ('max_feed', '<f8')
+    ]
+    if n_rules:
+        fields.append(('activations', '<f4', (n_rules,)))
+    return np.dtype(fields)
+
+
+def _to_ns(times) -> np.ndarray:
+    times = pd.Series(times)
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times)
+    return times.to_numpy().astype('datetime64[ns]').view(np.int64)
+
+
+def _timestamp_ns(value) -> int:
+    return pd.Timestamp(value).as_unit('ns').value
+
+
+class ReadingStore:
+    """
+    Append-only store of fixed-size records in one file, read through ``numpy.memmap``.
+
+    ``<path>`` holds the records (see ``record_dtype``) and ``<path>.json``
+    the layout, the rule labels and the number of committed records. The
+    data file grows in blocks of ``grow`` records; records are written and
+    flushed before the count in the header is replaced, so a reader never
+    sees a half-written record.
+
+    Records must be appended in time order, which makes the ``time`` field
+    itself the time index: ``range`` finds its bounds with ``np.searchsorted``
+    on the mapped column and returns a view of the file, so slicing the last
+    week touches only the pages of that week, whatever the size of the store.
+
+    Views returned by ``records``/``range``/``last`` stay valid after later
+    appends. A store opened with ``mode='r'`` (e.g. by another process)
+    picks up new records on ``refresh``, which every query calls.
+
+    Args:
+        path (Path): Data file.
+        rule_labels (Sequence[str]): Labels of the stored rule activations;
+            taken from the header of an existing store. Empty for raw readings.
+        mode (str): 'a' to append (created if missing) or 'r' read only.
+        grow (int): Records added to the file when it is full.
+    """
+
+    def __init__(self,
+                 path: Union[str, Path],
+                 rule_labels: Optional[Sequence[str]] = None,
+                 mode: str = 'a',
+                 grow: int = GROW_RECORDS):
+        if mode not in ('a', 'r'):
+            raise ValueError("Mode store tidak valid. Pilih 'a' atau 'r'.")
+        if grow < 1:
+            raise ValueError("grow harus lebih besar dari 0.")
+        self.path = Path(path)
+        self.header_path = self.path.with_name(self.path.name + '.json')
+        self.mode = mode
+        self.grow = grow
+        self._lock = threading.Lock()
+        self._mmap = None
+        self._header_mtime = None
+
+        if self.header_path.exists():
+            header = self._read_header()
+            if rule_labels is not None and list(rule_labels) != header['rule_labels']:
+                raise ValueError(f"Rule store {self.path} berbeda: {header['rule_labels']} != {list(rule_labels)}")
+            self.rule_labels = header['rule_labels']
+            self.count = header['count']
+        elif mode == 'r':
+            raise FileNotFoundError(f"Store {self.path} tidak ditemukan")
+        else:
+            self.rule_labels = list(rule_labels or [])
+            self.count = 0
+            os.makedirs(self.path.parent, exist_ok=True)
+            self.path.touch()
+            self._write_header()
+
+        self.dtype = record_dtype(len(self.rule_labels))
+        self._map()
+
+    def _read_header(self) -> Dict:
+        with open(self.header_path) as f:
+            header = json.load(f)
+        self._header_mtime = os.stat(self.header_path).st_mtime_ns
+        if header['version'] != STORE_VERSION:
+            raise ValueError(f"Versi store {header['version']} tidak didukung")
+        return header
+
+    def _write_header(self) -> None:
+        header = {'version': STORE_VERSION, 'rule_labels': self.rule_labels, 'count': self.count}
+        tmp_file = self.header_path.with_suffix('.tmp')
+        with open(tmp_file, 'w') as f:
+            json.dump(header, f)
+        os.replace(tmp_file, self.header_path)
+
+    @property
+    def capacity(self) -> int:
+        return 0 if self._mmap is None else len(self._mmap)
+
+    def _map(self) -> None:
+        """(Re)map the whole data file; earlier views keep their own mapping"""
+        capacity = os.path.getsize(self.path) // self.dtype.itemsize
+        if capacity == 0:
+            self._mmap = None
+            return
+        self._mmap = np.memmap(self.path, dtype=self.dtype, mode='r+' if self.mode == 'a' else 'r',
+                               shape=(capacity,))
+
+    def _reserve(self, n_records: int) -> None:
+        if self.count + n_records <= self.capacity:
+            return
+        blocks = -(-(self.count + n_records) // self.grow)
+        if self._mmap is not None:
+            self._mmap.flush()
+        with open(self.path, 'r+b') as f:
+            f.truncate(blocks * self.grow * self.dtype.itemsize)
+        self._map()
+
+    def refresh(self) -> int:
+        """Pick up records committed by another writer (read-only stores); returns the count"""
+        if self.mode == 'r' and os.stat(self.header_path).st_mtime_ns != self._header_mtime:
+            with self._lock:
+                self.count = self._read_header()['count']
+                if self.count > self.capacity:
+                    self._map()
+        return self.count
+
+    def __len__(self) -> int:
+        return self.refresh()
+
+    def append(self, records: np.ndarray) -> int:
+        """Append records of ``self.dtype`` (not older than the last record); returns the new count"""
+        if self.mode != 'a':
+            raise ValueError(f"Store {self.path} dibuka read-only")
+        records = np.asarray(records, dtype=self.dtype)
+        if not len(records):
+            return self.count
+        times = records['time']
+        if (np.diff(times) < 0).any() or (self.count and times[0] < self._mmap['time'][self.count - 1]):
+            raise ValueError("Record harus ditambahkan berurutan menurut waktu")
+
+        with self._lock:
+            self._reserve(len(records))
+            self._mmap[self.count:self.count + len(records)] = records
+            self._mmap.flush()
+            self.count += len(records)
+            self._write_header()
+        return self.count
+
+    def append_readings(self, readings: pd.DataFrame) -> int:
+        """Append Time/Temperature/pH readings (raw or filtered; feed fields are NaN)"""
+        records = np.zeros(len(readings), dtype=self.dtype)
+        records['time'] = _to_ns(readings['Time'])
+        records['temperature'] = pd.to_numeric(readings['Temperature'], errors='coerce')
+        records['ph'] = pd.to_numeric(readings['pH'], errors='coerce')
+        for field in ('feed', 'min_feed', 'max_feed'):
+            records[field] = np.nan
+        if 'activations' in self.dtype.names:
+            records['activations'] = np.nan
+        return self.append(records)
+
+    def append_results(self, table: ResultTable) -> int:
+        """Append the rows of a ResultTable (feed NaN where no rule fired)"""
+        trace = table.trace
+        records = np.zeros(len(trace), dtype=self.dtype)
+        records['time'] = _to_ns(trace['Time'])
+        records['temperature'] = trace['Temperatur']
+        records['ph'] = trace['pH']
+        records['feed'] = trace['feed_amount']
+        records['min_feed'] = trace['min_feed']
+        records['max_feed'] = trace['max_feed']
+        if self.rule_labels:
+            columns = [f'alpha_rule_{i}' for i in range(1, len(self.rule_labels) + 1)]
+            records['activations'] = trace[columns].to_numpy(dtype=np.float32)
+        return self.append(records)
+
+    def records(self) -> np.ndarray:
+        """All committed records as a view of the file"""
+        count = self.refresh()
+        if self._mmap is None:
+            return np.empty(0, dtype=self.dtype)
+        return self._mmap[:count]
+
+    def range(self, start=None, end=None) -> np.ndarray:
+        """Records with ``start <= time < end`` (either bound optional), as a view of the file"""
+        records = self.records()
+        times = records['time']
+        lo = 0 if start is None else int(np.searchsorted(times, _timestamp_ns(start), side='left'))
+        hi = len(records) if end is None else int(np.searchsorted(times, _timestamp_ns(end), side='left'))
+        return records[lo:max(lo, hi)]
+
+    def last(self, period: Union[str, pd.Timedelta] = '7D') -> np.ndarray:
+        """Records of the last `period` before (and including) the newest record"""
+        records = self.records()
+        if not len(records):
+            return records
+        start = records['time'][-1] - pd.Timedelta(period).value
+        return records[int(np.searchsorted(records['time'], start, side='left')):]
+
+    def to_frame(self, records: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """Copy records (all by default) into a DataFrame, one column per rule activation"""
+        records = self.records() if records is None else records
+        frame = pd.DataFrame({
+            'Time': pd.to_datetime(np.asarray(records['time']).view('datetime64[ns]')),
+            'Temperatur': np.asarray(records['temperature']),
+            'pH': np.asarray(records['ph']),
+            'feed_amount': np.asarray(records['feed']),
+            'min_feed': np.asarray(records['min_feed']),
+            'max_feed': np.asarray(records['max_feed'])
+        })
+        for j, label in enumerate(self.rule_labels):
+            frame[label] = np.asarray(records['activations'][:, j])
+        return frame
+
+    def describe(self) -> Dict:
+        """Size and time span of the store"""
+        records = self.records()
+        first, last = (str(pd.Timestamp(int(records['time'][k]))) if len(records) else None for k in (0, -1))
+        return {
+            'path': str(self.path),
+            'records': len(records),
+            'capacity': self.capacity,
+            'record_bytes': self.dtype.itemsize,
+            'rules': len(self.rule_labels),
+            'first': first,
+            'last': last
+        }
+
+
+def records_to_json(store: ReadingStore, records: np.ndarray) -> List[Dict]:
+    """JSON-ready rows of store records (NaN -> None)"""
+    frame = store.to_frame(records)
+    frame['Time'] = frame['Time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    # float32 disimpan apa adanya; dibulatkan seperti trace agar tidak muncul 24.4799995422
+    frame[['Temperatur', 'pH']] = frame[['Temperatur', 'pH']].astype(np.float64).round(2)
+    frame[store.rule_labels] = frame[store.rule_labels].astype(np.float64).round(4)
+    return json.loads(frame.to_json(orient='records'))
@@ -0,0 +1,101 @@
+from collections import OrderedDict
+from typing import TYPE_CHECKING
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Hashable
+from typing import List
+from typing import Tuple
+from typing import Union
+
+if TYPE_CHECKING:  # Hanya untuk anotasi; cache ini juga dipakai engine NumPy tanpa scikit-fuzzy
+    from skfuzzy import control as ctrl
+
+
+def membership_key(fuzzy_var: Union['ctrl.Antecedent', 'ctrl.Consequent']) -> Tuple:
+    """Hashable summary of a fuzzy variable: universe bounds and term params"""
+    universe = fuzzy_var.universe
+    terms = tuple(
+        (label, tuple(float(p) for p in getattr(term, 'params', ())))
+        for label, term in fuzzy_var.terms.items()
+    )
+    return (fuzzy_var.label, float(universe[0]), float(universe[-1]), len(universe), terms)
+
+
+def rule_base_key(feed_amount: 'ctrl.Consequent',
+                  rule_definitions: List[Tuple[str, str, str]],
+                  *antecedents: 'ctrl.Antecedent') -> Tuple:
+    """Cache key for a compiled rule base: feed bounds/params, rule table and antecedent params"""
+    return (
+        membership_key(feed_amount),
+        tuple(tuple(rule) for rule in rule_definitions),
+        tuple(membership_key(antecedent) for antecedent in antecedents)
+    )
+
+
+class RuleBaseCache:
+    """
+    Bounded LRU cache for compiled rule bases.
+
+    The rule base only changes when the weekly feed bounds change, so the
+    ``ctrl.Rule`` list, ``ControlSystem`` and ``ControlSystemSimulation`` are
+    built once per week and reused for every reading of that week.
+    """
+
+    def __init__(self, maxsize: int = 16):
+        if maxsize < 1:
+            raise ValueError("maxsize harus lebih besar dari 0.")
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries: 'OrderedDict[Hashable, Any]' = OrderedDict()
+
+    def get_or_build(self, key: Hashable, build: Callable[[], Any]) -> Any:
+        """Return the cached value for key, building and storing it on a miss"""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+        self.misses += 1
+        value = build()
+        self._entries[key] = value
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value for key (counting a hit or miss) without building it"""
+        if key in self._entries:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return self._entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store value under key, evicting the least recently used entry when full"""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        """Drop all entries and reset the counters"""
+        self._entries.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Hit/miss counters and current size"""
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'size': len(self._entries),
+            'maxsize': self.maxsize,
+            'hit_rate': self.hits / total if total else 0.0
+        }
+
+    def __len__(self) -> int:
+        return len(self._entries)
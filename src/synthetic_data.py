@@ -0,0 +1,84 @@
+from pathlib import Path
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+SENSOR_TIME_FORMAT = '%d %B %Y %H:%M:%S'
+
+
+def generate_sensor_log(n_readings: int,
+                        start: str = '2024-08-10 08:00:00',
+                        interval: float = 48.0,
+                        jitter: float = 0.25,
+                        gap_rate: float = 0.0005,
+                        mean_gap: float = 3 * 3600,
+                        missing_rate: float = 0.002,
+                        seed: int = 0) -> pd.DataFrame:
+    """
+    Synthetic Temperature/pH/Time log shaped like ``data/dataset.csv``.
+
+    Args:
+        n_readings (int): Number of readings before gaps are cut out.
+        start (str): Timestamp of the first reading.
+        interval (float): Mean sampling interval in seconds.
+        jitter (float): Relative jitter of each interval, uniform in ``±jitter``.
+        gap_rate (float): Probability that a reading starts an outage.
+        mean_gap (float): Mean outage length in seconds (exponential).
+        missing_rate (float): Fraction of remaining readings with a missing value.
+        seed (int): Seed of the random generator.
+
+    Returns:
+        pd.DataFrame: Columns 'Temperature', 'pH' (float) and 'Time' (datetime64), sorted by time.
+    """
+    rng = np.random.default_rng(seed)
+    steps = interval * (1 + rng.uniform(-jitter, jitter, n_readings))
+    seconds = np.cumsum(steps) - steps[0]
+
+    # Gangguan sensor: buang semua bacaan di dalam jendela [awal, awal + durasi)
+    gap_starts = seconds[rng.random(n_readings) < gap_rate]
+    if len(gap_starts):
+        gap_ends = np.maximum.accumulate(gap_starts + rng.exponential(mean_gap, len(gap_starts)))
+        last_gap = np.searchsorted(gap_starts, seconds, side='right') - 1
+        in_gap = (last_gap >= 0) & (seconds < gap_ends[np.maximum(last_gap, 0)])
+        seconds = seconds[~in_gap]
+
+    # Suhu mengikuti siklus harian, pH berfluktuasi di sekitar netral
+    hours = seconds / 3600
+    temperature = 27 + 3 * np.sin(2 * np.pi * (hours - 9) / 24) + rng.normal(0, 0.6, len(seconds))
+    ph = 7.2 + 0.3 * np.sin(2 * np.pi * hours / 24 / 7) + rng.normal(0, 0.15, len(seconds))
+    temperature[rng.random(len(seconds)) < missing_rate] = np.nan
+    ph[rng.random(len(seconds)) < missing_rate] = np.nan
+
+    return pd.DataFrame({
+        'Temperature': np.round(temperature, 2),
+        'pH': np.round(ph, 2),
+        'Time': pd.Timestamp(start) + pd.to_timedelta(np.round(seconds), unit='s')
+    })
+
+
+def generate_weekly_weights(n_lobsters: int = 10,
+                            weeks: int = 8,
+                            initial_range: Tuple[float, float] = (15, 25),
+                            growth_range: Tuple[float, float] = (0.5, 2.5),
+                            seed: int = 0) -> pd.DataFrame:
+    """Weekly weight table shaped like ``data/berat_lobster_weekly.csv`` (Nama, Week_1 .. Week_n)"""
+    rng = np.random.default_rng(seed)
+    initial = rng.uniform(*initial_range, (n_lobsters, 1))
+    growth = rng.uniform(*growth_range, (n_lobsters, weeks - 1))
+    weights = np.round(np.hstack([initial, initial + np.cumsum(growth, axis=1)]))
+
+    table = pd.DataFrame(weights.astype(int), columns=[f'Week_{i}' for i in range(1, weeks + 1)])
+    table.insert(0, 'Nama', [f'Lobster_{i}' for i in range(1, n_lobsters + 1)])
+    return table
+
+
+def write_sensor_log(df: pd.DataFrame, path: Path) -> Path:
+    """Write a log in the same layout as the IoT export (BOM, '%d %B %Y %H:%M:%S' times)"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    output = df.copy()
+    output['Time'] = pd.to_datetime(output['Time']).dt.strftime(SENSOR_TIME_FORMAT)
+    output.to_csv(path, index=False, encoding='utf-8-sig')
+    return path
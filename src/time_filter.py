@@ -3,45 +3,32 @@ import pandas as pd
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 import os
-import ast  # Untuk evaluasi literal yang aman
-
-def closest_time(same_date, target_time):
-    same_date = same_date.copy()
-    same_date['TimeDiff'] = same_date['Time'].apply(lambda x: abs((x - target_time).total_seconds()))
-
-    exact_hour = same_date[same_date['Time'].dt.hour == target_time.hour]
-    if not exact_hour.empty:
-        closest_idx = exact_hour['TimeDiff'].idxmin()
-        return exact_hour['TimeDiff'].min(), closest_idx
-    else:
-        closest_idx = same_date['TimeDiff'].idxmin()
-        return same_date['TimeDiff'].min(), closest_idx
-
-def filter_data_by_time(data, *hours):
-    results = []
-    for current_date in data['Time'].dt.date.unique():
-        same_date = data[data['Time'].dt.date == current_date]
-        for hour in hours:
-            target_time = pd.to_datetime(f'{current_date} {hour}')
-            if not same_date.empty:
-                min_diff, idx = closest_time(same_date, target_time)
-                if min_diff <= 7200:
-                    results.append(same_date.loc[idx])
-                else:
-                    results.append({
-                        'Temperature': '-',
-                        'pH': '-',
-                        'Time': target_time,
-                    })
-            else:
-                results.append({
-                    'Temperature': '-',
-                    'pH': '-',
-                    'Time': target_time,
-                })
-
-    result_df = pd.DataFrame(results)
-    return result_df
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from batch_mamdani import BatchMamdani
+from batch_mamdani import BatchResult
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import FEED_POSITIONS
+from batch_mamdani import PH_MEMBERSHIP_PARAMS
+from batch_mamdani import RULE_DEFINITIONS
+from batch_mamdani import TEMPERATUR_MEMBERSHIP_PARAMS
+from batch_mamdani import calculate_feed_bounds
+from DataImputation import gap_imputation
+from pond_registry import PondRegistry
+from rule_cache import RuleBaseCache
+from rule_cache import rule_base_key
+from TimeFilter import select_closest_readings
+from metrics import metrics
+from trace_store import ResultTable
+from trace_store import TRACE_SUFFIXES
+from trace_store import build_trace_metadata
+from trace_store import trace_columns
+from trace_store import default_trace_path
+from trace_store import save_trace
+from weekly_index import WeeklyIndex
+
+rule_base_cache = RuleBaseCache(maxsize=16)
 
 def load_data(weight_file, excel_file):
     try:
@@ -50,13 +37,17 @@ def load_data(weight_file, excel_file):
 
         data['Time'] = pd.to_datetime(data['Time'])
 
-        time_filtered = filter_data_by_time(data, '08:00', '18:00')
+        # Satu pencarian tervektorisasi untuk semua (tanggal, jam); slot kosong menjadi NaN
+        time_filtered, _ = select_closest_readings(data, ['08:00', '18:00'], 7200)  # 2 hours threshold
 
         # Membuat direktori output jika belum ada
         if not os.path.exists('output'):
             os.makedirs('output')
 
         time_filtered.to_csv('output/data_terfilter.csv', index=False)
+
+        # Slot kosong diisi sesuai panjang celahnya; celah yang terlalu panjang tetap kosong
+        time_filtered = gap_imputation(time_filtered)
         # print("Data yang telah difilter disimpan ke 'output/data_terfilter.csv'.")
 
         # print(f"Data berhasil dimuat dan difilter dari {weight_file} dan {excel_file}.")
@@ -69,10 +60,6 @@ def create_antecedent(range_vals, label):
     universe = np.arange(range_vals[0], range_vals[1], range_vals[2])
     return ctrl.Antecedent(universe, label)
 
-def create_consequent(lower_bound, upper_bound, step_size, label):
-    universe = np.arange(lower_bound, upper_bound, step_size)
-    return ctrl.Consequent(universe, label)
-
 def create_fuzzy_sets(fuzzy_var, membership_params):
     for var, params in membership_params:
         if len(params) == 3:
@@ -87,97 +74,39 @@ def create_fuzzy_sets(fuzzy_var, membership_params):
     return fuzzy_var
 
 def define_membership_functions(temperatur, ph):
-    temperatur_membership_params = [
-        ('rendah', [14, 14, 23, 25]),
-        ('normal', [23, 25, 29, 31]),
-        ('tinggi', [29, 31, 40, 40])
-    ]
-    temperatur = create_fuzzy_sets(temperatur, temperatur_membership_params)
-
-    ph_membership_params = [
-        ('asam', [0, 0, 5, 6.5]),
-        ('netral', [5, 6.5, 7.5, 9]),
-        ('basa', [7.5, 9, 14, 14])
-    ]
-    ph = create_fuzzy_sets(ph, ph_membership_params)
+    temperatur = create_fuzzy_sets(temperatur, TEMPERATUR_MEMBERSHIP_PARAMS)
+    ph = create_fuzzy_sets(ph, PH_MEMBERSHIP_PARAMS)
 
     # print("Fungsi keanggotaan untuk temperatur dan pH telah diperbarui.")
     return temperatur, ph
 
 def define_feed_membership_functions(feed_amount, min_feed, max_feed):
-    selisih = max_feed - min_feed
-    step = selisih / 8
-
-    sedikit_bawah = min_feed
-    sedikit_tengah = sedikit_bawah + step * 2
-    sedikit_atas = sedikit_tengah + step
-
-    sedang_bawah = sedikit_tengah
-    sedang_tengah1 = sedang_bawah + step
-    sedang_tengah2 = sedang_tengah1 + step * 2
-    sedang_atas = sedang_tengah2 + step
-
-    banyak_bawah = sedang_tengah2
-    banyak_tengah = banyak_bawah + step * 2
-    banyak_atas = banyak_tengah + step
-
+    # Himpunan takaran dari FEED_POSITIONS (satuan step) yang diskalakan ke batas pakan minggu ini
+    step = (max_feed - min_feed) / FEED_DIVISIONS
     membership_params = [
-        ('sedikit', [float(sedikit_bawah), float(sedikit_bawah), float(sedikit_tengah), float(sedikit_atas)]),
-        ('sedang', [float(sedang_bawah), float(sedang_tengah1), float(sedang_tengah2), float(sedang_atas)]),
-        ('banyak', [float(banyak_bawah), float(banyak_tengah), float(banyak_atas), float(banyak_atas)])
+        (label, [float(min_feed + pos * step) for pos in positions])
+        for label, positions in FEED_POSITIONS.items()
     ]
 
     feed_amount = create_fuzzy_sets(feed_amount, membership_params)
     return feed_amount, membership_params
 
 def define_rules(temperatur, ph, feed_amount):
+    # Sistem kontrol hanya berubah jika batas pakan mingguan berubah, jadi
+    # dibangun sekali per minggu dan dipakai ulang dari cache
+    key = rule_base_key(feed_amount, RULE_DEFINITIONS, temperatur, ph)
+    return rule_base_cache.get_or_build(key, lambda: build_rules(temperatur, ph, feed_amount))
+
+def build_rules(temperatur, ph, feed_amount):
+    # Aturan dibangun dari RULE_DEFINITIONS (batch_mamdani), satu sumber untuk semua jalur inferensi
     rules_list = []
     rules_dict = {}
 
-    rule1 = ctrl.Rule(temperatur['normal'] & ph['asam'], feed_amount['sedang'], label='Rule 1')
-    rule1.terms = {'temperatur': 'normal', 'ph': 'asam'}
-    rules_list.append(rule1)
-    rules_dict['Rule 1'] = 'sedang'
-
-    rule2 = ctrl.Rule(temperatur['normal'] & ph['netral'], feed_amount['banyak'], label='Rule 2')
-    rule2.terms = {'temperatur': 'normal', 'ph': 'netral'}
-    rules_list.append(rule2)
-    rules_dict['Rule 2'] = 'banyak'
-
-    rule3 = ctrl.Rule(temperatur['normal'] & ph['basa'], feed_amount['sedang'], label='Rule 3')
-    rule3.terms = {'temperatur': 'normal', 'ph': 'basa'}
-    rules_list.append(rule3)
-    rules_dict['Rule 3'] = 'sedang'
-
-    rule4 = ctrl.Rule(temperatur['rendah'] & ph['asam'], feed_amount['sedikit'], label='Rule 4')
-    rule4.terms = {'temperatur': 'rendah', 'ph': 'asam'}
-    rules_list.append(rule4)
-    rules_dict['Rule 4'] = 'sedikit'
-
-    rule5 = ctrl.Rule(temperatur['rendah'] & ph['netral'], feed_amount['sedang'], label='Rule 5')
-    rule5.terms = {'temperatur': 'rendah', 'ph': 'netral'}
-    rules_list.append(rule5)
-    rules_dict['Rule 5'] = 'sedang'
-
-    rule6 = ctrl.Rule(temperatur['rendah'] & ph['basa'], feed_amount['sedikit'], label='Rule 6')
-    rule6.terms = {'temperatur': 'rendah', 'ph': 'basa'}
-    rules_list.append(rule6)
-    rules_dict['Rule 6'] = 'sedikit'
-
-    rule7 = ctrl.Rule(temperatur['tinggi'] & ph['asam'], feed_amount['sedikit'], label='Rule 7')
-    rule7.terms = {'temperatur': 'tinggi', 'ph': 'asam'}
-    rules_list.append(rule7)
-    rules_dict['Rule 7'] = 'sedikit'
-
-    rule8 = ctrl.Rule(temperatur['tinggi'] & ph['netral'], feed_amount['sedang'], label='Rule 8')
-    rule8.terms = {'temperatur': 'tinggi', 'ph': 'netral'}
-    rules_list.append(rule8)
-    rules_dict['Rule 8'] = 'sedang'
-
-    rule9 = ctrl.Rule(temperatur['tinggi'] & ph['basa'], feed_amount['sedikit'], label='Rule 9')
-    rule9.terms = {'temperatur': 'tinggi', 'ph': 'basa'}
-    rules_list.append(rule9)
-    rules_dict['Rule 9'] = 'sedikit'
+    for i, (temp, ph_term, feed) in enumerate(RULE_DEFINITIONS, 1):
+        rule = ctrl.Rule(temperatur[temp] & ph[ph_term], feed_amount[feed], label=f'Rule {i}')
+        rule.terms = {'temperatur': temp, 'ph': ph_term}
+        rules_list.append(rule)
+        rules_dict[f'Rule {i}'] = feed
 
     control_system = ctrl.ControlSystem(rules_list)
     simulation = ctrl.ControlSystemSimulation(control_system)
@@ -185,225 +114,163 @@ def define_rules(temperatur, ph, feed_amount):
     # print("Aturan fuzzy telah didefinisikan dan sistem kontrol telah dibuat.")
     return simulation, rules_list, rules_dict
 
-def calculate_feed_bounds(weight, multiplier_min=0.03, multiplier_max=0.05):
-    min_feed = weight * multiplier_min
-    max_feed = weight * multiplier_max
-    return min_feed, max_feed
-
-def calculate_area_and_moment(universe, aggregated_mf, a_values):
-    # Fungsi ini tidak lagi digunakan seperti sebelumnya
-    # Karena kita akan menggunakan alpha-cut berdasarkan alpha_predikat
-    pass
-
-def defuzzify(areas, moments):
-    total_area = sum(areas)
-    total_moment = sum(moments)
-    if total_area != 0:
-        z = total_moment / total_area
-    else:
-        z = 0
-    return z
-
-def alpha_cut_intervals(universe, mf, alpha):
-    # Mencari interval dari universe di mana mf >= alpha
-    # Kemudian mengembalikan min dan max dari interval tersebut
-    idx = np.where(mf >= alpha)[0]
-    if len(idx) == 0:
-        return []
-    else:
-        # Kita asumsikan mungkin ada lebih dari satu interval.
-        # Untuk sederhana, kita gabung semua indeks yang berdekatan menjadi interval tunggal.
-        intervals = []
-        start = idx[0]
-        for i in range(1, len(idx)):
-            if idx[i] != idx[i-1] + 1:
-                # Terputus, interval selesai
-                end = idx[i-1]
-                intervals.append((universe[start], universe[end]))
-                start = idx[i]
-        # Interval terakhir
-        end = idx[-1]
-        intervals.append((universe[start], universe[end]))
-        return intervals
-
-def centroid_defuzzification(universe, mf):
-    # Defuzzifikasi centroid sederhana untuk seluruh aggregated_mf
-    numerator = np.sum(universe * mf)
-    denominator = np.sum(mf)
-    if denominator != 0:
-        z = numerator / denominator
-    else:
-        z = 0
-    return float(z)
-
-def process_data(weekly_weights, time_filtered, temperatur, ph):
+def empty_result(time, temp, ph_value):
+    return {
+        'Time': time,
+        'Temperatur': temp,
+        'pH': ph_value,
+        'feed_amount': '-',
+        'Temperatur_Membership_Params': '-',
+        'PH_Membership_Params': '-',
+        'Temperatur_Memberships': '-',
+        'PH_Memberships': '-',
+        'Takaran_Membership_Params': '-',
+        'Takaran_Memberships': '-',
+        'Alpha_Predikats': '-',
+        'a_values': '-'
+    }
+
+def round_values(values, decimals):
+    # np.round mengalikan dengan 10**decimals sehingga kasus hampir-setengah bisa berbeda dari round();
+    # elemen itu saja yang dibulatkan ulang dengan round() agar hasilnya sama dengan hasil dict
+    values = np.asarray(values, dtype=float)
+    rounded = np.round(values, decimals)
+    scaled = values * 10.0 ** decimals
+    near_tie = np.abs(np.abs(scaled - np.trunc(scaled)) - 0.5) < 1e-6
+    if near_tie.any():
+        rounded[near_tie] = [round(float(v), decimals) for v in values[near_tie]]
+    return rounded
+
+@dataclass
+class InferenceArrays:
+    """Per-row arrays of one process_data call, shared by the dict and the table output"""
+    times: pd.Series
+    temps: np.ndarray
+    ph_values: np.ndarray
+    index: WeeklyIndex
+    week_indices: np.ndarray
+    min_feeds: np.ndarray
+    max_feeds: np.ndarray
+    engine: BatchMamdani
+    batch: BatchResult
+    fired_activations: np.ndarray
+    alpha_levels: np.ndarray
+    cut_starts: np.ndarray
+    cut_ends: np.ndarray
+
+def infer_arrays(weekly_weights, time_filtered, temperatur=None, ph=None, start_date=None, engine=None, model=None):
+    times = pd.to_datetime(time_filtered['Time'])
+    # start_date diberikan saat data diproses per chunk agar indeks minggu tetap konsisten
+    start_date = times.iloc[0] if start_date is None else pd.to_datetime(start_date)
+
+    # Indeks minggu dan batas pakan untuk semua baris dari WeeklyIndex (satu searchsorted).
+    # weekly_weights boleh berupa tabel bobot atau WeeklyIndex yang sudah dibangun (pipeline, registry);
+    # model (PondModel) opsional: himpunan, aturan dan pengali pakan kolam dari registry
+    index = weekly_weights if isinstance(weekly_weights, WeeklyIndex) else WeeklyIndex.for_model(weekly_weights, model)
+    week_indices, _, min_feeds, max_feeds = index.lookup(times, start_date)
+
+    temps = pd.to_numeric(time_filtered['Temperature'], errors='coerce').to_numpy(dtype=float)
+    ph_values = pd.to_numeric(time_filtered['pH'], errors='coerce').to_numpy(dtype=float)
+
+    # Fuzzifikasi, inferensi dan defuzzifikasi untuk seluruh data dalam satu panggilan.
+    # engine opsional: engine yang sudah dibangun (mis. dari registry kolam, atau MemoizedMamdani
+    # yang mengambil pasangan bacaan yang sudah pernah dihitung dari cache)
+    if engine is None:
+        engine = model.compile() if model is not None else BatchMamdani(temperatur, ph)
+    with metrics.timer('inference', records=len(temps)):
+        batch = engine.infer(temps, ph_values, min_feeds, max_feeds)
+
+    # Alpha level unik per baris (dari yang terbesar, NaN di akhir) dan interval alpha-cut eksak
+    # untuk semua baris sekaligus, langsung dari titik patah himpunan takaran
+    fired_activations = np.where(np.round(batch.activations, 4) > 0, batch.activations, np.nan)
+    alpha_levels = -np.sort(-fired_activations, axis=1)
+    alpha_levels[:, 1:][alpha_levels[:, 1:] == alpha_levels[:, :-1]] = np.nan
+    alpha_levels = -np.sort(-alpha_levels, axis=1)
+    cut_starts, cut_ends = engine.alpha_cuts(batch.term_activations, alpha_levels)
+
+    if metrics.enabled:
+        valid = ~(np.isnan(temps) | np.isnan(ph_values))
+        rules_fired = (~np.isnan(fired_activations)).sum(axis=1)[valid]
+        metrics.incr('process_data.records', len(temps))
+        metrics.incr('process_data.invalid', int((~valid).sum()))
+        metrics.incr('process_data.no_rule_fired', int((rules_fired == 0).sum()))
+        metrics.observe_many('inference.rules_fired', rules_fired)
+
+    return InferenceArrays(times, temps, ph_values, index, week_indices, min_feeds, max_feeds, engine, batch,
+                           fired_activations, alpha_levels, cut_starts, cut_ends)
+
+@metrics.timed('process_data')
+def process_data(weekly_weights, time_filtered, temperatur=None, ph=None, start_date=None, engine=None, model=None):
     results = []
-    start_date = pd.to_datetime(time_filtered['Time'].iloc[0])
-
-    for index, row in time_filtered.iterrows():
-        current_date = pd.to_datetime(row['Time'])
-        week_index = (current_date - start_date).days // 7
-        week_index = min(week_index, len(weekly_weights.columns) - 2)
-
-        temp = row['Temperature']
-        ph_value = row['pH']
-
-        if temp == '-' or ph_value == '-':
-            results.append({
-                'Time': row['Time'],
-                'Temperatur': temp,
-                'pH': ph_value,
-                'feed_amount': '-',
-                'Temperatur_Membership_Params': '-',
-                'PH_Membership_Params': '-',
-                'Temperatur_Memberships': '-',
-                'PH_Memberships': '-',
-                'Takaran_Membership_Params': '-',
-                'Takaran_Memberships': '-',
-                'Alpha_Predikats': '-',
-                'a_values': '-'
-            })
+    arrays = infer_arrays(weekly_weights, time_filtered, temperatur, ph, start_date, engine, model)
+    temps, ph_values, engine, batch = arrays.temps, arrays.ph_values, arrays.engine, arrays.batch
+    week_indices, min_feeds, max_feeds = arrays.week_indices, arrays.min_feeds, arrays.max_feeds
+    alpha_levels, cut_starts, cut_ends = arrays.alpha_levels, arrays.cut_starts, arrays.cut_ends
+    temperatur, ph = engine.temperatur, engine.ph
+    # Parameter himpunan takaran per minggu dibangun sekali per indeks (per baris jika bobot diinterpolasi)
+    index = arrays.index
+    feed_sets = None if index.interpolate else index.feed_sets(engine.feed_terms, engine.feed_positions)
+
+    temperatur_membership_params = {
+        term: [round(float(v), 2) for v in temperatur.terms[term].params]
+        for term in temperatur.terms
+    }
+    ph_membership_params = {
+        term: [round(float(v), 2) for v in ph.terms[term].params]
+        for term in ph.terms
+    }
+
+    for i, (time, temp, ph_value) in enumerate(zip(time_filtered['Time'], time_filtered['Temperature'], time_filtered['pH'])):
+        if np.isnan(temps[i]) or np.isnan(ph_values[i]):
+            results.append(empty_result(time, temp, ph_value))
             continue
 
-        try:
-            temp_val = float(temp)
-            ph_val = float(ph_value)
-        except ValueError:
-            results.append({
-                'Time': row['Time'],
-                'Temperatur': temp,
-                'pH': ph_value,
-                'feed_amount': '-',
-                'Temperatur_Membership_Params': '-',
-                'PH_Membership_Params': '-',
-                'Temperatur_Memberships': '-',
-                'PH_Memberships': '-',
-                'Takaran_Membership_Params': '-',
-                'Takaran_Memberships': '-',
-                'Alpha_Predikats': '-',
-                'a_values': '-'
-            })
-            continue
+        step = (max_feeds[i] - min_feeds[i]) / FEED_DIVISIONS
+        if feed_sets is not None:
+            feed_membership_params_dict = feed_sets[week_indices[i]]
+        else:
+            feed_membership_params_dict = {
+                term: [round(float(min_feeds[i] + pos * step), 4) for pos in positions]
+                for term, positions in zip(engine.feed_terms, engine.feed_positions)
+            }
 
-        print(f"Processing data for {current_date} (Week {week_index + 1})")
-
-        current_week_weight = weekly_weights.iloc[:, week_index + 1].sum()
-        current_min_feed, current_max_feed = calculate_feed_bounds(current_week_weight)
-
-        # print(f"Current Week Weight: {current_week_weight}g, Min Feed: {current_min_feed}g, Max Feed: {current_max_feed}g")
-
-        feed_amount = create_consequent(current_min_feed, current_max_feed, 0.001, 'Takaran')
-        feed_amount, feed_membership_params = define_feed_membership_functions(feed_amount, current_min_feed, current_max_feed)
-
-        feed_membership_params_dict = {k: [float(vv) for vv in v] for k, v in feed_membership_params}
-
-        simulation, rules_list, rules_dict = define_rules(temperatur, ph, feed_amount)
-
-        # Hitung derajat keanggotaan
-        temp_memberships = {}
-        for label in temperatur.terms:
-            membership_value = fuzz.interp_membership(temperatur.universe, temperatur[label].mf, temp_val)
-            temp_memberships[label] = round(float(membership_value), 4)
-        ph_memberships = {}
-        for label in ph.terms:
-            membership_value = fuzz.interp_membership(ph.universe, ph[label].mf, ph_val)
-            ph_memberships[label] = round(float(membership_value), 4)
-
-        temperatur_membership_params = {
-            term: [round(float(v), 2) for v in temperatur.terms[term].params]
-            for term in temperatur.terms
-        }
-        ph_membership_params = {
-            term: [round(float(v), 2) for v in ph.terms[term].params]
-            for term in ph.terms
-        }
-
-        try:
-            activated_rules = []
-            aggregated_output = np.zeros_like(feed_amount.universe)
-            for rule in rules_list:
-                temp_term = rule.terms['temperatur']
-                ph_term = rule.terms['ph']
-                temp_degree = temp_memberships[temp_term]
-                ph_degree = ph_memberships[ph_term]
-                activation = min(temp_degree, ph_degree)
-                if activation > 0:
-                    rule_label = rule.label
-                    consequent_label = rules_dict[rule_label]
-                    output_mf = feed_amount[consequent_label].mf
-                    clipped_mf = np.fmin(activation, output_mf)
-                    aggregated_output = np.fmax(aggregated_output, clipped_mf)
-                    activated_rules.append({
-                        'Rule': rule_label,
-                        'Activation': activation,
-                        'Temp Degree': temp_degree,
-                        'PH Degree': ph_degree,
-                        'Consequent': consequent_label
-                    })
+        temp_memberships = {term: round(float(v), 4) for term, v in zip(engine.temp_terms, batch.temp_degrees[i])}
+        ph_memberships = {term: round(float(v), 4) for term, v in zip(engine.ph_terms, batch.ph_degrees[i])}
 
-            if not activated_rules:
-                print(f"Tidak ada aturan yang teraktivasi untuk data pada {current_date}.")
-                feed = '-'
-                feed_memberships_output = '-'
-                alpha_predikats = '-'
-                a_values_output = '-'
-            else:
-                # Defuzzifikasi centroid
-                feed = centroid_defuzzification(feed_amount.universe, aggregated_output)
-
-                # Hitung membership feed untuk nilai defuzzifikasi
-                feed_memberships_output = {}
-                for label in feed_amount.terms:
-                    membership_value = fuzz.interp_membership(feed_amount.universe, feed_amount[label].mf, feed)
-                    feed_memberships_output[label] = round(float(membership_value), 4)
-
-                # Alpha_Predikats
-                alpha_predikats = {r['Rule']: round(float(r['Activation']), 4) for r in activated_rules}
-
-                # a_values: Sesuai contoh, kita ingin a_values berisi alpha cuts.
-                # Kita akan membentuk alpha-cut intervals untuk setiap alpha level dari aturan teraktivasi.
-                # Jika ada beberapa aturan, kita akan membuat satu list of dict:
-                # Setiap dict: {'alpha_level': activation, 'a_values': [min_val, max_val, ...]}.
-                # Jika ada beberapa interval, kita bisa simpan semua, tetapi contoh hanya menunjukkan satu pasang interval.
-                # Kita lakukan iterasi untuk setiap alpha level unik.
-
-                a_values_output = []
-                # Ambil alpha unique dan urutkan descending agar yang terbesar dulu
-                unique_alphas = sorted({ar['Activation'] for ar in activated_rules}, reverse=True)
-                for alpha in unique_alphas:
-                    intervals = alpha_cut_intervals(feed_amount.universe, aggregated_output, alpha)
-                    # intervals bisa lebih dari satu, untuk contoh kita ambil semua:
-                    # Format output: {'alpha_level': alpha, 'a_values': [x_start, x_end]...}
-                    # Kita flatten jika ada multiple intervals
-                    interval_values = []
-                    for (start_val, end_val) in intervals:
-                        interval_values.extend([round(float(start_val), 2), round(float(end_val), 2)])
-                    if interval_values:
-                        a_values_output.append({
-                            'alpha_level': round(float(alpha), 3),
-                            'a_values': interval_values
-                        })
-
-                feed = round(float(feed), 4)
-
-        except Exception as e:
-            print(f"Terjadi kesalahan saat komputasi pada data {current_date}: {e}")
+        fired = np.flatnonzero(np.round(batch.activations[i], 4) > 0)
+        if len(fired) == 0:
             feed = '-'
             feed_memberships_output = '-'
-            activated_rules = []
-            aggregated_output = None
-            a_values_output = '-'
             alpha_predikats = '-'
-
-        temp_memberships = {k: round(float(v), 4) for k, v in temp_memberships.items()}
-        ph_memberships = {k: round(float(v), 4) for k, v in ph_memberships.items()}
-        feed_memberships_output = {k: round(float(v), 4) for k, v in feed_memberships_output.items()} if feed_memberships_output != '-' else '-'
-        feed_membership_params_dict = {k: [round(float(vv), 4) for vv in v] for k, v in feed_membership_params_dict.items()}
+            a_values_output = '-'
+        else:
+            feed = round(float(batch.feed[i]), 4)
+            feed_memberships_output = {
+                term: round(float(v), 4) for term, v in zip(engine.feed_terms, batch.feed_degrees[i])
+            }
+            alpha_predikats = {engine.rule_labels[r]: round(float(batch.activations[i, r]), 4) for r in fired}
+
+            # a_values: interval alpha-cut untuk setiap alpha level unik, dari yang terbesar
+            a_values_output = []
+            for level, alpha in enumerate(alpha_levels[i]):
+                if np.isnan(alpha):
+                    break
+                interval_values = []
+                for start_val, end_val in zip(cut_starts[i, level], cut_ends[i, level]):
+                    if np.isnan(start_val):
+                        break
+                    interval_values.extend([round(float(min_feeds[i] + start_val * step), 2),
+                                            round(float(min_feeds[i] + end_val * step), 2)])
+                if interval_values:
+                    a_values_output.append({
+                        'alpha_level': round(float(alpha), 3),
+                        'a_values': interval_values
+                    })
 
         results.append({
-            'Time': row['Time'],
-            'Temperatur': round(float(temp_val), 2) if temp_val != '-' else '-',
-            'pH': round(float(ph_val), 2) if ph_val != '-' else '-',
+            'Time': time,
+            'Temperatur': round(float(temps[i]), 2),
+            'pH': round(float(ph_values[i]), 2),
             'feed_amount': feed,
             'Temperatur_Membership_Params': temperatur_membership_params,
             'PH_Membership_Params': ph_membership_params,
@@ -417,7 +284,170 @@ def process_data(weekly_weights, time_filtered, temperatur, ph):
 
     return results
 
-def save_results_to_csv(results, output_file_recommendations, output_file_inferensi):
+def engine_trace_metadata(engine):
+    """Metadata trace (params keanggotaan, posisi takaran, rule) dari engine inferensi"""
+    temperatur, ph = engine.temperatur, engine.ph
+    return build_trace_metadata(
+        {term: [round(float(v), 2) for v in temperatur.terms[term].params] for term in temperatur.terms},
+        {term: [round(float(v), 2) for v in ph.terms[term].params] for term in ph.terms},
+        {term: positions.tolist() for term, positions in zip(engine.feed_terms, engine.feed_positions)},
+        engine.rule_definitions)
+
+@metrics.timed('process_data')
+def process_data_table(weekly_weights, time_filtered, temperatur=None, ph=None, start_date=None, engine=None, model=None):
+    # Sama seperti process_data, tetapi hasilnya ditulis langsung ke kolom NumPy (layout trace_columns)
+    # tanpa dict per baris; nilai kosong menjadi NaN, bukan '-'. DataFrame dibangun sekali di akhir.
+    arrays = infer_arrays(weekly_weights, time_filtered, temperatur, ph, start_date, engine, model)
+    engine, batch = arrays.engine, arrays.batch
+    metadata = engine_trace_metadata(engine)
+
+    valid = ~(np.isnan(arrays.temps) | np.isnan(arrays.ph_values))
+    fired = ~np.isnan(arrays.fired_activations)
+    any_fired = valid & fired.any(axis=1)
+    step = (arrays.max_feeds - arrays.min_feeds) / FEED_DIVISIONS
+
+    columns = {
+        'Time': arrays.times.to_numpy().astype('datetime64[ns]'),
+        'Temperatur': round_values(arrays.temps, 2).astype(np.float32),
+        'pH': round_values(arrays.ph_values, 2).astype(np.float32),
+        'feed_amount': np.where(any_fired, round_values(batch.feed, 4), np.nan),
+        'min_feed': np.where(valid, round_values(arrays.min_feeds + engine.feed_positions[0, 0] * step, 4), np.nan),
+        'max_feed': np.where(valid, round_values(arrays.min_feeds + engine.feed_positions[-1, -1] * step, 4), np.nan)
+    }
+    rounded_activations = np.where(fired, round_values(batch.activations, 4), 0.0)
+    blocks = (
+        np.where(valid[:, None], round_values(batch.temp_degrees, 4), np.nan),
+        np.where(valid[:, None], round_values(batch.ph_degrees, 4), np.nan),
+        np.where(any_fired[:, None], round_values(batch.feed_degrees, 4), np.nan),
+        np.where(valid[:, None], rounded_activations, np.nan)
+    )
+    names = trace_columns(metadata)
+    for block in blocks:
+        for j in range(block.shape[1]):
+            columns[names[len(columns)]] = block[:, j].astype(np.float32)
+
+    # Interval alpha-cut dalam gram untuk semua baris sekaligus; hanya daftar per baris yang tersisa di Python
+    starts = round_values(arrays.min_feeds[:, None, None] + arrays.cut_starts * step[:, None, None], 2)
+    ends = round_values(arrays.min_feeds[:, None, None] + arrays.cut_ends * step[:, None, None], 2)
+    levels = round_values(arrays.alpha_levels, 3)
+    has_cut = ~np.isnan(levels) & ~np.isnan(starts[:, :, 0])
+    rows = np.flatnonzero(any_fired & has_cut.any(axis=1))
+    # Level dan interval terurut dengan NaN di akhir: kolom yang kosong di semua baris dibuang sebelum tolist()
+    n_levels = int(has_cut[rows].sum(axis=1).max()) if len(rows) else 0
+    n_cuts = int((~np.isnan(starts[rows, :n_levels])).sum(axis=2).max()) if len(rows) else 0
+    levels, has_cut = levels[:, :n_levels], has_cut[:, :n_levels]
+    starts, ends = starts[rows, :n_levels, :n_cuts], ends[rows, :n_levels, :n_cuts]
+    pairs = np.stack([starts, ends], axis=-1).reshape(len(rows), n_levels, -1).tolist()
+    n_values = (2 * (~np.isnan(starts)).sum(axis=2)).tolist()
+    alpha_levels = [[] for _ in range(len(valid))]
+    a_values = [[] for _ in range(len(valid))]
+    for i, row_levels, row_cut, row_pairs, row_n in zip(rows, levels[rows].tolist(), has_cut[rows].tolist(),
+                                                        pairs, n_values):
+        alpha_levels[i] = [level for level, cut in zip(row_levels, row_cut) if cut]
+        a_values[i] = [values[:n] for values, n, cut in zip(row_pairs, row_n, row_cut) if cut]
+    columns['alpha_levels'] = alpha_levels
+    columns['a_values'] = a_values
+    return ResultTable(pd.DataFrame(columns, columns=names), metadata)
+
+def process_data_by_pond(registry, time_filtered, weekly_weights=None, pond_column='Pond', start_date=None):
+    # Baris dikelompokkan per kolam dan diproses dengan engine model kolam itu dari registry
+    # (dikompilasi sekali); indeks bobot mingguan per kolam dari registry jika weekly_weights tidak diberikan
+    weekly_weights = dict(weekly_weights or {})
+    # dropna=False: baris tanpa ID kolam tidak dibuang, tetapi memakai model default (pond None)
+    groups = time_filtered.groupby(pond_column, sort=False, dropna=False) if pond_column in time_filtered.columns \
+        else [(None, time_filtered)]
+
+    results = {}
+    for pond, rows in groups:
+        pond = None if pd.isna(pond) else pond
+        index = registry.weekly_index(pond, weekly_weights.get(pond))
+        with metrics.timer('process_data.pond', pond=pond, records=len(rows)):
+            results[pond] = process_data_table(index, rows.reset_index(drop=True),
+                                               start_date=start_date, engine=registry.engine(pond),
+                                               model=registry.model(pond))
+    return results
+
+def process_raw_readings(weekly_weights, data, surface, start_date=None):
+    # Rekomendasi pakan untuk setiap bacaan mentah memakai ControlSurface (lookup bilinear)
+    times = pd.to_datetime(data['Time'])
+    index = weekly_weights if isinstance(weekly_weights, WeeklyIndex) else WeeklyIndex(weekly_weights)
+    min_feeds, max_feeds = index.feed_bounds(times, start_date)
+
+    temps = pd.to_numeric(data['Temperature'], errors='coerce').to_numpy(dtype=float)
+    ph_values = pd.to_numeric(data['pH'], errors='coerce').to_numpy(dtype=float)
+    return pd.DataFrame({
+        'Time': times,
+        'Temperatur': temps,
+        'pH': ph_values,
+        'feed_amount': surface.infer(temps, ph_values, min_feeds, max_feeds)
+    })
+
+def process_data_stream(weekly_weights, frames, temperatur, ph, engine=None):
+    # Proses aliran frame hasil filter/imputasi; minggu dihitung dari frame pertama
+    start_date = None
+    for frame in frames:
+        if frame.empty:
+            continue
+        if start_date is None:
+            start_date = pd.to_datetime(frame['Time'].iloc[0])
+        yield process_data_table(weekly_weights, frame, temperatur, ph, start_date=start_date, engine=engine)
+
+# Antecedent per proses worker, dibuat sekali oleh init_worker
+worker_antecedents = None
+
+def init_worker(temperatur_range, ph_range):
+    global worker_antecedents
+    temperatur = create_antecedent(temperatur_range, 'Temperatur')
+    ph = create_antecedent(ph_range, 'pH')
+    worker_antecedents = define_membership_functions(temperatur, ph)
+
+def process_shard(weekly_weights, shard, start_date):
+    temperatur, ph = worker_antecedents
+    return process_data_table(weekly_weights, shard, temperatur, ph, start_date=start_date)
+
+def shard_data(time_filtered, shard_by='week'):
+    # 'week': setiap shard punya batas pakan tetap; nama kolom lain (mis. 'Pond') membagi per kolam/sensor
+    if shard_by == 'week':
+        times = pd.to_datetime(time_filtered['Time'])
+        keys = (times - times.iloc[0]).dt.days // 7
+    elif shard_by in time_filtered.columns:
+        keys = time_filtered[shard_by]
+    else:
+        raise ValueError(f"Kolom shard '{shard_by}' tidak ditemukan")
+    return [shard for _, shard in time_filtered.groupby(keys, sort=True)]
+
+def process_data_parallel(weekly_weights, time_filtered, temperatur_range, ph_range,
+                          shard_by='week', max_workers=None):
+    # Shard dijalankan di ProcessPoolExecutor; hasil disusun kembali sesuai urutan baris (waktu)
+    time_filtered = time_filtered.reset_index(drop=True)
+    start_date = pd.to_datetime(time_filtered['Time'].iloc[0])
+    shards = shard_data(time_filtered, shard_by)
+    # Indeks bobot mingguan dibangun sekali dan dikirim ke setiap worker
+    weekly_weights = weekly_weights if isinstance(weekly_weights, WeeklyIndex) else WeeklyIndex(weekly_weights)
+
+    with ProcessPoolExecutor(max_workers=max_workers, initializer=init_worker,
+                             initargs=(temperatur_range, ph_range)) as executor:
+        futures = [executor.submit(process_shard, weekly_weights, shard, start_date) for shard in shards]
+        shard_results = [future.result() for future in futures]
+
+    table = ResultTable.concat(shard_results)
+    order = np.argsort(np.concatenate([shard.index.to_numpy() for shard in shards]), kind='stable')
+    return ResultTable(table.trace.iloc[order].reset_index(drop=True), table.metadata)
+
+@metrics.timed('save')
+def save_results_to_csv(results, output_file_recommendations, output_file_inferensi, append=False):
+    mode, header = ('a', False) if append else ('w', True)
+    trace_output = os.path.splitext(str(output_file_inferensi))[1] in TRACE_SUFFIXES
+
+    # ResultTable (process_data_table): kolom sudah bertipe, tidak perlu DataFrame dari list dict
+    if isinstance(results, ResultTable) and trace_output:
+        results.recommendations().to_csv(output_file_recommendations, mode=mode, header=header, index=False,
+                                         float_format='%.2f')
+        save_trace(results, output_file_inferensi, append=append)
+        return
+    if isinstance(results, ResultTable):
+        results = results.to_results()  # inferensi.csv lama menyimpan dict per sel
+
     df_results = pd.DataFrame(results)
 
     # Mengonversi Time ke format yang diinginkan
@@ -425,19 +455,22 @@ def save_results_to_csv(results, output_file_recommendations, output_file_infere
 
     # Membuat feed_recommendations.csv
     df_feed_recommendations = df_results[['Time', 'Temperatur', 'pH', 'feed_amount']]
-    df_feed_recommendations.to_csv(output_file_recommendations, index=False, float_format='%.2f')
+    df_feed_recommendations.to_csv(output_file_recommendations, mode=mode, header=header, index=False, float_format='%.2f')
     # print(f"Rekomendasi pakan telah disimpan ke {output_file_recommendations}.")
 
-    # Membuat inferensi.csv
+    # Trace inferensi: Parquet/NDJSON bertipe, atau inferensi.csv lama dengan dict per sel
+    if trace_output:
+        save_trace(results, output_file_inferensi, append=append)
+        return
     df_inferensi = df_results.drop(columns=['feed_amount'])
-    df_inferensi.to_csv(output_file_inferensi, index=False)
+    df_inferensi.to_csv(output_file_inferensi, mode=mode, header=header, index=False)
     # print(f"Data inferensi telah disimpan ke '{output_file_inferensi}'.")
 
-def main():
+def main(workers=None, ponds_config=None):
     WEIGHT_FILE = 'berat_lobster_weekly.csv'
     EXCEL_FILE = 'Lobster IoT.xlsx'
     OUTPUT_FILE_RECOMMENDATIONS = 'output/feed_recommendations.csv'
-    OUTPUT_FILE_INFERENSI = 'output/inferensi.csv'
+    OUTPUT_FILE_INFERENSI = default_trace_path('output')
 
     # Membuat direktori output jika belum ada
     if not os.path.exists('output'):
@@ -447,12 +480,28 @@ def main():
 
     temperatur_range = (14, 40, 0.001)
     ph_range = (4, 14, 0.001)
-    temperatur = create_antecedent(temperatur_range, 'Temperatur')
-    ph = create_antecedent(ph_range, 'pH')
 
-    temperatur, ph = define_membership_functions(temperatur, ph)
+    if ponds_config:
+        # Setiap kolam memakai model dan tabel bobotnya sendiri dari registry (kolom 'Pond')
+        registry = PondRegistry.from_config(ponds_config)
+        for pond, pond_results in process_data_by_pond(registry, time_filtered, {None: weekly_weights}).items():
+            pond_dir = os.path.join('output', 'ponds', str(pond)) if pond is not None else 'output'
+            os.makedirs(pond_dir, exist_ok=True)
+            save_results_to_csv(pond_results, os.path.join(pond_dir, 'feed_recommendations.csv'),
+                                default_trace_path(pond_dir))
+        return
+
+    if workers:
+        # Inferensi paralel per minggu di beberapa proses
+        results = process_data_parallel(weekly_weights, time_filtered, temperatur_range, ph_range,
+                                        max_workers=workers)
+    else:
+        temperatur = create_antecedent(temperatur_range, 'Temperatur')
+        ph = create_antecedent(ph_range, 'pH')
+
+        temperatur, ph = define_membership_functions(temperatur, ph)
 
-    results = process_data(weekly_weights, time_filtered, temperatur, ph)
+        results = process_data_table(weekly_weights, time_filtered, temperatur, ph)
 
     # Memanggil fungsi untuk menyimpan hasil
     save_results_to_csv(results, OUTPUT_FILE_RECOMMENDATIONS, OUTPUT_FILE_INFERENSI)
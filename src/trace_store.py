@@ -0,0 +1,358 @@
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict
+from typing import List
+from typing import Tuple
+from typing import Union
+
+import numpy as np
+import pandas as pd
+
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import FEED_POSITIONS
+from batch_mamdani import RULE_DEFINITIONS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Tanpa pyarrow trace ditulis sebagai NDJSON
+    pa = None
+    pq = None
+
+
+TRACE_VERSION = 1
+TRACE_METADATA_KEY = b'web_fuzzy.trace'
+TRACE_SUFFIXES = ('.parquet', '.ndjson', '.jsonl')
+NDJSON_SUFFIXES = ('.ndjson', '.jsonl')
+PARQUET_PART = 'part-{:05d}.parquet'
+
+
+def default_trace_path(output_dir: Union[str, Path], name: str = 'inferensi') -> Path:
+    """Parquet when pyarrow is installed, NDJSON otherwise"""
+    return Path(output_dir) / f"{name}{'.parquet' if pq is not None else '.ndjson'}"
+
+
+def _is_missing(value) -> bool:
+    return isinstance(value, str) and value == '-'
+
+
+def _first_dict(results: List[Dict], key: str) -> Dict:
+    for result in results:
+        if isinstance(result.get(key), dict):
+            return result[key]
+    return {}
+
+
+def build_trace_metadata(temperatur_params: Dict,
+                         ph_params: Dict,
+                         feed_positions: Dict = FEED_POSITIONS,
+                         rules=RULE_DEFINITIONS) -> Dict:
+    """Trace metadata from the membership params (label -> params) of a model"""
+    return {
+        'version': TRACE_VERSION,
+        'temperatur_membership_params': temperatur_params,
+        'ph_membership_params': ph_params,
+        'takaran_positions': dict(feed_positions),
+        'feed_divisions': FEED_DIVISIONS,
+        'rules': [list(rule) for rule in rules],
+        'temperatur_terms': list(temperatur_params) or list(dict.fromkeys(t for t, _, _ in rules)),
+        'ph_terms': list(ph_params) or list(dict.fromkeys(p for _, p, _ in rules)),
+        'takaran_terms': list(feed_positions)
+    }
+
+
+def trace_metadata(results: List[Dict]) -> Dict:
+    """Static part of the trace: membership params, takaran positions, rules and term order"""
+    return build_trace_metadata(_first_dict(results, 'Temperatur_Membership_Params'),
+                                _first_dict(results, 'PH_Membership_Params'))
+
+
+def trace_columns(metadata: Dict) -> List[str]:
+    """Fixed column order of the trace table"""
+    return (
+        ['Time', 'Temperatur', 'pH', 'feed_amount', 'min_feed', 'max_feed']
+        + [f'mu_temperatur_{term}' for term in metadata['temperatur_terms']]
+        + [f'mu_ph_{term}' for term in metadata['ph_terms']]
+        + [f'mu_takaran_{term}' for term in metadata['takaran_terms']]
+        + [f'alpha_rule_{i}' for i in range(1, len(metadata['rules']) + 1)]
+        + ['alpha_levels', 'a_values']
+    )
+
+
+@dataclass
+class ResultTable:
+    """
+    Inference results as one typed table (``trace_columns`` layout) plus its metadata.
+
+    Produced directly from the batch arrays by ``time_filter.process_data_table``;
+    missing values are NaN instead of the '-' of the result dicts.
+    """
+    trace: pd.DataFrame
+    metadata: Dict
+
+    def __len__(self) -> int:
+        return len(self.trace)
+
+    def __iter__(self):
+        """Iterating gives the result dicts, so a table can replace a process_data list"""
+        return iter(self.to_results())
+
+    @classmethod
+    def from_results(cls, results: List[Dict]) -> 'ResultTable':
+        return cls(*results_to_trace(results))
+
+    @classmethod
+    def empty(cls, metadata: Dict) -> 'ResultTable':
+        """Table without rows in the ``trace_columns`` layout of metadata"""
+        names = trace_columns(metadata)
+        dtypes = {'Time': 'datetime64[ns]', 'feed_amount': np.float64, 'min_feed': np.float64,
+                  'max_feed': np.float64, 'alpha_levels': object, 'a_values': object}
+        return cls(pd.DataFrame({name: pd.Series(dtype=dtypes.get(name, np.float32)) for name in names}), metadata)
+
+    @classmethod
+    def concat(cls, tables: List['ResultTable']) -> 'ResultTable':
+        tables = [table for table in tables if len(table)] or tables[:1]
+        return cls(pd.concat([table.trace for table in tables], ignore_index=True), tables[0].metadata)
+
+    def to_results(self) -> List[Dict]:
+        """Per-row result dicts like process_data (see trace_to_results)"""
+        return trace_to_results(self.trace, self.metadata)
+
+    def recommendations(self) -> pd.DataFrame:
+        """Time/Temperatur/pH/feed_amount in the feed_recommendations.csv layout ('-' where no rule fired)"""
+        feed = self.trace['feed_amount']
+        return pd.DataFrame({
+            'Time': self.trace['Time'].dt.strftime('%Y-%m-%d %H:%M'),
+            'Temperatur': self.trace['Temperatur'].astype(np.float64).round(2),
+            'pH': self.trace['pH'].astype(np.float64).round(2),
+            'feed_amount': feed.astype(object).where(feed.notna(), '-')
+        })
+
+
+def results_to_trace(results: List[Dict]) -> Tuple[pd.DataFrame, Dict]:
+    """
+    Convert the per-row result dicts of process_data into a typed trace table.
+
+    Every term degree and rule activation gets its own float32 column; the
+    membership params that are the same for every row are returned once as
+    metadata. The takaran params only depend on the weekly feed bounds, so
+    only ``min_feed``/``max_feed`` are kept per row. Values shown as '-' in
+    the results become NaN (or empty lists for the alpha-cut intervals).
+
+    Args:
+        results (List[Dict]): Output of ``process_data``.
+
+    Returns:
+        Tuple[pd.DataFrame, Dict]: Trace table and its metadata.
+    """
+    metadata = trace_metadata(results)
+    n_rows = len(results)
+    temp_terms, ph_terms = metadata['temperatur_terms'], metadata['ph_terms']
+    feed_terms = metadata['takaran_terms']
+    rule_labels = [f'Rule {i}' for i in range(1, len(metadata['rules']) + 1)]
+
+    temp_mu = np.full((n_rows, len(temp_terms)), np.nan, dtype=np.float32)
+    ph_mu = np.full((n_rows, len(ph_terms)), np.nan, dtype=np.float32)
+    feed_mu = np.full((n_rows, len(feed_terms)), np.nan, dtype=np.float32)
+    alphas = np.zeros((n_rows, len(rule_labels)), dtype=np.float32)
+    bounds = np.full((n_rows, 2), np.nan)
+    alpha_levels, a_values = [], []
+
+    for i, result in enumerate(results):
+        if isinstance(result['Temperatur_Memberships'], dict):
+            temp_mu[i] = [result['Temperatur_Memberships'][term] for term in temp_terms]
+            ph_mu[i] = [result['PH_Memberships'][term] for term in ph_terms]
+        else:
+            alphas[i] = np.nan
+        if isinstance(result['Takaran_Membership_Params'], dict):
+            params = result['Takaran_Membership_Params']
+            bounds[i] = [params[feed_terms[0]][0], params[feed_terms[-1]][-1]]
+        if isinstance(result['Takaran_Memberships'], dict):
+            feed_mu[i] = [result['Takaran_Memberships'][term] for term in feed_terms]
+        if isinstance(result['Alpha_Predikats'], dict):
+            for label, value in result['Alpha_Predikats'].items():
+                alphas[i, rule_labels.index(label)] = value
+
+        cuts = result['a_values'] if isinstance(result['a_values'], list) else []
+        alpha_levels.append([cut['alpha_level'] for cut in cuts])
+        a_values.append([cut['a_values'] for cut in cuts])
+
+    feed = pd.to_numeric(pd.Series([r['feed_amount'] for r in results], dtype=object), errors='coerce')
+    table = {
+        'Time': pd.to_datetime(pd.Series([r['Time'] for r in results], dtype=object)),
+        'Temperatur': pd.to_numeric(pd.Series([r['Temperatur'] for r in results], dtype=object),
+                                    errors='coerce').astype(np.float32),
+        'pH': pd.to_numeric(pd.Series([r['pH'] for r in results], dtype=object), errors='coerce').astype(np.float32),
+        'feed_amount': feed.astype(np.float64),
+        'min_feed': bounds[:, 0],
+        'max_feed': bounds[:, 1]
+    }
+    columns = trace_columns(metadata)
+    for block in (temp_mu, ph_mu, feed_mu, alphas):
+        for j in range(block.shape[1]):
+            table[columns[len(table)]] = block[:, j]
+    table['alpha_levels'] = alpha_levels
+    table['a_values'] = a_values
+    return pd.DataFrame(table, columns=columns), metadata
+
+
+def trace_to_results(trace: pd.DataFrame, metadata: Dict) -> List[Dict]:
+    """Rebuild the process_data result dicts from a trace table (inverse of results_to_trace)"""
+    temp_terms, ph_terms = metadata['temperatur_terms'], metadata['ph_terms']
+    feed_terms = metadata['takaran_terms']
+    positions = metadata['takaran_positions']
+    results = []
+    for values in trace.to_dict('records'):
+        valid = not np.isnan(values[f'mu_temperatur_{temp_terms[0]}'])
+        fired = {
+            f'Rule {i}': round(float(values[f'alpha_rule_{i}']), 4)
+            for i in range(1, len(metadata['rules']) + 1)
+            if valid and values[f'alpha_rule_{i}'] > 0
+        }
+        step = (values['max_feed'] - values['min_feed']) / metadata['feed_divisions']
+
+        result = {
+            'Time': values['Time'],
+            'Temperatur': round(float(values['Temperatur']), 2),
+            'pH': round(float(values['pH']), 2),
+            'feed_amount': '-' if np.isnan(values['feed_amount']) else round(float(values['feed_amount']), 4),
+            'Temperatur_Membership_Params': metadata['temperatur_membership_params'] if valid else '-',
+            'PH_Membership_Params': metadata['ph_membership_params'] if valid else '-',
+            'Temperatur_Memberships': {
+                term: round(float(values[f'mu_temperatur_{term}']), 4) for term in temp_terms
+            } if valid else '-',
+            'PH_Memberships': {term: round(float(values[f'mu_ph_{term}']), 4) for term in ph_terms} if valid else '-',
+            'Takaran_Membership_Params': {
+                term: [round(float(values['min_feed'] + pos * step), 4) for pos in positions[term]]
+                for term in feed_terms
+            } if valid else '-',
+            'Takaran_Memberships': {
+                term: round(float(values[f'mu_takaran_{term}']), 4) for term in feed_terms
+            } if fired else '-',
+            'Alpha_Predikats': fired or '-',
+            'a_values': [
+                {'alpha_level': round(float(level), 3), 'a_values': [round(float(v), 2) for v in cut]}
+                for level, cut in zip(values['alpha_levels'], values['a_values'])
+            ] if fired else '-'
+        }
+        results.append(result)
+    return results
+
+
+def _write_ndjson(trace: pd.DataFrame, metadata: Dict, path: Path, append: bool) -> None:
+    """Header line with the metadata, then one JSON array per row in the column order"""
+    exists = append and path.exists()
+    times = trace['Time'].dt.strftime('%Y-%m-%d %H:%M:%S')
+    numeric = trace.drop(columns=['Time', 'alpha_levels', 'a_values']).astype(np.float64).round(6)
+    numeric = numeric.astype(object).where(numeric.notna(), None)
+
+    with open(path, 'a' if exists else 'w', encoding='utf-8') as f:
+        if not exists:
+            f.write(json.dumps({'metadata': metadata, 'columns': list(trace.columns)}) + '\n')
+        for time, values, levels, cuts in zip(times, numeric.itertuples(index=False),
+                                              trace['alpha_levels'], trace['a_values']):
+            row = [time, *values, [float(level) for level in levels], [[float(v) for v in cut] for cut in cuts]]
+            f.write(json.dumps(row, separators=(',', ':')) + '\n')
+
+
+def _read_ndjson(path: Path) -> Tuple[pd.DataFrame, Dict]:
+    with open(path, encoding='utf-8') as f:
+        header = json.loads(f.readline())
+        rows = [json.loads(line) for line in f if line.strip()]
+    trace = pd.DataFrame(rows, columns=header['columns'])
+    return trace, header['metadata']
+
+
+def _to_arrow(trace: pd.DataFrame, metadata: Dict) -> 'pa.Table':
+    fields = [
+        pa.field(column, pa.timestamp('ns') if column == 'Time'
+                 else pa.float64() if column in ('feed_amount', 'min_feed', 'max_feed')
+                 else pa.list_(pa.float32()) if column == 'alpha_levels'
+                 else pa.list_(pa.list_(pa.float32())) if column == 'a_values'
+                 else pa.float32())
+        for column in trace.columns
+    ]
+    schema = pa.schema(fields, metadata={TRACE_METADATA_KEY: json.dumps(metadata).encode()})
+    return pa.Table.from_pandas(trace, schema=schema, preserve_index=False)
+
+
+def _parquet_parts(path: Path) -> List[Path]:
+    """Files of a Parquet trace: the file itself or the part files of a trace directory, in order"""
+    if path.is_dir():
+        return sorted(path.glob('part-*.parquet'))
+    return [path]
+
+
+def _append_parquet(table: 'pa.Table', path: Path) -> None:
+    """Write the rows as the next part file of the trace directory at path"""
+    if path.is_file():
+        # Trace satu file menjadi part pertama; file hanya dipindahkan, tidak dibaca dan ditulis ulang
+        tmp_dir = path.with_name(path.name + '.tmp')
+        os.makedirs(tmp_dir, exist_ok=True)
+        os.replace(path, tmp_dir / PARQUET_PART.format(0))
+        os.replace(tmp_dir, path)
+    os.makedirs(path, exist_ok=True)
+    pq.write_table(table, path / PARQUET_PART.format(len(_parquet_parts(path))), compression='zstd')
+
+
+def save_trace(results: Union[List[Dict], ResultTable], path: Union[str, Path], append: bool = False) -> Path:
+    """
+    Write the inference trace as Parquet or compact NDJSON, chosen by suffix.
+
+    `results` are the result dicts of process_data or a ResultTable.
+    NDJSON is appended in place. Parquet files cannot be extended, so with
+    ``append`` the path becomes a directory with one part file per call
+    (an existing single-file trace is moved in as the first part); the cost
+    of an append does not grow with the trace. ``load_trace`` reads both.
+    """
+    path = Path(path)
+    if path.suffix not in TRACE_SUFFIXES:
+        raise ValueError(f"Format trace {path.suffix} tidak didukung. Pilih salah satu dari {TRACE_SUFFIXES}.")
+    os.makedirs(path.parent, exist_ok=True)
+    if isinstance(results, ResultTable):
+        trace, metadata = results.trace, results.metadata
+    else:
+        trace, metadata = results_to_trace(results)
+
+    if path.suffix in NDJSON_SUFFIXES:
+        _write_ndjson(trace, metadata, path, append)
+        return path
+
+    if pq is None:
+        raise ImportError("pyarrow diperlukan untuk menulis trace Parquet.")
+    table = _to_arrow(trace, metadata)
+    if append and path.exists():
+        _append_parquet(table, path)
+        return path
+    if path.is_dir():
+        for part in _parquet_parts(path):
+            part.unlink()
+        path.rmdir()
+    pq.write_table(table, path, compression='zstd')
+    return path
+
+
+def load_trace(path: Union[str, Path]) -> Tuple[pd.DataFrame, Dict]:
+    """Read a trace written by save_trace; returns the typed table and its metadata"""
+    path = Path(path)
+    if path.suffix in NDJSON_SUFFIXES:
+        trace, metadata = _read_ndjson(path)
+    else:
+        if pq is None:
+            raise ImportError("pyarrow diperlukan untuk membaca trace Parquet.")
+        tables = [pq.read_table(part) for part in _parquet_parts(path)]
+        metadata = json.loads(tables[0].schema.metadata[TRACE_METADATA_KEY])
+        table = pa.concat_tables(tables) if len(tables) > 1 else tables[0]
+        trace = table.to_pandas()
+
+    trace['Time'] = pd.to_datetime(trace['Time'])
+    for column in trace.columns:
+        if column in ('feed_amount', 'min_feed', 'max_feed'):
+            trace[column] = trace[column].astype(np.float64)
+        elif column not in ('Time', 'alpha_levels', 'a_values'):
+            trace[column] = trace[column].astype(np.float32)
+    trace['alpha_levels'] = trace['alpha_levels'].map(list)
+    trace['a_values'] = trace['a_values'].map(lambda cuts: [list(cut) for cut in cuts])
+    return trace, metadata
@@ -0,0 +1,203 @@
+import argparse
+import itertools
+from functools import lru_cache
+from typing import Any
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+import numpy as np
+
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import FEED_POSITIONS
+from batch_mamdani import trapezoid_centroid
+from membership import trapmf
+
+
+# Step universe takaran lama (gram); jumlah titiknya ikut membesar dengan biomassa
+LEGACY_STEP = 0.001
+DEFAULT_TOLERANCE = 1e-4
+MIN_POINTS = FEED_DIVISIONS * 2 + 1
+MAX_POINTS = FEED_DIVISIONS * 4096 + 1
+
+
+def linear_centroid(universe: np.ndarray, aggregated: np.ndarray) -> np.ndarray:
+    """
+    Centroid of sampled memberships, linear between samples like skfuzzy's 'centroid'.
+
+    Args:
+        universe (np.ndarray): (M,) sample positions.
+        aggregated (np.ndarray): (N, M) aggregated membership per row.
+
+    Returns:
+        np.ndarray: (N,) centroids, NaN where the area is zero.
+    """
+    x0, x1 = universe[:-1], universe[1:]
+    y0, y1 = aggregated[:, :-1], aggregated[:, 1:]
+    width = x1 - x0
+    area = (width * (y0 + y1)).sum(axis=1) / 2
+    moment = (width / 6 * (x0 * (2 * y0 + y1) + x1 * (y0 + 2 * y1))).sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(area > 0, moment / area, np.nan)
+
+
+def activation_grid(n_terms: int, levels: int = 11) -> np.ndarray:
+    """Every combination of `levels` clipping levels per takaran term, without the all-zero row"""
+    grid = np.array(list(itertools.product(np.linspace(0, 1, levels), repeat=n_terms)))
+    return grid[grid.sum(axis=1) > 0]
+
+
+def sampled_centroids(universe: np.ndarray,
+                      feed_positions: np.ndarray,
+                      term_activations: np.ndarray,
+                      max_cells: int = 2 ** 22) -> np.ndarray:
+    """
+    Centroids of max_t min(alpha_t, trapmf_t) sampled on `universe`, all in step units.
+
+    Rows are processed in chunks so that at most ``max_cells`` memberships are held.
+    """
+    mfs = np.stack([trapmf(universe, p) for p in feed_positions])
+    centroids = np.empty(len(term_activations))
+    chunk = max(1, max_cells // max(1, universe.size * len(feed_positions)))
+    for start in range(0, len(term_activations), chunk):
+        alphas = term_activations[start:start + chunk]
+        aggregated = np.fmin(alphas[:, :, np.newaxis], mfs[np.newaxis, :, :]).max(axis=1)
+        centroids[start:start + chunk] = linear_centroid(universe, aggregated)
+    return centroids
+
+
+@lru_cache(maxsize=64)
+def _max_error(points: int, positions: Tuple[Tuple[float, ...], ...]) -> float:
+    feed_positions = np.array(positions)
+    universe = np.linspace(0, FEED_DIVISIONS, points)
+    grid = activation_grid(len(feed_positions))
+    errors = sampled_centroids(universe, feed_positions, grid) - trapezoid_centroid(feed_positions, grid)
+    return float(np.nanmax(np.abs(errors)))
+
+
+class UniverseResolution:
+    """
+    Number of samples of the Takaran universe, independent of the feed range.
+
+    The takaran sets sit at fixed positions of ``[0, FEED_DIVISIONS]`` steps,
+    so the centroid error of a sampled universe, relative to the feed range,
+    only depends on the number of points. A policy is either a fixed
+    ``points`` count (takes precedence) or a ``tolerance``: the largest centroid error allowed
+    as a fraction of ``max_feed - min_feed``, over a grid of term
+    activations. The point count is then found once per policy and reused
+    for every week, however large the biomass gets.
+
+    Point counts are of the form ``FEED_DIVISIONS * k + 1`` so the trapezoid
+    corners fall on samples.
+    """
+
+    def __init__(self,
+                 points: Optional[int] = None,
+                 tolerance: Optional[float] = None,
+                 feed_positions: Dict[str, List[float]] = FEED_POSITIONS,
+                 max_points: int = MAX_POINTS):
+        if points is not None and points < 2:
+            raise ValueError("points minimal 2.")
+        if tolerance is not None and tolerance <= 0:
+            raise ValueError("tolerance harus lebih besar dari 0.")
+        self.tolerance = None if points is not None else tolerance or DEFAULT_TOLERANCE
+        self.feed_positions = tuple(tuple(float(p) for p in params) for params in feed_positions.values())
+        self.max_points = max_points
+        self.points = int(points) if points is not None else self._points_for_tolerance()
+
+    def _points_for_tolerance(self) -> int:
+        """Smallest FEED_DIVISIONS * k + 1 count whose worst relative error is within the tolerance"""
+        def within(k):
+            return self.relative_error(FEED_DIVISIONS * k + 1) <= self.tolerance
+
+        low, high = 1, (MIN_POINTS - 1) // FEED_DIVISIONS
+        while not within(high):
+            if FEED_DIVISIONS * high + 1 >= self.max_points:
+                return self.max_points
+            low, high = high, high * 2
+        while high - low > 1:
+            middle = (low + high) // 2
+            low, high = (low, middle) if within(middle) else (middle, high)
+        return min(FEED_DIVISIONS * high + 1, self.max_points)
+
+    def relative_error(self, points: Optional[int] = None) -> float:
+        """Worst centroid error of a `points` universe as a fraction of the feed range"""
+        return _max_error(points or self.points, self.feed_positions) / FEED_DIVISIONS
+
+    def universe(self, min_feed: float, max_feed: float) -> np.ndarray:
+        """Takaran universe in grams, both bounds included"""
+        return np.linspace(min_feed, max_feed, self.points)
+
+    def normalized_universe(self) -> np.ndarray:
+        """Same samples in step units, e.g. for BatchMamdani(resolution=policy.points)"""
+        return np.linspace(0, FEED_DIVISIONS, self.points)
+
+    def __repr__(self) -> str:
+        return f'UniverseResolution(points={self.points}, tolerance={self.tolerance})'
+
+
+def legacy_points(min_feed: float, max_feed: float, step: float = LEGACY_STEP) -> int:
+    """Size of np.arange(min_feed, max_feed, step), the universe of the old consequent"""
+    return max(0, int(np.ceil((max_feed - min_feed) / step)))
+
+
+def resolution_report(weights,
+                      policy: Optional[UniverseResolution] = None,
+                      multiplier_min: float = 0.03,
+                      multiplier_max: float = 0.05,
+                      levels: int = 5) -> List[Dict[str, Any]]:
+    """
+    Centroid error of the policy versus the legacy 0.001 g universe, per biomass.
+
+    Both universes are evaluated on the same grid of term activations and
+    compared with the exact centroid (``trapezoid_centroid``). Errors are in
+    grams; ``max_diff_vs_legacy`` is the largest change of a defuzzified
+    takaran when switching from the legacy universe to the policy.
+    """
+    policy = policy or UniverseResolution()
+    feed_positions = np.array(policy.feed_positions)
+    grid = activation_grid(len(feed_positions), levels)
+    exact = trapezoid_centroid(feed_positions, grid)
+    centroids = sampled_centroids(policy.normalized_universe(), feed_positions, grid)
+
+    report = []
+    for weight in np.atleast_1d(np.asarray(weights, dtype=float)):
+        min_feed, max_feed = weight * multiplier_min, weight * multiplier_max
+        step = (max_feed - min_feed) / FEED_DIVISIONS
+        n_legacy = legacy_points(min_feed, max_feed)
+        legacy = np.arange(min_feed, max_feed, LEGACY_STEP)
+        if step <= 0 or legacy.size < 2:
+            continue
+        legacy_centroids = sampled_centroids((legacy - min_feed) / step, feed_positions, grid)
+        report.append({
+            'weight': float(weight),
+            'feed_range': float(max_feed - min_feed),
+            'legacy_points': n_legacy,
+            'legacy_max_error': float(np.nanmax(np.abs(legacy_centroids - exact)) * step),
+            'points': policy.points,
+            'max_error': float(np.nanmax(np.abs(centroids - exact)) * step),
+            'max_diff_vs_legacy': float(np.nanmax(np.abs(centroids - legacy_centroids)) * step),
+            'memory_ratio': n_legacy / policy.points
+        })
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Centroid error of the Takaran universe resolution')
+    parser.add_argument('weights', nargs='*', type=float, default=[100, 1000, 10000, 100000],
+                        help='Biomassa (gram) yang dibandingkan')
+    parser.add_argument('--points', type=int, default=None)
+    parser.add_argument('--tolerance', type=float, default=None)
+    args = parser.parse_args()
+
+    policy = UniverseResolution(points=args.points, tolerance=args.tolerance)
+    print(f'{policy}, relative error {policy.relative_error():.2e}')
+    print(f"{'berat (g)':>12} {'titik lama':>12} {'error lama (g)':>15} {'titik':>7} {'error (g)':>12} {'maks selisih (g)':>17}")
+    for row in resolution_report(args.weights, policy):
+        print(f"{row['weight']:>12.1f} {row['legacy_points']:>12d} {row['legacy_max_error']:>15.2e} "
+              f"{row['points']:>7d} {row['max_error']:>12.2e} {row['max_diff_vs_legacy']:>17.2e}")
+
+
+if __name__ == '__main__':
+    main()
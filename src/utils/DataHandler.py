@@ -1,7 +1,9 @@
 from typing import List
 from typing import Dict
+from typing import Iterator
 from typing import Tuple
-from datetime import datetime
+from typing import Union
+from pathlib import Path
 
 import pandas as pd
 import os
@@ -9,6 +11,14 @@ import os
 from Preprocessing import BASE_DIR
 from Preprocessing import DATA_DIR
 from Preprocessing import OUTPUT_DIR
+from TimeFilter import select_closest_readings
+from TimeFilter import stream_filter_data_by_time
+from DataManager import load_data_chunks
+from DataImputation import stream_gap_imputation
+from trace_store import ResultTable
+from trace_store import default_trace_path
+from trace_store import save_trace
+from metrics import metrics
 
 class DataHandler:
     @staticmethod
@@ -16,8 +26,10 @@ class DataHandler:
         """Load and preprocess input data"""
         try:
             weekly_weights = pd.read_csv(weight_file)
-            data = pd.read_csv(raw_file)
-            data['Time'] = pd.to_datetime(data['Time'])
+            with metrics.timer('load', source=str(raw_file)):
+                data = pd.read_csv(raw_file)
+                data['Time'] = pd.to_datetime(data['Time'])
+            metrics.incr('ingest.rows', len(data))
             
             time_filtered = DataHandler._filter_data_by_time(data, '08:00', '18:00')
             
@@ -28,49 +40,52 @@ class DataHandler:
         except Exception as e:
             raise Exception(f"Error loading data: {e}")
 
+    @staticmethod
+    def stream_data(weight_file: str, raw_file: str, chunksize: int = 100_000,
+                    impute: bool = True) -> Tuple[pd.DataFrame, Iterator[pd.DataFrame]]:
+        """Load weights and stream the raw log through time filtering (and gap imputation) chunk by chunk"""
+        weekly_weights = pd.read_csv(weight_file)
+
+        def _frames() -> Iterator[pd.DataFrame]:
+            os.makedirs(OUTPUT_DIR, exist_ok=True)
+            output_file = OUTPUT_DIR / 'data_terfilter.csv'
+            chunks = load_data_chunks(Path(raw_file), chunksize)
+            filtered = (frame for frame, _ in stream_filter_data_by_time(chunks, ['08:00', '18:00'], tolerance=7200))
+            frames = DataHandler._write_through(filtered, output_file)
+            yield from stream_gap_imputation(frames) if impute else frames
+
+        return weekly_weights, _frames()
+
+    @staticmethod
+    def _write_through(frames: Iterator[pd.DataFrame], output_file: Path) -> Iterator[pd.DataFrame]:
+        """Append every frame to output_file while passing it on"""
+        first = True
+        for frame in frames:
+            frame.to_csv(output_file, mode='w' if first else 'a', header=first, index=False)
+            first = False
+            yield frame
+
     @staticmethod
     def _filter_data_by_time(data: pd.DataFrame, *hours: str) -> pd.DataFrame:
         """Filter data for specific hours"""
-        def _closest_time(same_date: pd.DataFrame, target_time: datetime) -> Tuple[float, int]:
-            same_date = same_date.copy()
-            same_date['TimeDiff'] = same_date['Time'].apply(lambda x: abs((x - target_time).total_seconds()))
-            
-            exact_hour = same_date[same_date['Time'].dt.hour == target_time.hour]
-            if not exact_hour.empty:
-                closest_idx = exact_hour['TimeDiff'].idxmin()
-                return exact_hour['TimeDiff'].min(), closest_idx
-            
-            closest_idx = same_date['TimeDiff'].idxmin()
-            return same_date['TimeDiff'].min(), closest_idx
-
-        results = []
-        for current_date in data['Time'].dt.date.unique():
-            same_date = data[data['Time'].dt.date == current_date]
-            for hour in hours:
-                target_time = pd.to_datetime(f'{current_date} {hour}')
-                if not same_date.empty:
-                    min_diff, idx = _closest_time(same_date, target_time)
-                    if min_diff <= 7200:  # 2 hours threshold
-                        results.append(same_date.loc[idx])
-                    else:
-                        results.append({'Temperature': None, 'pH': None, 'Time': target_time})
-                else:
-                    results.append({'Temperature': None, 'pH': None, 'Time': target_time})
-        
-        return pd.DataFrame(results)
+        time_filtered, _ = select_closest_readings(data, list(hours), tolerance=7200)  # 2 hours threshold
+        return time_filtered
 
     @staticmethod
-    def save_results(results: List[Dict], output_dir: str = OUTPUT_DIR) -> None:
-        """Save processing results to CSV files"""
+    @metrics.timed('save')
+    def save_results(results: Union[List[Dict], ResultTable], output_dir: str = OUTPUT_DIR, append: bool = False) -> None:
+        """Save feed recommendations (CSV) and the inference trace, appending when `append` is set"""
         os.makedirs(output_dir, exist_ok=True)
-        
-        df_results = pd.DataFrame(results)
-        df_results['Time'] = pd.to_datetime(df_results['Time']).dt.strftime('%Y-%m-%d %H:%M')
-        
+        mode, header = ('a', False) if append else ('w', True)
+
         # Save feed recommendations
-        df_feed = df_results[['Time', 'Temperatur', 'pH', 'feed_amount']]
-        df_feed.to_csv(f'{output_dir}/feed_recommendations.csv', index=False, float_format='%.2f')
+        if isinstance(results, ResultTable):
+            df_feed = results.recommendations()
+        else:
+            df_results = pd.DataFrame(results)
+            df_results['Time'] = pd.to_datetime(df_results['Time']).dt.strftime('%Y-%m-%d %H:%M')
+            df_feed = df_results[['Time', 'Temperatur', 'pH', 'feed_amount']]
+        df_feed.to_csv(f'{output_dir}/feed_recommendations.csv', mode=mode, header=header, index=False, float_format='%.2f')
         
-        # Save inference data
-        df_inferensi = df_results.drop(columns=['feed_amount'])
-        df_inferensi.to_csv(f'{output_dir}/inferensi.csv', index=False)
\ No newline at end of file
+        # Save inference trace (typed columns, membership params once as metadata)
+        save_trace(results, default_trace_path(output_dir), append=append)
\ No newline at end of file
@@ -3,45 +3,75 @@ import numpy as np
 import skfuzzy as fuzz
 from skfuzzy import control as ctrl
 
+from typing import Dict
 from typing import List
+from typing import Optional
 from typing import Tuple
 from typing import Union
 
-from FuzzyController import FuzzyParams
+from FuzzyParams import FuzzyParams
+from membership import evaluate_membership
+from universe_resolution import UniverseResolution
 
 
 
 class DataProcessor:
     def __init__(self, fuzzy_params: FuzzyParams = FuzzyParams()):
         self.params = fuzzy_params
-        self.temperatur = self._create_antecedent(self.params.temp_range, 'Temperatur')
-        self.ph = self._create_antecedent(self.params.ph_range, 'pH')
+        self._temperatur: Optional[ctrl.Antecedent] = None
+        self._ph: Optional[ctrl.Antecedent] = None
         self._initialize_membership_functions()
 
+    @property
+    def temperatur(self) -> ctrl.Antecedent:
+        """Sampled temperature antecedent, built on first use (plotting and skfuzzy rules only)"""
+        if self._temperatur is None:
+            self._temperatur = self._create_fuzzy_sets(
+                self._create_antecedent(self.params.temp_range, 'Temperatur'), self.temp_params)
+        return self._temperatur
+
+    @property
+    def ph(self) -> ctrl.Antecedent:
+        """Sampled pH antecedent, built on first use (plotting and skfuzzy rules only)"""
+        if self._ph is None:
+            self._ph = self._create_fuzzy_sets(
+                self._create_antecedent(self.params.ph_range, 'pH'), self.ph_params)
+        return self._ph
+
+    def temperatur_memberships(self, values: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Exact temperature membership degrees evaluated from the term params"""
+        return self._evaluate_terms(self.temp_params, self.params.temp_range, values)
+
+    def ph_memberships(self, values: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Exact pH membership degrees evaluated from the term params"""
+        return self._evaluate_terms(self.ph_params, self.params.ph_range, values)
+
+    @staticmethod
+    def _evaluate_terms(membership_params: List[Tuple[str, List[float]]],
+                        range_vals: Tuple[float, float, float],
+                        values: Union[float, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Evaluate every term of a variable without a sampled universe, zero outside its range"""
+        bounds = (range_vals[0], range_vals[1])
+        return {label: evaluate_membership(values, params, bounds) for label, params in membership_params}
+
     @staticmethod
     def _create_antecedent(range_vals: Tuple[float, float, float], label: str) -> ctrl.Antecedent:
         universe = np.arange(*range_vals)
         return ctrl.Antecedent(universe, label)
 
     @staticmethod
-    def _create_consequent(lower_bound: float, upper_bound: float, step_size: float, label: str) -> ctrl.Consequent:
+    def _create_consequent(lower_bound: float, upper_bound: float, step_size: float, label: str,
+                           resolution: Optional[UniverseResolution] = None) -> ctrl.Consequent:
+        """Consequent on [lower_bound, upper_bound), or on `resolution.points` samples when a policy is given"""
+        if resolution is not None:
+            return ctrl.Consequent(resolution.universe(lower_bound, upper_bound), label)
         universe = np.arange(lower_bound, upper_bound, step_size)
         return ctrl.Consequent(universe, label)
 
     def _initialize_membership_functions(self):
-        """Initialize membership functions for temperature and pH"""
-        temp_params = [
-            ('rendah', [14, 14, 23, 25]),
-            ('normal', [23, 25, 29, 31]),
-            ('tinggi', [29, 31, 40, 40])
-        ]
-        ph_params = [
-            ('asam', [0, 0, 5, 6.5]),
-            ('netral', [5, 6.5, 7.5, 9]),
-            ('basa', [7.5, 9, 14, 14])
-        ]
-        self.temperatur = self._create_fuzzy_sets(self.temperatur, temp_params)
-        self.ph = self._create_fuzzy_sets(self.ph, ph_params)
+        """Initialize membership function parameters for temperature and pH from the fuzzy params"""
+        self.temp_params = [(label, list(params)) for label, params in self.params.temp_params]
+        self.ph_params = [(label, list(params)) for label, params in self.params.ph_params]
 
     @staticmethod
     def _create_fuzzy_sets(fuzzy_var: Union[ctrl.Antecedent, ctrl.Consequent], 
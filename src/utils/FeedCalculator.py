@@ -1,13 +1,20 @@
 from typing import List, Tuple
 import skfuzzy.control as ctrl
 
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import FEED_POSITIONS
 from DataProcessor import DataProcessor
+from rule_cache import RuleBaseCache
+from universe_resolution import UniverseResolution
 
 
 
 class FeedCalculator:
-    def __init__(self, fuzzy_system: DataProcessor):
+    def __init__(self, fuzzy_system: DataProcessor, cache_size: int = 16):
         self.fuzzy_system = fuzzy_system
+        self.feed_cache = RuleBaseCache(maxsize=cache_size)
+        # Jumlah titik universe takaran tetap, tidak ikut membesar dengan biomassa
+        self.resolution = UniverseResolution(fuzzy_system.params.feed_points, fuzzy_system.params.feed_tolerance)
 
     def calculate_feed_bounds(self, weight: float) -> Tuple[float, float]:
         """Calculate minimum and maximum feed amounts based on weight"""
@@ -16,9 +23,14 @@ class FeedCalculator:
         return min_feed, max_feed
 
     def define_feed_membership_functions(self, min_feed: float, max_feed: float) -> Tuple[ctrl.Consequent, List[Tuple[str, List[float]]]]:
-        """Define membership functions for feed amount"""
-        feed_amount = self.fuzzy_system._create_consequent(min_feed, max_feed, 0.001, 'Takaran')
-        step = (max_feed - min_feed) / 8
+        """Define membership functions for feed amount, built once per set of feed bounds"""
+        key = (float(min_feed), float(max_feed))
+        return self.feed_cache.get_or_build(key, lambda: self._build_feed_membership_functions(min_feed, max_feed))
+
+    def _build_feed_membership_functions(self, min_feed: float, max_feed: float) -> Tuple[ctrl.Consequent, List[Tuple[str, List[float]]]]:
+        """Create the Takaran consequent and its fuzzy sets"""
+        feed_amount = self.fuzzy_system._create_consequent(min_feed, max_feed, 0.001, 'Takaran', self.resolution)
+        step = (max_feed - min_feed) / FEED_DIVISIONS
 
         params = self._calculate_membership_params(min_feed, step)
         feed_amount = self.fuzzy_system._create_fuzzy_sets(feed_amount, params)
@@ -27,11 +39,5 @@ class FeedCalculator:
     @staticmethod
     def _calculate_membership_params(min_feed: float, step: float) -> List[Tuple[str, List[float]]]:
         """Calculate membership parameters for feed amount"""
-        positions = {
-            'sedikit': [0, 0, 2, 3],
-            'sedang': [2, 3, 5, 6],
-            'banyak': [5, 7, 8, 8]
-        }
-        
         return [(label, [min_feed + pos * step for pos in points]) 
-                for label, points in positions.items()]
\ No newline at end of file
+                for label, points in FEED_POSITIONS.items()]
\ No newline at end of file
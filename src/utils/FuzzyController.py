@@ -2,42 +2,37 @@ from typing import Dict
 from typing import List
 from typing import Tuple
 from skfuzzy import control as ctrl
-from dataclasses import dataclass
 
+from batch_mamdani import RULE_DEFINITIONS
 from DataProcessor import DataProcessor
-
-
-@dataclass
-class FuzzyParams:
-    """Class to store fuzzy system parameters"""
-    temp_range: Tuple[float, float, float] = (14, 40, 0.001)
-    ph_range: Tuple[float, float, float] = (4, 14, 0.001)
-    feed_multiplier_min: float = 0.03
-    feed_multiplier_max: float = 0.05
+from FuzzyParams import FuzzyParams  # Diekspor ulang untuk `from FuzzyController import FuzzyParams`
+from rule_cache import RuleBaseCache
+from rule_cache import rule_base_key
+from metrics import metrics
 
 
 class FuzzyController:
-    def __init__(self, fuzzy_system: DataProcessor):
+    rule_definitions = list(RULE_DEFINITIONS)
+
+    def __init__(self, fuzzy_system: DataProcessor, cache_size: int = 16):
         self.fuzzy_system = fuzzy_system
+        self.rule_cache = RuleBaseCache(maxsize=cache_size)
 
     def define_rules(self, feed_amount: ctrl.Consequent) -> Tuple[ctrl.ControlSystemSimulation, List[ctrl.Rule], Dict[str, str]]:
-        """Define fuzzy rules for the system"""
-        rule_definitions = [
-            ('normal', 'asam', 'sedang'),
-            ('normal', 'netral', 'banyak'),
-            ('normal', 'basa', 'sedang'),
-            ('rendah', 'asam', 'sedikit'),
-            ('rendah', 'netral', 'sedang'),
-            ('rendah', 'basa', 'sedikit'),
-            ('tinggi', 'asam', 'sedikit'),
-            ('tinggi', 'netral', 'sedang'),
-            ('tinggi', 'basa', 'sedikit')
-        ]
-        
+        """Define fuzzy rules for the system, reusing the compiled rule base for known feed bounds"""
+        key = rule_base_key(feed_amount, self.rule_definitions, self.fuzzy_system.temperatur, self.fuzzy_system.ph)
+        misses = self.rule_cache.misses
+        rule_base = self.rule_cache.get_or_build(key, lambda: self._build_rules(feed_amount))
+        metrics.incr('rule_base.misses' if self.rule_cache.misses > misses else 'rule_base.hits')
+        return rule_base
+
+    @metrics.timed('rule_base.build')
+    def _build_rules(self, feed_amount: ctrl.Consequent) -> Tuple[ctrl.ControlSystemSimulation, List[ctrl.Rule], Dict[str, str]]:
+        """Build rules, control system and simulation for one set of feed bounds"""
         rules_list = []
         rules_dict = {}
         
-        for i, (temp, ph, feed) in enumerate(rule_definitions, 1):
+        for i, (temp, ph, feed) in enumerate(self.rule_definitions, 1):
             rule = ctrl.Rule(
                 self.fuzzy_system.temperatur[temp] & self.fuzzy_system.ph[ph],
                 feed_amount[feed],
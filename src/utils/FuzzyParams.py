@@ -0,0 +1,29 @@
+from typing import List
+from typing import Optional
+from typing import Tuple
+from dataclasses import dataclass
+from dataclasses import field
+
+from batch_mamdani import PH_MEMBERSHIP_PARAMS
+from batch_mamdani import PH_RANGE
+from batch_mamdani import TEMPERATUR_MEMBERSHIP_PARAMS
+from batch_mamdani import TEMPERATUR_RANGE
+
+
+def _copy_params(membership_params: List[Tuple[str, List[float]]]) -> List[Tuple[str, List[float]]]:
+    return [(label, list(params)) for label, params in membership_params]
+
+
+@dataclass
+class FuzzyParams:
+    """Class to store fuzzy system parameters"""
+    temp_range: Tuple[float, float, float] = TEMPERATUR_RANGE
+    ph_range: Tuple[float, float, float] = PH_RANGE
+    feed_multiplier_min: float = 0.03
+    feed_multiplier_max: float = 0.05
+    # Himpunan bawaan dari batch_mamdani, satu sumber untuk semua jalur inferensi
+    temp_params: List[Tuple[str, List[float]]] = field(default_factory=lambda: _copy_params(TEMPERATUR_MEMBERSHIP_PARAMS))
+    ph_params: List[Tuple[str, List[float]]] = field(default_factory=lambda: _copy_params(PH_MEMBERSHIP_PARAMS))
+    # Resolusi universe takaran: jumlah titik tetap, atau toleransi error centroid relatif ke rentang pakan
+    feed_points: Optional[int] = None
+    feed_tolerance: Optional[float] = 1e-4
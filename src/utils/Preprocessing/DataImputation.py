@@ -1,6 +1,9 @@
-from typing import Optional, Tuple
+from typing import Dict, Optional, Tuple
+import numpy as np
 import pandas as pd
 
+from metrics import metrics
+
 
 def correlation_check(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series, pd.DataFrame]:
     """
@@ -23,9 +26,12 @@ def correlation_check(df: pd.DataFrame) -> Tuple[pd.Series, pd.Series, pd.DataFr
 
     return df["Temperature"], df["pH"], correlation_matrix
 
+@metrics.timed('imputation')
 def interpolation(df_asal: pd.DataFrame):
 
     df = df_asal.copy()
+    if metrics.enabled:
+        missing = int(df[['Temperature', 'pH']].isna().sum().sum())
 
     # Pastikan 'Time' sebagai indeks
     df.set_index('Time', inplace=True)
@@ -33,12 +39,313 @@ def interpolation(df_asal: pd.DataFrame):
     # Lakukan interpolasi berbasis waktu
     df['Temperature'] = round(df['Temperature'].interpolate(method='time'), 2)
     df['pH'] = round(df['pH'].interpolate(method='time'), 2)
+
+    if metrics.enabled:
+        remaining = int(df[['Temperature', 'pH']].isna().sum().sum())
+        metrics.incr('imputation.rows', len(df))
+        metrics.incr('imputation.imputed_values', missing - remaining)
+        metrics.incr('imputation.unfilled_values', remaining)
     
     # Reset indeks setelah interpolasi
     # df.reset_index(inplace=True)
 
     return df
 
+IMPUTE_COLUMNS = ['Temperature', 'pH']
+
+# Kode kebijakan per nilai hasil `impute_gaps`
+GAP_OBSERVED = 0
+GAP_LINEAR = 1
+GAP_SEASONAL = 2
+GAP_MISSING = 3
+
+DEFAULT_GAP_POLICY = {
+    'max_linear_gap': '6h',
+    'max_seasonal_gap': '3D',
+    'seasonal_days': 7,
+    'slot_tolerance': '1h'
+}
+
+_DAY_NS = 86_400 * 10 ** 9
+
+
+def _to_ns(value) -> int:
+    return int(pd.Timedelta(value).value)
+
+
+def _time_ns(df: pd.DataFrame) -> np.ndarray:
+    """Kolom 'Time' sebagai int64 nanodetik; konversi hanya jika belum bertipe datetime"""
+    if not pd.api.types.is_datetime64_any_dtype(df['Time']):
+        df['Time'] = pd.to_datetime(df['Time'])
+    return df['Time'].to_numpy(dtype='datetime64[ns]').astype(np.int64)
+
+
+def impute_gaps(
+        times: np.ndarray,
+        values: np.ndarray,
+        max_linear_gap='6h',
+        max_seasonal_gap='3D',
+        seasonal_days: int = 7,
+        slot_tolerance='1h',
+        last_valid: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+        start: Optional[int] = None,
+        final: bool = True,
+        max_holdback=None
+        ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Imputasi celah berdasarkan panjangnya, tervektorisasi untuk semua kolom sekaligus.
+
+    Panjang celah adalah selisih waktu antara data valid sebelum dan sesudahnya
+    (untuk celah di awal/akhir data dipakai baris pertama/terakhir celah):
+        - panjang <= max_linear_gap: interpolasi linear terhadap waktu (celah satu
+          sisi diisi nilai valid terdekat).
+        - panjang <= max_seasonal_gap: nilai terukur pada slot yang sama (selisih
+          <= slot_tolerance) dari hari sebelumnya, paling jauh `seasonal_days` hari.
+          Jika tidak ada, celah dua sisi tetap diinterpolasi linear.
+        - lebih panjang: dibiarkan kosong (NaN).
+
+    Args:
+        times (np.ndarray): Waktu terurut naik dalam int64 nanodetik, bentuk (n,).
+        values (np.ndarray): Nilai bentuk (n, k), NaN untuk data hilang.
+        last_valid (Tuple[np.ndarray, np.ndarray], optional): Waktu (int64, -1 jika tidak ada)
+            dan nilai data valid terakhir per kolom sebelum `times`, untuk pemrosesan per chunk.
+        start (int, optional): Awal data (int64 nanodetik) untuk celah di awal; default times[0].
+        final (bool): Jika False, celah di akhir data yang belum melewati max_seasonal_gap
+            ditandai belum final karena data berikutnya masih bisa mengubah kebijakannya.
+        max_holdback (optional): Jika diisi (mis. '0h'), baris yang sudah setua ini terhadap
+            baris terakhir tetap ditandai final dengan nilai sementara dari data yang ada
+            (celah satu sisi), tidak menunggu max_seasonal_gap.
+
+    Returns:
+        Tuple: Nilai hasil imputasi (n, k), kode kebijakan (n, k) dan penanda final (n, k).
+    """
+    times = np.asarray(times, dtype=np.int64)
+    values = np.asarray(values, dtype=float)
+    n_rows, n_cols = values.shape
+    valid = np.isfinite(values)
+    filled = values.copy()
+    policy = np.where(valid, GAP_OBSERVED, GAP_MISSING).astype(np.int8)
+    done = np.ones_like(valid) if final else valid.copy()
+    if n_rows == 0 or valid.all():
+        return filled, policy, np.ones_like(valid)
+
+    if last_valid is None:
+        last_times, last_values = np.full(n_cols, -1, dtype=np.int64), np.full(n_cols, np.nan)
+    else:
+        last_times, last_values = (np.asarray(a) for a in last_valid)
+
+    # Indeks data valid sebelum (prev) dan sesudah (next) setiap baris, per kolom
+    rows = np.arange(n_rows)[:, np.newaxis]
+    prev = np.maximum.accumulate(np.where(valid, rows, -1), axis=0)
+    nxt = np.minimum.accumulate(np.where(valid, rows, n_rows)[::-1], axis=0)[::-1]
+    cols = np.broadcast_to(np.arange(n_cols), values.shape)
+
+    has_prev_row = prev >= 0
+    has_left = has_prev_row | (last_times >= 0)
+    has_right = nxt < n_rows
+    left_time = np.where(has_prev_row, times[np.maximum(prev, 0)], np.where(last_times >= 0, last_times, times[0] if start is None else start))
+    left_value = np.where(has_prev_row, values[np.maximum(prev, 0), cols], last_values)
+    right_time = np.where(has_right, times[np.minimum(nxt, n_rows - 1)], times[-1])
+    right_value = values[np.minimum(nxt, n_rows - 1), cols]
+    gap = right_time - left_time
+
+    missing = ~valid
+    if not final:
+        done |= has_right | (times[-1] - left_time > _to_ns(max_seasonal_gap))
+        if max_holdback is not None:
+            done |= (times[-1] - times >= _to_ns(max_holdback))[:, np.newaxis]
+
+    # Celah pendek: linear terhadap waktu, atau nilai terdekat untuk celah satu sisi
+    short = missing & (gap <= _to_ns(max_linear_gap))
+    two_sided = has_left & has_right
+    span = np.where(two_sided & (right_time > left_time), right_time - left_time, 1)
+    weight = (times[:, np.newaxis] - left_time) / span
+    linear = np.where(two_sided, left_value + (right_value - left_value) * weight,
+                      np.where(has_left, left_value, right_value))
+    filled[short] = linear[short]
+    policy[short] = GAP_LINEAR
+
+    # Celah sedang: slot yang sama pada hari sebelumnya, mundur hari demi hari
+    medium = missing & ~short & (gap <= _to_ns(max_seasonal_gap))
+    tolerance = _to_ns(slot_tolerance)
+    for col in np.flatnonzero(medium.any(axis=0)):
+        observed = np.flatnonzero(valid[:, col])
+        pending = np.flatnonzero(medium[:, col])
+        for day in range(1, seasonal_days + 1):
+            if not len(pending) or not len(observed):
+                break
+            target = times[pending] - day * _DAY_NS
+            pos = np.searchsorted(times[observed], target)
+            before = observed[np.maximum(pos - 1, 0)]
+            after = observed[np.minimum(pos, len(observed) - 1)]
+            nearest = np.where(np.abs(times[before] - target) <= np.abs(times[after] - target), before, after)
+            hit = np.abs(times[nearest] - target) <= tolerance
+            filled[pending[hit], col] = values[nearest[hit], col]
+            policy[pending[hit], col] = GAP_SEASONAL
+            pending = pending[~hit]
+        fallback = pending[two_sided[pending, col]]
+        filled[fallback, col] = linear[fallback, col]
+        policy[fallback, col] = GAP_LINEAR
+
+    imputed = policy != GAP_OBSERVED
+    filled[imputed] = np.round(filled[imputed], 2)
+    return filled, policy, done
+
+
+def _count_policies(policy: np.ndarray) -> None:
+    if metrics.enabled:
+        metrics.incr('imputation.linear', int((policy == GAP_LINEAR).sum()))
+        metrics.incr('imputation.seasonal', int((policy == GAP_SEASONAL).sum()))
+        metrics.incr('imputation.unfilled_values', int((policy == GAP_MISSING).sum()))
+
+
+@metrics.timed('imputation')
+def gap_imputation(df: pd.DataFrame, **policy) -> pd.DataFrame:
+    """
+    Imputasi grid hasil filter waktu dengan kebijakan berdasarkan panjang celah.
+
+    Args:
+        df (pd.DataFrame): DataFrame dengan kolom 'Time', 'Temperature', dan 'pH'.
+        **policy: Parameter `impute_gaps` (max_linear_gap, max_seasonal_gap, seasonal_days,
+            slot_tolerance), default dari DEFAULT_GAP_POLICY.
+
+    Returns:
+        pd.DataFrame: Data terurut waktu dengan kolom 'Time' dan nilai hasil imputasi;
+            celah yang terlalu panjang tetap NaN.
+    """
+    df = df.sort_values('Time', kind='mergesort').reset_index(drop=True)
+    times = _time_ns(df)
+    values = df[IMPUTE_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+
+    filled, codes, _ = impute_gaps(times, values, **{**DEFAULT_GAP_POLICY, **policy})
+    _count_policies(codes)
+    df[IMPUTE_COLUMNS] = filled
+    metrics.incr('imputation.rows', len(df))
+    return df
+
+
+class GapImputer:
+    """
+    `gap_imputation` per chunk dengan status yang dibawa antar frame.
+
+    Baris yang kebijakannya masih bisa berubah (celah di akhir frame yang belum
+    melewati max_seasonal_gap) ditahan di `pending`. Data terukur beberapa hari
+    terakhir disimpan di `context` sebagai sumber slot harian, dan data valid
+    terakhir sebelum `context` di `last_valid`. Hasilnya sama dengan
+    `gap_imputation` pada seluruh data sekaligus.
+
+    Dengan `max_holdback` (lihat `impute_gaps`) baris celah di akhir paling lama
+    ditahan selama itu lalu dikirim dengan nilai sementara; hasilnya bisa berbeda
+    dari `gap_imputation`, tetapi tidak terlambat sampai tiga hari.
+    """
+
+    def __init__(self, **policy):
+        self.policy = {**DEFAULT_GAP_POLICY, **policy}
+        self.context: Optional[pd.DataFrame] = None
+        self.pending: Optional[pd.DataFrame] = None
+        self.last_valid = (np.full(len(IMPUTE_COLUMNS), -1, dtype=np.int64), np.full(len(IMPUTE_COLUMNS), np.nan))
+        self.start: Optional[int] = None
+        # Riwayat yang dibutuhkan baris tertahan: slot harian terjauh dan celah terpanjang
+        self.lookback = max(self.policy['seasonal_days'] * _DAY_NS + _to_ns(self.policy['slot_tolerance']),
+                            _to_ns(self.policy['max_seasonal_gap']))
+
+    def _impute(self, frame: pd.DataFrame, final: bool) -> pd.DataFrame:
+        parts = [part for part in (self.context, self.pending, frame) if part is not None and not part.empty]
+        if not parts:
+            return pd.DataFrame(columns=['Time'] + IMPUTE_COLUMNS)
+        df = pd.concat(parts, ignore_index=True)
+        skip = 0 if self.context is None else len(self.context)
+
+        times = _time_ns(df)
+        raw = df[IMPUTE_COLUMNS].apply(pd.to_numeric, errors='coerce').to_numpy(dtype=float)
+        if self.start is None:
+            self.start = int(times[0])
+        filled, codes, done = impute_gaps(times, raw, last_valid=self.last_valid, start=self.start,
+                                          final=final, **self.policy)
+
+        # Kirim baris sampai baris pertama yang belum final, urutan waktu tetap terjaga
+        done = done.all(axis=1)
+        done[:skip] = True
+        ready = len(df) if done.all() else int(np.argmin(done))
+
+        self.pending = df.iloc[ready:].reset_index(drop=True) if ready < len(df) else None
+        cutoff = (times[ready] if ready < len(df) else times[-1]) - self.lookback
+        keep = times[:ready] >= cutoff
+        dropped = ~keep[:, np.newaxis] & np.isfinite(raw[:ready])
+        if dropped.any():
+            last = np.where(dropped, np.arange(ready)[:, np.newaxis], -1).max(axis=0)
+            update = last >= 0
+            self.last_valid[0][update] = times[last[update]]
+            self.last_valid[1][update] = raw[last[update], np.flatnonzero(update)]
+        self.context = df.iloc[:ready][keep].reset_index(drop=True)
+
+        _count_policies(codes[skip:ready])
+        result = df.iloc[skip:ready].reset_index(drop=True)
+        result[IMPUTE_COLUMNS] = filled[skip:ready]
+        return result
+
+    def push(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Tambahkan frame baru dan kembalikan baris yang kebijakannya sudah final."""
+        return self._impute(frame, final=False)
+
+    def flush(self) -> pd.DataFrame:
+        """Kirim baris yang masih ditahan di akhir aliran."""
+        return self._impute(None, final=True)
+
+    def state(self) -> Dict:
+        """Status dalam bentuk yang bisa disimpan sebagai JSON (lihat `load_state`)."""
+        def records(df):
+            if df is None:
+                return None
+            df = df[['Time'] + IMPUTE_COLUMNS].copy()
+            df['Time'] = pd.to_datetime(df['Time']).dt.strftime('%Y-%m-%d %H:%M:%S')
+            return df.astype(object).where(df.notna(), None).values.tolist()
+
+        return {
+            'context': records(self.context),
+            'pending': records(self.pending),
+            'last_valid': [[int(t), None if np.isnan(v) else float(v)] for t, v in zip(*self.last_valid)],
+            'start': self.start
+        }
+
+    def load_state(self, state: Dict) -> None:
+        def frame(rows):
+            if rows is None:
+                return None
+            df = pd.DataFrame(rows, columns=['Time'] + IMPUTE_COLUMNS)
+            df['Time'] = pd.to_datetime(df['Time'])
+            df[IMPUTE_COLUMNS] = df[IMPUTE_COLUMNS].astype(float)
+            return df
+
+        self.context = frame(state.get('context'))
+        self.pending = frame(state.get('pending'))
+        if state.get('last_valid'):
+            self.last_valid = (np.array([t for t, _ in state['last_valid']], dtype=np.int64),
+                               np.array([np.nan if v is None else v for _, v in state['last_valid']]))
+        self.start = state.get('start')
+
+
+def stream_gap_imputation(frames, **policy):
+    """
+    `gap_imputation` untuk aliran DataFrame tanpa menggabungkan seluruh data.
+
+    Args:
+        frames (Iterable[pd.DataFrame]): Frame terurut waktu dengan kolom 'Time', 'Temperature', dan 'pH'.
+        **policy: Parameter kebijakan celah, lihat `impute_gaps`.
+
+    Yields:
+        pd.DataFrame: Frame yang sudah diimputasi dengan kolom 'Time'.
+    """
+    imputer = GapImputer(**policy)
+    for frame in frames:
+        emitted = imputer.push(frame)
+        if not emitted.empty:
+            yield emitted
+
+    remaining = imputer.flush()
+    if not remaining.empty:
+        yield remaining
+
 def impute_missing_values(
         df: pd.DataFrame, 
         method: str = "median", 
@@ -101,6 +408,9 @@ def impute_missing_values(
         if verbose:
             print(f"Imputasi selesai menggunakan nilai yang ditentukan: {fill_value}.")
 
+    if metrics.enabled:
+        filled = df[['Temperature', 'pH']].isna().sum().sum() - imputed_df[['Temperature', 'pH']].isna().sum().sum()
+        metrics.incr('imputation.filled_values', int(filled))
     return imputed_df
 
 if __name__ == "__main__":
@@ -1,14 +1,90 @@
+from typing import Iterator
+from typing import Optional
+
+import numpy as np
 import pandas as pd
 
 from PathManager import Path
 
+from metrics import metrics
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Cache kolumnar opsional, tanpa pyarrow data selalu dibaca dari sumber
+    pa = None
+    pq = None
+
+
+# Format waktu yang dikenal, dicoba sebelum inferensi format bebas
+TIME_FORMATS = ['%d %B %Y %H:%M:%S', '%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M']
+CACHE_SUFFIX = '.cache.parquet'
+
+
+def cache_path_for(source_path: Path) -> Path:
+    """Path of the typed columnar cache kept next to a source file."""
+    return source_path.with_name(f"{source_path.name}{CACHE_SUFFIX}")
+
+
+def _source_signature(source_path: Path) -> dict:
+    stat = source_path.stat()
+    return {b'source_mtime_ns': str(stat.st_mtime_ns).encode(), b'source_size': str(stat.st_size).encode()}
+
+
+def _valid_cache(source_path: Path) -> Optional[Path]:
+    """Return the cache path if it exists and matches the source mtime and size."""
+    cache_path = cache_path_for(source_path)
+    if pq is None or not cache_path.exists():
+        return None
+    try:
+        metadata = pq.read_schema(cache_path).metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+    signature = _source_signature(source_path)
+    if any(metadata.get(key) != value for key, value in signature.items()):
+        return None
+    return cache_path
+
+
+def _to_typed(df: pd.DataFrame, time_column: str = 'Time') -> pd.DataFrame:
+    """Parse the time column to datetime64 and downcast float readings to float32."""
+    typed = df.copy()
+    if time_column in typed.columns and not pd.api.types.is_datetime64_any_dtype(typed[time_column]):
+        try:
+            typed[time_column] = to_datetime(typed[time_column])
+        except (ValueError, TypeError):
+            pass
+    for column in typed.select_dtypes(include='float64').columns:
+        typed[column] = typed[column].astype(np.float32)
+    return typed
 
-def load_data(source_path: Path) -> pd.DataFrame:
+
+def _write_cache(typed: pd.DataFrame, source_path: Path) -> None:
+    """Write the typed frame as Parquet, tagged with the current source signature."""
+    if pq is None:
+        return
+    table = pa.Table.from_pandas(typed, preserve_index=False)
+    metadata = {**(table.schema.metadata or {}), **_source_signature(source_path)}
+    try:
+        pq.write_table(table.replace_schema_metadata(metadata), cache_path_for(source_path))
+    except OSError:
+        pass  # Cache hanya optimasi, kegagalan menulis tidak menghentikan proses
+
+
+@metrics.timed('load')
+def load_data(source_path: Path, use_cache: bool = True) -> pd.DataFrame:
     """
     Load a dataset file based on its file format.
 
+    With `use_cache` the parsed data is kept in a typed Parquet cache next to
+    the source (datetime64 'Time', float32 readings). The cache is reused as
+    long as the source mtime and size are unchanged, and rebuilt otherwise.
+    Without pyarrow the source is always parsed.
+
     Args:
         source_path (Path): Path object representing the path to the source file.
+        use_cache (bool): Read and refresh the columnar cache.
 
     Returns:
         pd.DataFrame: A Pandas DataFrame containing the loaded dataset.
@@ -20,29 +96,116 @@ def load_data(source_path: Path) -> pd.DataFrame:
     if not source_path.exists():
         raise ValueError(f"File not found: {source_path}")
 
+    if use_cache:
+        cache_path = _valid_cache(source_path)
+        if cache_path is not None:
+            df = pd.read_parquet(cache_path)
+            metrics.incr('load.cache_hits')
+            metrics.incr('ingest.rows', len(df))
+            return df
+
     # Dapatkan ekstensi file
     file_format = source_path.suffix.lower()
 
     # Load data berdasarkan format
     if file_format == '.csv':
-        return pd.read_csv(source_path)
+        df = pd.read_csv(source_path)
     elif file_format in ['.xls', '.xlsx']:
-        return pd.read_excel(source_path)
+        df = pd.read_excel(source_path)
     elif file_format == '.json':
-        return pd.read_json(source_path)
+        df = pd.read_json(source_path)
     else:
         raise ValueError(f"File format '{file_format}' is not supported!")
 
+    metrics.incr('ingest.rows', len(df))
+    if not use_cache:
+        return df
+
+    typed = _to_typed(df)
+    _write_cache(typed, source_path)
+    return typed
 
-def save_data(df: pd.DataFrame, output_path: Path, saved_name: str, file_format: str = 'csv') -> Path:
+
+def load_data_chunks(source_path: Path, chunksize: int = 100_000, time_column: str = 'Time') -> Iterator[pd.DataFrame]:
+    """
+    Load a dataset file as a stream of bounded-size chunks.
+
+    CSV files are read incrementally, so peak memory depends on `chunksize`
+    rather than on the file length. Excel and JSON files cannot be read
+    incrementally by pandas; they are loaded once and then sliced. A valid
+    columnar cache is streamed batch by batch instead of the source.
+
+    Args:
+        source_path (Path): Path object representing the path to the source file.
+        chunksize (int): Maximum number of rows per chunk.
+        time_column (str): Column parsed to datetime once per chunk.
+
+    Yields:
+        pd.DataFrame: Consecutive chunks of the dataset.
+
+    Raises:
+        ValueError: If the file format is not supported or if the file does not exist.
+    """
+    if not source_path.exists():
+        raise ValueError(f"File not found: {source_path}")
+
+    cache_path = _valid_cache(source_path)
+    if cache_path is not None:
+        for batch in pq.ParquetFile(cache_path).iter_batches(batch_size=chunksize):
+            metrics.incr('ingest.rows', batch.num_rows)
+            yield batch.to_pandas()
+        return
+
+    if source_path.suffix.lower() == '.csv':
+        chunks = pd.read_csv(source_path, chunksize=chunksize)
+    else:
+        data = load_data(source_path, use_cache=False)
+        chunks = (data.iloc[start:start + chunksize] for start in range(0, len(data), chunksize))
+
+    for chunk in chunks:
+        if time_column in chunk.columns:
+            chunk[time_column] = to_datetime(chunk[time_column])
+        metrics.incr('ingest.rows', len(chunk))
+        yield chunk
+
+
+def to_datetime(values, format: str = None):
+    """
+    Convert a value or a column to datetime.
+
+    Columns are first parsed with the known `TIME_FORMATS`, which is much
+    faster than free-form inference; inference is the fallback.
+
+    Args:
+        values: Scalar, list or Series with date/time values.
+        format (str, optional): Explicit strftime format, inferred when omitted.
+
+    Returns:
+        Converted datetime value(s).
+    """
+    if format is None and isinstance(values, pd.Series) and values.dtype == object:
+        for known_format in TIME_FORMATS:
+            try:
+                return pd.to_datetime(values, format=known_format)
+            except (ValueError, TypeError):
+                continue
+    return pd.to_datetime(values, format=format)
+
+
+def save_data(df: pd.DataFrame, output_path: Path, saved_name: str, file_format: str = 'csv',
+              use_cache: bool = True) -> Path:
     """
     Save a Pandas DataFrame to a file.
 
+    For CSV and Excel output the typed columnar cache is written as well, so a
+    later `load_data` of the saved file skips parsing it.
+
     Args:
         df (pd.DataFrame): DataFrame containing 'Temperature', 'pH', and 'Time' columns.
         output_path (Path): Path to the directory where the file will be saved.
         saved_name (str): Name of the output file.
         file_format (str): File format of the output file
+        use_cache (bool): Also write the columnar cache next to the saved file.
 
     Returns:
         Path: The full path of the saved CSV file.
@@ -76,6 +239,13 @@ def save_data(df: pd.DataFrame, output_path: Path, saved_name: str, file_format:
         df.to_json(file_path)
     else:
         raise ValueError(f"File format '{file_format}' is not supported!")
+
+    if use_cache and file_format != 'json':
+        # Sama dengan hasil membaca ulang file: indeks ikut disimpan sebagai kolom
+        saved = df.reset_index()
+        if df.index.name is None:
+            saved = saved.rename(columns={'index': 'Unnamed: 0'})
+        _write_cache(_to_typed(saved), file_path)
     
     print(f"Data berhasil disimpan ke {file_path}.")
 
@@ -8,6 +8,8 @@ from PathManager import Path
 from PathManager import DATA_DIR
 from PathManager import OUTPUT_DIR
 
+from metrics import metrics
+
 def closest_time(same_date, target_time):
 
     # same_date.loc['Time'] = same_date['Time'].apply(lambda x: abs((x - target_time).total_seconds()))
@@ -28,6 +30,114 @@ def closest_time(same_date, target_time):
         closest_idx = date_chosen['TimeDiff'].idxmin()
         return date_chosen['TimeDiff'].min(), closest_idx
 
+def _nearest_in_window(times: np.ndarray, targets: np.ndarray,
+                       window_start: np.ndarray, window_end: np.ndarray):
+    """
+    Cari indeks data terdekat ke setiap target di dalam jendela [window_start, window_end).
+
+    `times` harus sudah terurut. Jika selisih sama, data yang lebih awal dipilih
+    (sama seperti idxmin pada data yang terurut).
+    """
+    lo = np.searchsorted(times, window_start, side='left')
+    hi = np.searchsorted(times, window_end, side='left')
+    has_data = hi > lo
+
+    last = np.maximum(hi - 1, lo)
+    pos = np.searchsorted(times, targets, side='left')
+    after = np.clip(pos, lo, last).clip(0, len(times) - 1)
+    before = np.clip(pos - 1, lo, last).clip(0, len(times) - 1)
+
+    diff_after = np.abs(times[after] - targets)
+    diff_before = np.abs(times[before] - targets)
+    chosen = np.where(diff_before <= diff_after, before, after)
+
+    # Untuk timestamp ganda, ambil baris pertama
+    chosen = np.searchsorted(times, times[chosen], side='left')
+    diff_seconds = np.abs(times[chosen] - targets) / np.timedelta64(1, 's')
+    return has_data, chosen, diff_seconds
+
+@metrics.timed('time_filter')
+def select_closest_readings(data: pd.DataFrame, hours: list, tolerance: float):
+    """
+    Pilih data terdekat untuk setiap pasangan (tanggal, jam target) dalam satu kali proses.
+
+    Data diurutkan sekali, lalu setiap target dicari dengan searchsorted. Aturan
+    lama tetap dipakai: utamakan data pada jam yang sama dengan target, jika tidak
+    ada ambil yang terdekat pada tanggal yang sama, dan kosongkan slot jika
+    selisihnya lebih dari `tolerance` detik.
+
+    Args:
+        data (pd.DataFrame): Data dengan kolom 'Time' bertipe datetime.
+        hours (list): Jam target dalam format "HH:MM".
+        tolerance (float): Selisih waktu maksimum dalam detik.
+
+    Returns:
+        Tuple: DataFrame hasil (satu baris per tanggal dan jam) dan jumlah slot kosong.
+    """
+    if data.empty:
+        return pd.DataFrame(columns=data.columns), 0
+
+    data = data.sort_values('Time', kind='mergesort').reset_index(drop=True)
+    times = data['Time'].to_numpy(dtype='datetime64[ns]')
+
+    dates = np.unique(times.astype('datetime64[D]'))
+    offsets = pd.to_timedelta([f'{hour}:00' for hour in hours]).to_numpy()
+    targets = (dates[:, np.newaxis] + offsets[np.newaxis, :]).ravel()
+
+    hour_start = targets.astype('datetime64[h]')
+    day_start = targets.astype('datetime64[D]')
+    has_hour, hour_idx, hour_diff = _nearest_in_window(
+        times, targets, hour_start, hour_start + np.timedelta64(1, 'h'))
+    has_day, day_idx, day_diff = _nearest_in_window(
+        times, targets, day_start, day_start + np.timedelta64(1, 'D'))
+
+    chosen = np.where(has_hour, hour_idx, day_idx)
+    diff = np.where(has_hour, hour_diff, day_diff)
+    found = (has_hour | has_day) & (diff <= tolerance)
+
+    result_df = data.iloc[chosen].reset_index(drop=True)
+    for column in result_df.columns.drop('Time'):
+        result_df[column] = result_df[column].where(found)
+    result_df['Time'] = np.where(found, result_df['Time'].to_numpy(dtype='datetime64[ns]'), targets)
+
+    empty_count = int((~found).sum())
+    metrics.incr('time_filter.readings', len(data))
+    metrics.incr('time_filter.slots', len(targets))
+    metrics.incr('time_filter.empty_slots', empty_count)
+    return result_df, empty_count
+
+def stream_filter_data_by_time(chunks, hours: list, tolerance: float):
+    """
+    Versi streaming dari select_closest_readings untuk log yang urut waktu.
+
+    Data pada tanggal terakhir setiap chunk ditahan dan digabung dengan chunk
+    berikutnya, sehingga satu tanggal tidak pernah terpotong di antara chunk.
+    Memori yang dibutuhkan hanya satu chunk ditambah satu hari data.
+
+    Args:
+        chunks (Iterable[pd.DataFrame]): Chunk data dengan kolom 'Time' bertipe datetime.
+        hours (list): Jam target dalam format "HH:MM".
+        tolerance (float): Selisih waktu maksimum dalam detik.
+
+    Yields:
+        Tuple: DataFrame hasil untuk hari-hari yang sudah lengkap dan jumlah slot kosong.
+    """
+    carry = None
+    for chunk in chunks:
+        if carry is not None:
+            chunk = pd.concat([carry, chunk], ignore_index=True)
+        if chunk.empty:
+            continue
+
+        last_day = chunk['Time'].max().normalize()
+        complete = chunk[chunk['Time'] < last_day]
+        carry = chunk[chunk['Time'] >= last_day]
+        if not complete.empty:
+            yield select_closest_readings(complete, hours, tolerance)
+
+    if carry is not None and not carry.empty:
+        yield select_closest_readings(carry, hours, tolerance)
+
 def filter_data_by_time(data: pd.DataFrame, time_range: list[2], time_step: float=1):
     
     # Pastikan time_range adalah list atau tuple
@@ -51,39 +161,7 @@ def filter_data_by_time(data: pd.DataFrame, time_range: list[2], time_step: floa
             else: chosen_hours.append(f"{int(hour)}:30")
 
 
-    results = []
-    empty_counter = 0
-
-    # Didalam data[Time].dt.date terdapat banyak tanggal yang sama (hanya tanggal)
-    # maka digunakan .unique() untuk mengambil 1 data dari data yang sama
-    for current_date in data['Time'].dt.date.unique():
-
-        # Mengambil data temperatur dan pH pada baris current_date
-        same_date = data[data['Time'].dt.date == current_date]
-
-        for hour in chosen_hours:
-            target_time = to_datetime(f'{current_date} {hour}')
-            if not same_date.empty:
-                min_diff, idx = closest_time(same_date, target_time)
-                if min_diff <= 600: # rentang waktu 10 menit
-                    results.append(same_date.loc[idx])
-                else:
-                    empty_counter += 1
-                    results.append({
-                        'Temperature': None,
-                        'pH': None,
-                        'Time': target_time,
-                    })
-            else:
-                empty_counter += 1
-                results.append({
-                    'Temperature': None,
-                    'pH': None,
-                    'Time': target_time,
-                })
-
-    result_df = pd.DataFrame(results)
-    return result_df, empty_counter
+    return select_closest_readings(data, chosen_hours, tolerance=600) # rentang waktu 10 menit
 
 
 
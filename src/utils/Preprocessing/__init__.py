@@ -1,4 +1,19 @@
-from TimeFilter import *
-from DataImputation import *
-from AddWeightWeekly import *
-from PathManager import *
+# Submodul dimuat saat namanya pertama kali dipakai (PEP 562).
+# PathManager dicari lebih dulu karena paling ringan; AddWeightWeekly paling akhir
+# karena membaca file saat diimpor.
+import importlib
+
+_SUBMODULES = ('PathManager', 'TimeFilter', 'DataImputation', 'AddWeightWeekly')
+
+
+def __getattr__(name):
+    if name.startswith('__'):
+        raise AttributeError(name)
+
+    for module_name in _SUBMODULES:
+        module = importlib.import_module(module_name)
+        if hasattr(module, name):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
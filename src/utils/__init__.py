@@ -1,5 +1,36 @@
-from .Preprocessing import *
-from .FuzzyController import *
-from .DataProcessor import *
-from .FeedCalculator import *
-from .DataHandler import *
\ No newline at end of file
+# Submodul dimuat saat namanya pertama kali dipakai (PEP 562), sehingga
+# `from utils import DATA_DIR` tidak ikut memuat scikit-fuzzy, pandas, scipy atau openpyxl.
+import importlib
+
+# Urutan pencarian nama sama dengan urutan star import sebelumnya
+_SUBMODULES = ('.Preprocessing', '.FuzzyParams', '.FuzzyController', '.DataProcessor', '.FeedCalculator', '.DataHandler')
+
+# Kelas yang namanya sama dengan submodulnya; setelah submodul diimpor nama paket harus menunjuk ke kelas
+_CLASSES = {
+    'FuzzyController': '.FuzzyController',
+    'FuzzyParams': '.FuzzyParams',
+    'DataProcessor': '.DataProcessor',
+    'FeedCalculator': '.FeedCalculator',
+    'DataHandler': '.DataHandler'
+}
+
+
+def _load(module_name):
+    module = importlib.import_module(module_name, __name__)
+    for name, owner in _CLASSES.items():
+        if owner == module_name:
+            globals()[name] = getattr(module, name)
+    return module
+
+
+def __getattr__(name):
+    if name.startswith('__'):
+        raise AttributeError(name)
+
+    for module_name in ((_CLASSES[name],) if name in _CLASSES else _SUBMODULES):
+        module = _load(module_name)
+        if hasattr(module, name):
+            value = getattr(module, name)
+            globals()[name] = value
+            return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,161 @@
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Sequence
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import calculate_feed_bounds
+
+
+WEEK_NS = 7 * 24 * 3600 * 10 ** 9
+AGGREGATIONS = ('sum', 'mean')
+
+
+def _times_ns(times) -> np.ndarray:
+    """int64 nanoseconds of a column of timestamps (also for µs/ms resolution columns)"""
+    times = pd.Series(times)
+    if not pd.api.types.is_datetime64_any_dtype(times):
+        times = pd.to_datetime(times)
+    return times.to_numpy().astype('datetime64[ns]').view(np.int64)
+
+
+class WeeklyIndex:
+    """
+    Week -> (biomass, min_feed, max_feed, takaran sets) lookup built once from a weekly weight table.
+
+    The table has the layout of ``data/berat_lobster_weekly.csv``: a name
+    column followed by one column per weigh-in (``Week_1 .. Week_n``). Week
+    ``k`` starts ``7 * k`` days after the start date of the readings, which is
+    passed per lookup so one index serves every chunk and restart of a
+    pipeline. Readings are mapped to weeks with one ``np.searchsorted``;
+    readings after the last weigh-in keep the last week, like before.
+
+    Args:
+        weekly_weights (pd.DataFrame): Weekly weight table.
+        multiplier_min (float): Lower feed multiplier (see calculate_feed_bounds).
+        multiplier_max (float): Upper feed multiplier.
+        lobsters (Sequence[str]): Only aggregate these rows (by name); all by default.
+        aggregate (str): 'sum' (pond biomass, default) or 'mean' (average lobster).
+        interpolate (bool): Interpolate the biomass linearly between the start of
+            consecutive weeks instead of holding it for the whole week.
+    """
+
+    def __init__(self,
+                 weekly_weights: pd.DataFrame,
+                 multiplier_min: float = 0.03,
+                 multiplier_max: float = 0.05,
+                 lobsters: Optional[Sequence[str]] = None,
+                 aggregate: str = 'sum',
+                 interpolate: bool = False):
+        if aggregate not in AGGREGATIONS:
+            raise ValueError(f"Agregasi tidak valid. Pilih salah satu dari {AGGREGATIONS}.")
+        names = weekly_weights.iloc[:, 0].astype(str)
+        weights = weekly_weights.iloc[:, 1:].apply(pd.to_numeric, errors='coerce')
+        if lobsters is not None:
+            selected = names.isin([str(name) for name in lobsters])
+            if not selected.any():
+                raise ValueError(f"Lobster {list(lobsters)} tidak ada di tabel bobot")
+            weights = weights[selected.to_numpy()]
+        if weights.shape[1] == 0:
+            raise ValueError("Tabel bobot tidak memiliki kolom minggu")
+
+        self.week_labels = list(weekly_weights.columns[1:])
+        self.lobsters = list(names if lobsters is None else names[selected])
+        self.multiplier_min = multiplier_min
+        self.multiplier_max = multiplier_max
+        self.aggregate = aggregate
+        self.interpolate = interpolate
+
+        self.biomass = (weights.sum() if aggregate == 'sum' else weights.mean()).to_numpy(dtype=float)
+        self.min_feeds, self.max_feeds = calculate_feed_bounds(self.biomass, multiplier_min, multiplier_max)
+        self.week_offsets = np.arange(len(self.biomass), dtype=np.int64) * WEEK_NS
+        self._feed_sets: Dict[Tuple, List[Dict[str, List[float]]]] = {}
+
+    @classmethod
+    def for_model(cls, weekly_weights: pd.DataFrame, model=None, **kwargs) -> 'WeeklyIndex':
+        """Index with the feed multipliers of a PondModel (default multipliers without one)"""
+        if model is not None:
+            kwargs.setdefault('multiplier_min', model.feed_multiplier_min)
+            kwargs.setdefault('multiplier_max', model.feed_multiplier_max)
+        return cls(weekly_weights, **kwargs)
+
+    @classmethod
+    def per_lobster(cls, weekly_weights: pd.DataFrame, **kwargs) -> Dict[str, 'WeeklyIndex']:
+        """One index per lobster (row of the table)"""
+        return {str(name): cls(weekly_weights, lobsters=[name], **kwargs) for name in weekly_weights.iloc[:, 0]}
+
+    def __len__(self) -> int:
+        return len(self.biomass)
+
+    def _offsets(self, times, start_date=None) -> np.ndarray:
+        """Nanoseconds since the start date (first reading if None)"""
+        times_ns = _times_ns(times)
+        if start_date is None:
+            start_ns = times_ns[0] if len(times_ns) else 0
+        else:
+            start_ns = pd.Timestamp(start_date).as_unit('ns').value
+        return times_ns - start_ns
+
+    def _weeks(self, offsets: np.ndarray) -> np.ndarray:
+        weeks = np.searchsorted(self.week_offsets, offsets, side='right') - 1
+        return np.clip(weeks, 0, len(self) - 1)
+
+    def week_of(self, times, start_date=None) -> np.ndarray:
+        """Week index of every reading, clipped to the weeks of the table"""
+        return self._weeks(self._offsets(times, start_date))
+
+    def lookup(self, times, start_date=None) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Week index, biomass, min_feed and max_feed of every reading.
+
+        With ``interpolate`` the biomass (and so the feed bounds) moves
+        linearly from one weigh-in to the next; otherwise it is the value of
+        the reading's week.
+        """
+        offsets = self._offsets(times, start_date)
+        weeks = self._weeks(offsets)
+        if not self.interpolate or len(self) < 2:
+            return weeks, self.biomass[weeks], self.min_feeds[weeks], self.max_feeds[weeks]
+
+        biomass = np.interp(offsets.astype(float), self.week_offsets.astype(float), self.biomass)
+        min_feeds, max_feeds = calculate_feed_bounds(biomass, self.multiplier_min, self.multiplier_max)
+        return weeks, biomass, min_feeds, max_feeds
+
+    def feed_bounds(self, times, start_date=None) -> Tuple[np.ndarray, np.ndarray]:
+        """Minimum and maximum feed of every reading"""
+        _, _, min_feeds, max_feeds = self.lookup(times, start_date)
+        return min_feeds, max_feeds
+
+    def feed_sets(self, feed_terms: Sequence[str], feed_positions: np.ndarray) -> List[Dict[str, List[float]]]:
+        """
+        Takaran trapmf params per week in grams (rounded like the inference trace), built once per set of positions.
+
+        Args:
+            feed_terms (Sequence[str]): Takaran term labels.
+            feed_positions (np.ndarray): (terms, 4) positions in step units of [0, FEED_DIVISIONS].
+        """
+        feed_positions = np.asarray(feed_positions, dtype=float)
+        key = (tuple(feed_terms), feed_positions.tobytes())
+        sets = self._feed_sets.get(key)
+        if sets is None:
+            steps = (self.max_feeds - self.min_feeds) / FEED_DIVISIONS
+            params = self.min_feeds[:, None, None] + feed_positions[None, :, :] * steps[:, None, None]
+            sets = [
+                {term: [round(float(v), 4) for v in week_params[t]] for t, term in enumerate(feed_terms)}
+                for week_params in params
+            ]
+            self._feed_sets[key] = sets
+        return sets
+
+    def describe(self) -> pd.DataFrame:
+        """Table of the index: week, biomass and feed bounds"""
+        return pd.DataFrame({
+            'Week': self.week_labels,
+            'Biomassa': self.biomass,
+            'Min_Feed': self.min_feeds,
+            'Max_Feed': self.max_feeds
+        })
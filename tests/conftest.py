@@ -0,0 +1,9 @@
+import sys
+from pathlib import Path
+
+# Impor di repo ini datar (lihat README), jadi folder sumber ditambahkan ke path
+ROOT = Path(__file__).resolve().parent.parent
+for folder in ('', 'src', 'src/utils', 'src/utils/Preprocessing'):
+    path = str(ROOT / folder)
+    if path not in sys.path:
+        sys.path.insert(0, path)
@@ -0,0 +1,100 @@
+import json
+
+import pytest
+
+import app as app_module
+from pond_registry import PondRegistry
+
+
+@pytest.fixture
+def client():
+    return app_module.app.test_client()
+
+
+def _ndjson(response):
+    return [json.loads(line) for line in response.get_data(as_text=True).splitlines() if line]
+
+
+def test_calculate_batch_mixed_json_array(client):
+    readings = [
+        {'id': 1, 'input1': 25, 'input2': 7},
+        [5, None],
+        5,
+        None,
+        {'id': 2, 'input1': 'x', 'input2': 7},
+        {'id': 3, 'input1': 30, 'input2': 8, 'weight': 100}
+    ]
+    response = client.post('/calculate/batch', json=readings)
+    assert response.status_code == 200
+
+    outputs = _ndjson(response)
+    assert len(outputs) == len(readings)
+    assert outputs[0]['id'] == 1 and outputs[0]['result'] is not None
+    for output in outputs[1:4]:
+        assert output == {'error': 'Bacaan harus berupa objek JSON'}
+    assert outputs[4] == {'id': 2, 'error': 'input1 dan input2 harus berupa angka'}
+    assert outputs[5]['id'] == 3 and outputs[5]['weight'] == 100
+
+
+def test_calculate_batch_mixed_ndjson(client):
+    body = '\n'.join([
+        json.dumps({'id': 1, 'input1': 25, 'input2': 7}),
+        '{"id": 2, "input1": 2',
+        json.dumps([5, None]),
+        '',
+        json.dumps({'id': 3, 'input1': 30, 'input2': 8})
+    ]) + '\n'
+    response = client.post('/calculate/batch', data=body, content_type='application/x-ndjson')
+    assert response.status_code == 200
+
+    outputs = _ndjson(response)
+    assert [output.get('id') for output in outputs] == [1, None, None, 3]
+    assert outputs[1]['error'].startswith('Baris 2 bukan JSON yang valid')
+    assert outputs[2] == {'error': 'Bacaan harus berupa objek JSON'}
+    assert 'error' not in outputs[0] and 'error' not in outputs[3]
+    single = _ndjson(client.post('/calculate/batch', json=[{'input1': 25, 'input2': 7}]))
+    assert outputs[0]['result'] == single[0]['result']
+
+
+def test_calculate_batch_matches_calculate(client):
+    reading = {'input1': 27.3, 'input2': 6.8, 'weight': 600}
+    single = client.post('/calculate', json=reading).json
+    batch = _ndjson(client.post('/calculate/batch', json=[reading]))[0]
+
+    for key in ('result', 'feed_amount', 'temperatur_memberships', 'ph_memberships', 'alpha_predikats'):
+        assert batch[key] == single[key]
+    assert 0 <= batch['result'] <= 100
+
+
+def test_calculate_routes_by_pond(client, monkeypatch):
+    registry = PondRegistry.from_dict({
+        'models': {'standar': {}, 'intensif': {'feed_multiplier': [0.06, 0.1]}},
+        'ponds': {'kolam_2': {'model': 'intensif'}}
+    })
+    monkeypatch.setattr(app_module.model_registry, '_ponds', registry)
+    monkeypatch.setattr(app_module.model_registry, '_fuzzy_apps', {})
+    reading = {'input1': 27.3, 'input2': 6.8, 'weight': 600}
+
+    default = client.post('/calculate', json=reading).json
+    pond = client.post('/calculate', json={**reading, 'pond': 'kolam_2'}).json
+    query = client.post('/calculate?pond=kolam_2', json=reading).json
+    batch = _ndjson(client.post('/calculate/batch', json=[{**reading, 'pond': 'kolam_2'}]))[0]
+    assert pond == query
+    assert pond['feed_amount'] == batch['feed_amount'] != default['feed_amount']
+
+    response = client.post('/calculate', json={**reading, 'pond': 'tidak_ada'})
+    assert response.status_code == 400
+    assert 'tidak_ada' in response.json['error']
+
+
+def test_post_readings_rejects_invalid_rows(client):
+    readings = [
+        {'Time': '2024-01-01 08:00', 'Temperature': 25, 'pH': 7},
+        [5, None],
+        {'Time': 'bukan tanggal', 'Temperature': 25, 'pH': 7},
+        {'Temperature': 25, 'pH': 7}
+    ]
+    response = client.post('/readings', json=readings)
+    assert response.status_code == 400
+    assert [row['index'] for row in response.json['rows']] == [1, 2, 3]
+    assert response.json['rows'][0]['error'] == 'Bacaan harus berupa objek JSON'
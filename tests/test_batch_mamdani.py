@@ -0,0 +1,108 @@
+import numpy as np
+import pytest
+import skfuzzy as fuzz
+from skfuzzy import control as ctrl
+
+from batch_mamdani import BatchMamdani
+from batch_mamdani import FEED_DIVISIONS
+from batch_mamdani import RULE_DEFINITIONS
+from batch_mamdani import alpha_cut_intervals
+from batch_mamdani import numpy_engine
+from batch_mamdani import trapezoid_centroid
+from time_filter import build_rules
+from time_filter import create_antecedent
+from time_filter import define_feed_membership_functions
+from time_filter import define_membership_functions
+
+# Universe scikit-fuzzy dari time_filter: step 0.001
+GRID_STEP = 0.001
+
+pytestmark = pytest.mark.filterwarnings('ignore::DeprecationWarning:skfuzzy')
+
+
+@pytest.fixture(scope='module')
+def antecedents():
+    return define_membership_functions(create_antecedent((14, 40, GRID_STEP), 'Temperatur'),
+                                       create_antecedent((4, 14, GRID_STEP), 'pH'))
+
+
+@pytest.fixture(scope='module')
+def readings():
+    rng = np.random.default_rng(0)
+    return rng.uniform(14.5, 39.5, 40).round(2), rng.uniform(4.5, 13.5, 40).round(2)
+
+
+def _skfuzzy_reference(temperatur, ph, temps, phs, min_feed, max_feed):
+    """Jalur lama: ControlSystemSimulation per bacaan dan derajat dari universe tersampel"""
+    feed_amount = ctrl.Consequent(np.arange(min_feed, max_feed, GRID_STEP), 'Takaran')
+    feed_amount, _ = define_feed_membership_functions(feed_amount, min_feed, max_feed)
+    simulation, _, _ = build_rules(temperatur, ph, feed_amount)
+
+    feeds, activations = [], []
+    for t, p in zip(temps, phs):
+        simulation.input['Temperatur'] = t
+        simulation.input['pH'] = p
+        simulation.compute()
+        feeds.append(simulation.output['Takaran'])
+        activations.append([
+            min(fuzz.interp_membership(temperatur.universe, temperatur[temp].mf, t),
+                fuzz.interp_membership(ph.universe, ph[ph_term].mf, p))
+            for temp, ph_term, _ in RULE_DEFINITIONS
+        ])
+    return np.array(feeds), np.array(activations)
+
+
+@pytest.mark.parametrize('engine_type', ['skfuzzy_antecedents', 'numpy_engine'])
+def test_engine_matches_scikit_fuzzy(antecedents, readings, engine_type):
+    temperatur, ph = antecedents
+    temps, phs = readings
+    min_feed, max_feed = 18.0, 30.0
+    expected_feed, expected_activations = _skfuzzy_reference(temperatur, ph, temps, phs, min_feed, max_feed)
+
+    engine = BatchMamdani(temperatur, ph) if engine_type == 'skfuzzy_antecedents' else numpy_engine()
+    result = engine.infer(temps, phs, min_feed, max_feed)
+    np.testing.assert_allclose(result.activations, expected_activations, atol=GRID_STEP)
+    np.testing.assert_allclose(result.feed, expected_feed, atol=2 * GRID_STEP)
+
+
+def _sampled_aggregate(feed_positions, term_activations, universe):
+    mfs = np.stack([fuzz.trapmf(universe, params) for params in feed_positions])
+    return np.fmin(term_activations[:, :, np.newaxis], mfs[np.newaxis]).max(axis=1)
+
+
+def test_trapezoid_centroid_matches_sampled_centroid():
+    engine = numpy_engine()
+    universe = np.linspace(0, FEED_DIVISIONS, 80001)
+    rng = np.random.default_rng(1)
+    term_activations = rng.uniform(0, 1, (200, len(engine.feed_terms)))
+    term_activations[rng.uniform(size=term_activations.shape) < 0.3] = 0
+
+    aggregated = _sampled_aggregate(engine.feed_positions, term_activations, universe)
+    area = aggregated.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        expected = np.where(area > 0, aggregated @ universe / area, np.nan)
+    np.testing.assert_allclose(trapezoid_centroid(engine.feed_positions, term_activations), expected,
+                               atol=1e-4, equal_nan=True)
+
+
+def test_alpha_cut_intervals_match_sampled_cuts():
+    engine = numpy_engine()
+    universe = np.linspace(0, FEED_DIVISIONS, 80001)
+    step = universe[1] - universe[0]
+    rng = np.random.default_rng(2)
+    term_activations = rng.uniform(0.05, 1, (100, len(engine.feed_terms)))
+    alphas = np.sort(term_activations, axis=1)[:, ::-1]
+    starts, ends = alpha_cut_intervals(engine.feed_positions, term_activations, alphas)
+
+    aggregated = _sampled_aggregate(engine.feed_positions, term_activations, universe)
+    for i in range(len(term_activations)):
+        for level in range(alphas.shape[1]):
+            inside = np.flatnonzero(aggregated[i] >= alphas[i, level])
+            breaks = np.flatnonzero(np.diff(inside) > 1)
+            expected_starts = universe[inside[np.r_[0, breaks + 1]]]
+            expected_ends = universe[inside[np.r_[breaks, len(inside) - 1]]]
+
+            n = len(expected_starts)
+            assert np.isnan(starts[i, level, n:]).all()
+            np.testing.assert_allclose(starts[i, level, :n], expected_starts, atol=step)
+            np.testing.assert_allclose(ends[i, level, :n], expected_ends, atol=step)
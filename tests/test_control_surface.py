@@ -0,0 +1,22 @@
+import numpy as np
+
+from control_surface import ControlSurface
+from pond_registry import PondRegistry
+
+
+def test_lookup_matches_exact_engine_near_nan_corners():
+    engine = PondRegistry.from_dict({}).engine()
+    surface = ControlSurface(engine, error_refinement=2)
+    assert surface.nan_mismatches == 0
+    assert np.isfinite(surface.error_estimate)
+
+    rng = np.random.default_rng(0)
+    temperatures = rng.uniform(39.5, 40, 2000)
+    phs = rng.uniform(13.5, 14, 2000)
+    exact = surface._exact(engine, temperatures, phs)
+    approx = surface.lookup(temperatures, phs)
+    np.testing.assert_array_equal(np.isnan(approx), np.isnan(exact))
+    assert np.nanmax(np.abs(approx - exact)) <= surface.error_estimate
+
+    scalar = [surface(t, p, 0.0, 8.0) for t, p in zip(temperatures, phs)]
+    np.testing.assert_allclose(scalar, approx)
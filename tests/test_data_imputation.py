@@ -0,0 +1,52 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from DataImputation import GapImputer
+from DataImputation import gap_imputation
+
+
+@pytest.fixture
+def slots():
+    """Empat slot per hari selama 30 hari dengan celah pendek (<= 6 jam), sedang (<= 3 hari) dan panjang"""
+    rng = np.random.default_rng(0)
+    days = pd.date_range('2024-01-01', periods=30, freq='D')
+    hours = pd.to_timedelta(['08:00:00', '10:00:00', '12:00:00', '18:00:00']).values
+    times = (days.values[:, np.newaxis] + hours).ravel()
+    data = pd.DataFrame({
+        'Time': pd.to_datetime(times),
+        'Temperature': rng.uniform(22, 30, len(times)).round(2),
+        'pH': rng.uniform(6, 8, len(times)).round(2)
+    })
+    data.loc[[5, 13, 14], 'Temperature'] = np.nan
+    data.loc[30:37, ['Temperature', 'pH']] = np.nan
+    data.loc[50:64, 'pH'] = np.nan
+    data.loc[113:, ['Temperature', 'pH']] = np.nan
+    return data
+
+
+@pytest.mark.parametrize('chunk_size', [1, 3, 7, 120])
+def test_chunked_gap_imputer_equals_gap_imputation(slots, chunk_size):
+    imputer = GapImputer()
+    parts = [imputer.push(slots.iloc[start:start + chunk_size].reset_index(drop=True))
+             for start in range(0, len(slots), chunk_size)]
+    parts.append(imputer.flush())
+    chunked = pd.concat([part for part in parts if not part.empty], ignore_index=True)
+
+    expected = gap_imputation(slots.copy())
+    pd.testing.assert_frame_equal(chunked[['Time', 'Temperature', 'pH']].astype({'Temperature': float, 'pH': float}),
+                                  expected[['Time', 'Temperature', 'pH']], check_dtype=False)
+
+
+def test_gap_imputer_state_round_trip(slots):
+    imputer = GapImputer()
+    first = imputer.push(slots.iloc[:34])
+    assert imputer.pending is not None  # Celah di akhir chunk ditahan dan ikut disimpan di state
+    restored = GapImputer()
+    restored.load_state(imputer.state())
+    rest = pd.concat([restored.push(slots.iloc[34:]), restored.flush()], ignore_index=True)
+
+    chunked = pd.concat([first, rest], ignore_index=True)
+    expected = gap_imputation(slots.copy())
+    np.testing.assert_allclose(chunked[['Temperature', 'pH']].to_numpy(dtype=float),
+                               expected[['Temperature', 'pH']].to_numpy(dtype=float))
@@ -0,0 +1,52 @@
+import pandas as pd
+
+from incremental import IncrementalPipeline
+from PathManager import DATA_DIR
+from trace_store import ResultTable
+
+
+def _readings(start, periods):
+    return pd.DataFrame({
+        'Time': pd.date_range(start, periods=periods, freq='1h'),
+        'Temperature': 25.0,
+        'pH': 7.0
+    })
+
+
+def test_ingest_always_returns_result_table(tmp_path):
+    pipeline = IncrementalPipeline(pd.read_csv(DATA_DIR / 'berat_lobster_weekly.csv'), output_dir=tmp_path)
+
+    pending = pipeline.ingest(_readings('2024-01-01 07:00', 1))
+    duplicate = pipeline.ingest(_readings('2024-01-01 07:00', 1))
+    results = pipeline.ingest(_readings('2024-01-01 08:00', 80))
+
+    for table in (pending, duplicate, results):
+        assert isinstance(table, ResultTable)
+    assert len(pending) == len(duplicate) == 0
+    assert len(results) > 0
+    assert list(pending.trace.columns) == list(results.trace.columns)
+    assert list(pending) == []
+
+
+def test_trailing_gap_is_not_held_back(tmp_path):
+    readings = _readings('2024-01-01 07:00', 24 * 8)
+    readings['Temperature'] = 20 + (readings.index % 10)
+    dropout = (readings['Time'] >= '2024-01-03 12:00') & (readings['Time'] < '2024-01-05 12:00')
+    readings.loc[dropout, ['Temperature', 'pH']] = float('nan')
+
+    def emitted(gap_holdback, output_dir):
+        pipeline = IncrementalPipeline(pd.read_csv(DATA_DIR / 'berat_lobster_weekly.csv'),
+                                       output_dir=output_dir, gap_holdback=gap_holdback)
+        received = {}
+        for start in range(0, len(readings), 6):
+            chunk = readings.iloc[start:start + 6]
+            for result in pipeline.ingest(chunk):
+                received[pd.Timestamp(result['Time'])] = chunk['Time'].iloc[-1]
+        return received
+
+    prompt = emitted('0h', tmp_path / 'prompt')
+    exact = emitted(None, tmp_path / 'exact')
+    assert prompt.keys() == exact.keys()
+    # Slot dalam celah dikirim pada chunk yang menutup jendelanya, bukan setelah data kembali
+    assert all(received - slot <= pd.Timedelta(hours=12) for slot, received in prompt.items())
+    assert max(received - slot for slot, received in exact.items()) > pd.Timedelta(days=2)
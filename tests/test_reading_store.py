@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from reading_store import ReadingStore
+
+
+def _readings(start, periods, freq='1h'):
+    times = pd.date_range(start, periods=periods, freq=freq)
+    return pd.DataFrame({'Time': times, 'Temperature': np.linspace(20, 30, periods), 'pH': 7.0})
+
+
+def test_append_range_and_last(tmp_path):
+    store = ReadingStore(tmp_path / 'readings.store', grow=16)
+    assert store.append_readings(_readings('2024-01-01', 40)) == 40
+    assert store.append_readings(_readings('2024-01-02 16:00', 10)) == 50
+    assert store.capacity == 64
+
+    records = store.records()
+    assert len(records) == 50
+    assert (np.diff(records['time']) > 0).all()
+
+    day = store.range('2024-01-01 10:00', '2024-01-01 20:00')
+    assert len(day) == 10
+    assert pd.Timestamp(int(day['time'][0])) == pd.Timestamp('2024-01-01 10:00')
+    assert len(store.range(start='2024-01-02 20:00')) == 6
+    assert len(store.range(end='2024-01-01 01:00')) == 1
+
+    # Rentang `last` termasuk batas bawahnya: 01:00 - 5 jam = 20:00 hari sebelumnya
+    last = store.last('5h')
+    assert len(last) == 6
+    assert [str(pd.Timestamp(int(t))) for t in last['time'][[0, -1]]] == ['2024-01-02 20:00:00', '2024-01-03 01:00:00']
+    assert len(store.last('1D')) == 25
+
+
+def test_reader_sees_appends_and_header(tmp_path):
+    path = tmp_path / 'readings.store'
+    writer = ReadingStore(path)
+    writer.append_readings(_readings('2024-01-01', 5))
+    reader = ReadingStore(path, mode='r')
+    assert len(reader) == 5
+
+    writer.append_readings(_readings('2024-01-01 05:00', 3))
+    assert len(reader) == 8
+    frame = reader.to_frame()
+    assert frame['Time'].iloc[-1] == pd.Timestamp('2024-01-01 07:00')
+    assert frame['feed_amount'].isna().all()
+
+    with pytest.raises(ValueError):
+        reader.append_readings(_readings('2024-01-02', 1))
+    with pytest.raises(ValueError):
+        ReadingStore(path, rule_labels=['Rule 1'])
+
+
+def test_out_of_order_append_is_rejected(tmp_path):
+    store = ReadingStore(tmp_path / 'readings.store')
+    store.append_readings(_readings('2024-01-02', 3))
+
+    with pytest.raises(ValueError):
+        store.append_readings(_readings('2024-01-01', 2))
+    with pytest.raises(ValueError):
+        store.append_readings(_readings('2024-01-03', 3).iloc[::-1])
+    assert len(store) == 3
+    assert len(ReadingStore(tmp_path / 'readings.store', mode='r')) == 3
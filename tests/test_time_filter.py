@@ -0,0 +1,19 @@
+import numpy as np
+import pandas as pd
+
+from pond_registry import PondRegistry
+from time_filter import process_data_by_pond
+
+
+def test_process_data_by_pond_keeps_readings_without_pond():
+    readings = pd.DataFrame({
+        'Time': pd.date_range('2024-01-01 08:00', periods=6, freq='10h'),
+        'Temperature': [25.0, 26.0, 27.0, 28.0, 29.0, 30.0],
+        'pH': [7.0, 7.2, 7.4, 7.6, 7.8, 8.0],
+        'Pond': ['A', np.nan, 'B', 'A', None, 'B']
+    })
+    registry = PondRegistry.from_dict({'ponds': {'A': {}, 'B': {}}})
+
+    results = process_data_by_pond(registry, readings, start_date=readings['Time'].iloc[0])
+    assert {pond: len(table) for pond, table in results.items()} == {'A': 2, None: 2, 'B': 2}
+    assert results[None].trace['Temperatur'].tolist() == [26.0, 29.0]
@@ -0,0 +1,42 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from pond_registry import PondRegistry
+from time_filter import process_data_table
+from trace_store import ResultTable
+from trace_store import load_trace
+from trace_store import save_trace
+
+
+@pytest.fixture(scope='module')
+def table():
+    rng = np.random.default_rng(0)
+    readings = pd.DataFrame({
+        'Time': pd.date_range('2024-01-01 08:00', periods=60, freq='10h'),
+        'Temperature': rng.uniform(14, 40, 60).round(2),
+        'pH': rng.uniform(4, 14, 60).round(2)
+    })
+    registry = PondRegistry.from_dict({})
+    return process_data_table(registry.weekly_index(), readings, engine=registry.engine(), model=registry.model())
+
+
+@pytest.mark.parametrize('name', ['inferensi.parquet', 'inferensi.ndjson'])
+def test_appended_trace_equals_single_write(tmp_path, table, name):
+    if name.endswith('.parquet'):
+        pytest.importorskip('pyarrow')
+    chunks = [ResultTable(table.trace.iloc[i:i + 25].reset_index(drop=True), table.metadata)
+              for i in range(0, len(table), 25)]
+    for i, chunk in enumerate(chunks):
+        save_trace(chunk, tmp_path / name, append=i > 0)
+    save_trace(table, tmp_path / f'single_{name}')
+
+    appended, metadata = load_trace(tmp_path / name)
+    single, _ = load_trace(tmp_path / f'single_{name}')
+    pd.testing.assert_frame_equal(appended, single)
+    assert metadata == table.metadata
+
+    # Menulis ulang tanpa append mengganti trace per-part dengan satu file
+    save_trace(table, tmp_path / name)
+    assert (tmp_path / name).is_file()
+    pd.testing.assert_frame_equal(load_trace(tmp_path / name)[0], single)